@@ -0,0 +1,143 @@
+"""
+asv benchmarks for the pipeline stages on synthetic IES-3 data.
+
+RowScaling times every stage at 1e2, 1e4 and 1e6 respondents with the real
+variable set; VariableScaling times them at 1e4 respondents with the
+independent variables and scales copied 1x, 10x and 100x (see
+scripts/synthetic_data.py). Run with ``asv run`` or, without asv installed,
+``python -m benchmarks.run``.
+"""
+
+import io
+import os
+import sys
+import json
+import tempfile
+import contextlib
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.synthetic_data import write_synthetic_dataset
+from scripts.data_loader import process_data, generate_demographics_table
+from scripts.eda import summarize_frame
+from scripts.statistical_analysis import perform_statistical_analysis
+from scripts.correlation_analysis import correlation_matrices, cramers_v_matrix
+from scripts.visualization import create_visualizations
+
+BASE_DEFS_PATH = Path(__file__).resolve().parent.parent / "data" / "variable_definitions.json"
+ROW_COUNTS = [100, 10_000, 1_000_000]
+MULTIPLIERS = [1, 10, 100]
+SCALE_ROWS = 10_000
+MISSING_RATE = 0.02
+
+def _write_datasets(specs):
+    """
+    Write one synthetic dataset per {param: (rows, multiplier)} entry under the
+    working directory, which asv (and benchmarks/run.py) sets to a scratch
+    directory for setup_cache and removes after the suite; returns param -> directory
+    """
+    with open(BASE_DEFS_PATH) as f:
+        base_defs = json.load(f)
+    root = Path("ies3-bench").resolve()
+    paths = {}
+    for param, (rows, multiplier) in specs.items():
+        out_dir = root / f"{rows}x{multiplier}"
+        write_synthetic_dataset(out_dir, base_defs, rows, multiplier=multiplier,
+                                missing_rate=MISSING_RATE, seed=0)
+        paths[param] = str(out_dir)
+    return paths
+
+def _load(out_dir):
+    with open(Path(out_dir) / "variable_definitions.json") as f:
+        var_defs = json.load(f)
+    raw = pd.read_csv(Path(out_dir) / "data.tsv", sep='\t')
+    return raw, var_defs
+
+class _DatasetSuite:
+    """Loads the synthetic dataset for a parameter; setup_cache (from the params mixin) writes them"""
+    timeout = 1800
+    number = 1
+    repeat = (1, 3, 30.0)
+
+    def setup(self, datasets, param):
+        self.data_dir = datasets[param]
+        raw, self.var_defs = _load(self.data_dir)
+        self.df = process_data(raw, self.var_defs)
+        self.categorical = [c for c, info in self.var_defs['variables'].items()
+                            if info['type'] in ('demographic', 'independent')]
+
+class _StageSuite(_DatasetSuite):
+    """One benchmark per pipeline stage"""
+
+    def time_load(self, datasets, param):
+        process_data(pd.read_csv(Path(self.data_dir) / "data.tsv", sep='\t'), self.var_defs)
+
+    def time_eda(self, datasets, param):
+        summarize_frame(self.df)
+
+    def time_demographics(self, datasets, param):
+        generate_demographics_table(self.df, self.var_defs)
+
+    def time_stats(self, datasets, param):
+        perform_statistical_analysis(self.df, self.var_defs)
+
+    def time_correlations(self, datasets, param):
+        correlation_matrices(self.df)
+        cramers_v_matrix(self.df, self.categorical)
+
+    def time_charts(self, datasets, param):
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_visualizations(self.df, self.var_defs, compact=True)
+
+    def peakmem_stats(self, datasets, param):
+        perform_statistical_analysis(self.df, self.var_defs)
+
+class _ReportSuite(_DatasetSuite):
+    """Page rendering and writing, with charts and test results prepared in setup"""
+
+    def setup(self, datasets, param):
+        super().setup(datasets, param)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.charts = create_visualizations(self.df, self.var_defs, compact=True)
+        self.t_test, self.anova = perform_statistical_analysis(self.df, self.var_defs)
+
+    def time_report(self, datasets, param):
+        # generate_docs writes relative to the working directory
+        from scripts.generate_report import generate_docs
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            os.chdir(tmp)
+            try:
+                generate_docs(self.df, self.var_defs, self.charts,
+                              t_test_results=self.t_test, anova_results=self.anova)
+            finally:
+                os.chdir(cwd)
+
+class _RowParams:
+    params = [ROW_COUNTS]
+    param_names = ['rows']
+
+    def setup_cache(self):
+        return _write_datasets({rows: (rows, 1) for rows in ROW_COUNTS})
+
+class _VariableParams:
+    params = [MULTIPLIERS]
+    param_names = ['multiplier']
+
+    def setup_cache(self):
+        return _write_datasets({m: (SCALE_ROWS, m) for m in MULTIPLIERS})
+
+class RowScaling(_RowParams, _StageSuite):
+    pass
+
+class RowScalingReport(_RowParams, _ReportSuite):
+    pass
+
+class VariableScaling(_VariableParams, _StageSuite):
+    pass
+
+class VariableScalingReport(_VariableParams, _ReportSuite):
+    pass
@@ -0,0 +1,590 @@
+"""
+Differential correctness harness for the fast statistics engines.
+
+Runs each batched engine (Welch t-tests, Type II ANCOVA, pairwise correlations,
+Cramer's V) side by side with the pingouin/scipy reference it replaced, and
+the --incremental sufficient statistics (fed the rows in two batches) side by
+side with perform_statistical_analysis on all rows, FDR adjustment included, on
+
+- the real dataset (data/data.tsv, loaded as the pipeline loads it),
+- the SPSS table in oosterhouse_pvals.tsv.tsv (group sizes, means, SDs and
+  p-values, compared up to the table's rounding), and
+- randomized synthetic datasets, including empty and single-member groups,
+  constant and all-missing columns, heavy NaN, ties, large offsets, single
+  category levels and collinear covariates.
+
+Prints the maximum absolute and relative deviation of every statistic, the
+number of values where only one side is NaN/inf, and the reference/fast timing
+ratio per engine. Exits with status 1 if any engine disagrees with its
+reference beyond ATOL + RTOL * |reference| on the real or synthetic data; the
+SPSS comparison is informational, since the table holds rounded values and
+does not record which t-test each p-value came from, and so is Spearman with
+missing data (the INFORMATIONAL statistics), which the engine ranks once per
+column rather than per pair.
+
+    python -m benchmarks.differential [--cases N] [--seed S] [--engine NAME ...] [--json PATH]
+
+Random case i is random_case(seed, i), so a failing case can be rebuilt and
+inspected on its own.
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import argparse
+import warnings
+import contextlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.data_loader import load_data, get_outcome_variables, get_variables_by_type
+from scripts.statistical_analysis import (welch_ttest_batch, ancova_batch, covariate_frame,
+                                          perform_statistical_analysis, EXACT_FIT_TOL)
+from scripts.incremental import SufficientStatistics
+from scripts.correlation_analysis import correlation_matrices, cramers_v_matrix
+
+SPSS_PATH = PROJECT_ROOT / "oosterhouse_pvals.tsv.tsv"
+# SPSS table labels -> variable names in data/variable_definitions.json
+SPSS_VARIABLES = {
+    'Gender': 'What is your gender?',
+    'History of eating disorder': 'Have you ever been diagnosed with an eating disorder?',
+    'Prior recommendation to change weight': 'Have you every been told you should change your weight?',
+    'Weight-sensitive sport': 'Weight-sensitive sport',
+    'Endurance sport': 'Endurance sport',
+}
+SPSS_OUTCOMES = {'SS1': 'SS1 avg', 'SS2': 'SS2 avg', 'SS3': 'SS3 avg', 'SS4': 'SS4 avg',
+                 'Total Score': 'Total Score Avg'}
+# Half a unit in the last digit the SPSS table reports
+SPSS_ROUNDING = {'n': 0.0, 'mean': 0.005, 'sd': 0.005, 'p_value': 0.0005}
+
+RANDOM_CASES = 2000
+# (engine, statistic) pairs reported but not gating the exit status: with
+# missing data Spearman ranks each column once (see correlation_matrices), the
+# reference re-ranks every pair
+INFORMATIONAL = {('correlations', 'spearman, missing data')}
+ATOL = 1e-9
+RTOL = 1e-6
+# (atol, rtol) for engines that cannot reach ATOL: the incremental statistics
+# solve the normal equations, which square the design's condition number
+ENGINE_TOLERANCES = {'incremental': (1e-8, RTOL)}
+
+TTEST_METRICS = ('n1', 'n2', 'mean1', 'mean2', 'sd1', 'sd2', 't', 'dof', 'p_value', 'cohens_d')
+ANCOVA_METRICS = ('F', 'p_value', 'partial_eta_sq')
+
+# ---------------------------------------------------------------------------
+# Engines: fast(case) and reference(case) return {metric: array} of equal shapes,
+# or {(metric, *row key): value} when the two sides may report different rows
+
+def ttest_fast(case):
+    res = welch_ttest_batch(case['y'], case['binary'] == 0, case['binary'] == 1)
+    return {m: np.asarray(res[m], dtype=float) for m in TTEST_METRICS}
+
+def ttest_reference(case):
+    """pingouin.ttest(correction=True) per outcome, group moments from pandas, as the original loop did"""
+    import pingouin as pg
+    y, codes = case['y'], case['binary']
+    out = {m: np.full(y.shape[1], np.nan) for m in TTEST_METRICS}
+    for j in range(y.shape[1]):
+        group1 = pd.Series(y[codes == 0, j]).dropna()
+        group2 = pd.Series(y[codes == 1, j]).dropna()
+        out['n1'][j], out['n2'][j] = len(group1), len(group2)
+        out['mean1'][j], out['mean2'][j] = group1.mean(), group2.mean()
+        out['sd1'][j], out['sd2'][j] = group1.std(), group2.std()
+        if min(len(group1), len(group2)) < 2 or np.ptp(np.r_[group1, group2]) == 0:
+            # pingouin runs a one-sample test against a one-value group, and a
+            # constant outcome gives rounding noise over rounding noise: the
+            # two-sample statistics are undefined
+            continue
+        res = pg.ttest(group1, group2, correction=True)
+        out['t'][j] = res['T'].iloc[0]
+        out['dof'][j] = res['dof'].iloc[0]
+        out['p_value'][j] = res['p-val'].iloc[0]
+        out['cohens_d'][j] = res['cohen-d'].iloc[0]
+        if out['sd1'][j] == 0 and out['sd2'][j] == 0:
+            # Welch's degrees of freedom are 0/0 here; pingouin reports 1 and p = 0
+            out['dof'][j] = out['p_value'][j] = np.nan
+    return out
+
+def _ancova_fitted(n, n_covariates):
+    # perform_statistical_analysis reports no result for outcomes this small
+    return n > n_covariates + 2
+
+def ancova_fast(case):
+    res = ancova_batch(case['y'], case['groups'], case['covariates'])
+    fitted = _ancova_fitted(res['n'], case['covariates'].shape[1])
+    out = {m: np.where(fitted, res[m], np.nan) for m in ANCOVA_METRICS}
+    out['n'] = res['n'].astype(float)
+    return out
+
+def _design_blocks(data, names):
+    """Intercept and the column blocks of each ANCOVA term (group dummies, then covariates)"""
+    dummies = pd.get_dummies(data['group'], drop_first=True, dtype=float).to_numpy()
+    return np.ones((len(data), 1)), [dummies] + [data[[name]].to_numpy() for name in names]
+
+def _nested_type2(data, names):
+    """
+    Type II effects by nested-model F tests for rank-deficient designs, where
+    pingouin keeps each term's nominal degrees of freedom and fits aliased
+    terms by pseudo-inverse. Each design is first cut down to independent
+    columns (kept left to right while they raise the SVD rank), so statsmodels
+    fits a full-rank model and the degrees of freedom are the column counts.
+    """
+    import statsmodels.api as sm
+    from scipy import stats
+
+    def independent(x):
+        kept = []
+        for col in range(x.shape[1]):
+            if np.linalg.matrix_rank(x[:, kept + [col]]) > len(kept):
+                kept.append(col)
+        return x[:, kept]
+
+    y = data['y'].to_numpy()
+    const, blocks = _design_blocks(data, names)
+    x = independent(np.column_stack([const] + blocks))
+    rss = sm.OLS(y, x).fit().ssr
+    df_resid = len(y) - x.shape[1]
+    effects = []
+    for t in range(len(blocks)):
+        reduced = independent(np.column_stack([const] + blocks[:t] + blocks[t + 1:]))
+        df_term = x.shape[1] - reduced.shape[1]
+        if df_term <= 0 or df_resid <= 0:
+            effects.append((np.nan, np.nan, np.nan))
+            continue
+        ss = sm.OLS(y, reduced).fit().ssr - rss
+        f = (ss / df_term) / (rss / df_resid)
+        effects.append((f, stats.f.sf(f, df_term, df_resid), ss / (ss + rss)))
+    return effects, rss, df_resid
+
+def ancova_reference(case):
+    """
+    pingouin.ancova per outcome on its complete rows, as the original loop did
+    (nested-model tests for rank-deficient designs). Outcomes the engine
+    defines as untestable are NaN: one group level, or no residual variance
+    (saturated, constant or exactly fitted), where every F is rounding noise.
+    """
+    import pingouin as pg
+    y, groups, covariates = case['y'], case['groups'], case['covariates']
+    names = [f"c{i}" for i in range(covariates.shape[1])]
+    frame = pd.DataFrame(covariates, columns=names)
+    frame['group'] = np.where(groups >= 0, groups, np.nan)
+    out = {m: np.full((1 + len(names), y.shape[1]), np.nan) for m in ANCOVA_METRICS}
+    out['n'] = np.zeros(y.shape[1])
+    for j in range(y.shape[1]):
+        data = frame.assign(y=y[:, j]).dropna()
+        out['n'][j] = len(data)
+        if not _ancova_fitted(len(data), len(names)) or data['group'].nunique() < 2:
+            continue
+        const, blocks = _design_blocks(data, names)
+        x = np.column_stack([const] + blocks)
+        if np.linalg.matrix_rank(x) < x.shape[1]:
+            effects, rss, df_resid = _nested_type2(data, names)
+        else:
+            try:
+                table = pg.ancova(data=data, dv='y', between='group', covar=names).set_index('Source')
+            except Exception:
+                # The original loop skipped outcomes pingouin could not fit
+                continue
+            effects = [tuple(table.loc[source, ['F', 'p-unc', 'np2']]) for source in ['group'] + names]
+            rss, df_resid = table.at['Residual', 'SS'], table.at['Residual', 'DF']
+        tss = ((data['y'] - data['y'].mean()) ** 2).sum()
+        if df_resid <= 0 or np.ptp(data['y']) == 0 or rss <= tss * EXACT_FIT_TOL:
+            continue
+        for t, (f, p, e) in enumerate(effects):
+            out['F'][t, j], out['p_value'][t, j], out['partial_eta_sq'][t, j] = f, p, e
+    return out
+
+def _upper(matrix):
+    matrix = np.asarray(matrix, dtype=float)
+    return matrix[np.triu_indices(matrix.shape[0], k=1)]
+
+def correlations_fast(case):
+    x = case['numeric']
+    res = correlation_matrices(pd.DataFrame(x), columns=list(range(x.shape[1])))
+    out = {'pearson': _upper(res['pearson']), 'p_value': _upper(res['p_values'])}
+    out['spearman, missing data' if np.isnan(x).any() else 'spearman'] = _upper(res['spearman'])
+    return out
+
+def correlations_reference(case):
+    """
+    scipy.stats.pearsonr / spearmanr per pair on its pairwise-complete rows.
+    Pairs with two rows get no p-value: scipy reports 1 on zero degrees of
+    freedom, the engine NaN.
+    """
+    from scipy import stats
+    x = case['numeric']
+    pi, pj = np.triu_indices(x.shape[1], k=1)
+    spearman = 'spearman, missing data' if np.isnan(x).any() else 'spearman'
+    out = {'pearson': np.full(len(pi), np.nan), 'p_value': np.full(len(pi), np.nan),
+           spearman: np.full(len(pi), np.nan)}
+    for idx, (i, j) in enumerate(zip(pi, pj)):
+        rows = ~np.isnan(x[:, i]) & ~np.isnan(x[:, j])
+        if rows.sum() < 2:
+            continue
+        out['pearson'][idx], p_value = stats.pearsonr(x[rows, i], x[rows, j])
+        if rows.sum() > 2:
+            out['p_value'][idx] = p_value
+        out[spearman][idx] = stats.spearmanr(x[rows, i], x[rows, j]).statistic
+    return out
+
+def cramers_v_fast(case):
+    frame = case['categorical']
+    return {'cramers_v': _upper(cramers_v_matrix(frame, frame.columns)[0])}
+
+def cramers_v_reference(case):
+    """scipy.stats.contingency.association on pd.crosstab per pair, as the original chart code did"""
+    from scipy.stats import contingency
+    frame = case['categorical']
+    columns = list(frame.columns)
+    pi, pj = np.triu_indices(len(columns), k=1)
+    v = np.full(len(pi), np.nan)
+    for idx, (i, j) in enumerate(zip(pi, pj)):
+        try:
+            v[idx] = contingency.association(pd.crosstab(frame[columns[i]], frame[columns[j]]), method='cramer')
+        except (ValueError, ZeroDivisionError):
+            continue
+    return {'cramers_v': v}
+
+# name -> (case field the engine needs, fast, reference)
+def _frame_case(case):
+    """
+    A processed frame and definitions for a random case: its outcomes, the
+    multi-level factor as the independent variable, and the binary variable
+    and categorical columns as demographics (the ANCOVA covariates)
+    """
+    n, k = case['y'].shape
+    variables = {f"y{j}": {'type': 'outcome', 'format': 'numeric'} for j in range(k)}
+    columns = {f"y{j}": case['y'][:, j] for j in range(k)}
+
+    def add(name, var_type, codes, n_levels):
+        labels = [f"L{level}" for level in range(n_levels)]
+        variables[name] = {'type': var_type, 'format': 'categorical',
+                           'values': {str(level + 1): label for level, label in enumerate(labels)}}
+        columns[name] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+    add('group', 'independent', case['groups'], max(int(case['groups'].max(initial=0)) + 1, 3))
+    add('binary', 'demographic', case['binary'], 2)
+    for col in case['categorical']:
+        values = case['categorical'][col].to_numpy()
+        add(col, 'demographic', np.where(np.isnan(values), -1, np.nan_to_num(values) - 1).astype(int),
+            int(np.nanmax(values, initial=1)))
+    return pd.DataFrame(columns, index=range(n)), {'variables': variables}
+
+def _incremental_frames(frames):
+    """Flat {statistic: values} from (t_test_df, anova_df), rows keyed by variable, outcome and term"""
+    t_test_df, anova_df = frames
+    rows = {}
+    for r in t_test_df.to_dict('records'):
+        for m in ('t_statistic', 'dof', 'raw_p_value', 'adj_p_value', 'Cohens_d'):
+            rows[(f"t-test {m}", r['Variable'], r['Outcome'])] = r[m]
+    for r in anova_df.to_dict('records'):
+        for m in ('F_statistic', 'raw_p_value', 'adj_p_value', 'partial_eta_squared'):
+            rows[(f"ANCOVA {m}", r['Variable'], r['Outcome'])] = r[m]
+        for cov, effect in r['Covariate_Effects'].items():
+            for m in ('F', 'raw_p_value', 'adj_p_value', 'partial_eta_sq'):
+                rows[(f"covariate {m}", r['Variable'], r['Outcome'], cov)] = effect.get(m, np.nan)
+    return rows
+
+def _align(fast, reference):
+    """Both sides' values per statistic over the union of their rows (NaN where a row is missing)"""
+    out_fast, out_reference = {}, {}
+    for key in sorted(set(fast) | set(reference), key=str):
+        out_fast.setdefault(key[0], []).append(fast.get(key, np.nan))
+        out_reference.setdefault(key[0], []).append(reference.get(key, np.nan))
+    return ({m: np.array(v, dtype=float) for m, v in out_fast.items()},
+            {m: np.array(v, dtype=float) for m, v in out_reference.items()})
+
+def incremental_fast(case):
+    """SufficientStatistics fed the rows in two batches, as --incremental appends to data.tsv"""
+    df, var_defs = case['frame']
+    stats = SufficientStatistics(var_defs)
+    half = len(df) // 2
+    stats.update(df.iloc[:half])
+    stats.update(df.iloc[half:])
+    return _incremental_frames(stats.results())
+
+def incremental_reference(case):
+    """perform_statistical_analysis on all rows; it must equal the incremental results, FDR included"""
+    df, var_defs = case['frame']
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _incremental_frames(perform_statistical_analysis(df, var_defs))
+
+ENGINES = {
+    'ttest': ('binary', ttest_fast, ttest_reference),
+    'ancova': ('groups', ancova_fast, ancova_reference),
+    'incremental': ('frame', incremental_fast, incremental_reference),
+    'correlations': ('numeric', correlations_fast, correlations_reference),
+    'cramers_v': ('categorical', cramers_v_fast, cramers_v_reference),
+}
+
+# ---------------------------------------------------------------------------
+# Datasets
+
+def real_cases(df, var_defs):
+    """One case per t-test / ANCOVA grouping variable, built as perform_statistical_analysis builds them"""
+    outcome_cols = get_outcome_variables(var_defs)
+    demographic_vars = get_variables_by_type(var_defs, 'demographic', 'categorical')
+    independent_vars = get_variables_by_type(var_defs, 'independent', 'categorical')
+    y = df[outcome_cols].to_numpy(dtype=float)
+    covariates = covariate_frame(df, demographic_vars).to_numpy(dtype=float).reshape(len(df), -1)
+    cases = []
+    for var in demographic_vars + independent_vars:
+        groups = df[var].dropna().unique()
+        binary = None
+        if len(var_defs['variables'][var]['values']) == 2 and len(groups) == 2:
+            binary = np.select([df[var] == groups[0], df[var] == groups[1]], [0, 1], -1)
+        codes = pd.Categorical(df[var]).codes.astype(int) if var in independent_vars else None
+        if binary is not None or codes is not None:
+            cases.append({'name': f"real: {var}", 'y': y, 'binary': binary, 'groups': codes,
+                          'covariates': covariates})
+    categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    cases.append({'name': "real: all columns",
+                  'numeric': df.select_dtypes(include=[np.number]).to_numpy(dtype=float),
+                  'categorical': df[categorical], 'frame': (df, var_defs)})
+    return cases
+
+def _with_missing(rng, values, rate):
+    values = values.astype(float)
+    values[rng.random(values.shape) < rate] = np.nan
+    return values
+
+def random_case(seed, i):
+    """
+    Randomized synthetic case i: a handful of outcomes, a binary and a
+    multi-level grouping variable, covariates and categorical columns, with
+    edge cases drawn at random (see the module docstring).
+    """
+    rng = np.random.default_rng([seed, i])
+    n = int(rng.choice([0, 1, 2, 3, 5, 8, 20, 60, 200]))
+    k = int(rng.integers(1, 5))
+    nan_rate = float(rng.choice([0.0, 0.0, 0.05, 0.3, 0.8]))
+    tags = []
+
+    y = rng.normal(rng.uniform(-5, 5, k), rng.uniform(0.1, 3, k), (n, k))
+    if rng.random() < 0.3:
+        y = np.round(y)
+        tags.append("ties")
+    if rng.random() < 0.1:
+        y += 1e6
+        tags.append("offset")
+    y = _with_missing(rng, y, nan_rate)
+    if k and rng.random() < 0.15:
+        y[:, rng.integers(k)] = rng.normal()
+        tags.append("constant column")
+    if k and rng.random() < 0.05:
+        y[:, rng.integers(k)] = np.nan
+        tags.append("all-NaN column")
+
+    binary = (rng.random(n) < rng.uniform(0.1, 0.9)).astype(int)
+    if rng.random() < 0.1:
+        binary[:] = 0
+        tags.append("empty group")
+    elif n and rng.random() < 0.1:
+        binary[:] = 0
+        binary[rng.integers(n)] = 1
+        tags.append("single-member group")
+    binary[rng.random(n) < nan_rate / 2] = -1
+
+    levels = int(rng.integers(2, 6))
+    groups = rng.integers(0, levels, n)
+    if rng.random() < 0.1:
+        groups[:] = 0
+        tags.append("single level")
+    elif n and rng.random() < 0.1:
+        groups[groups == levels - 1] = 0
+        groups[rng.integers(n)] = levels - 1
+        tags.append("singleton level")
+    groups[rng.random(n) < nan_rate / 2] = -1
+
+    n_cov = int(rng.integers(1, 4))
+    covariates = np.column_stack([rng.normal(size=n) if rng.random() < 0.5 else (rng.random(n) < 0.4)
+                                  for _ in range(n_cov)]).astype(float).reshape(n, n_cov)
+    if n_cov > 1 and rng.random() < 0.1:
+        covariates[:, -1] = covariates[:, 0]
+        tags.append("collinear covariates")
+    if rng.random() < 0.1:
+        covariates[:, 0] = 1.0
+        tags.append("constant covariate")
+    covariates[rng.random(n) < nan_rate / 4, 0] = np.nan
+
+    categorical = pd.DataFrame({f"v{c}": _with_missing(rng, rng.integers(1, int(rng.integers(2, 6)) + 1, n),
+                                                       nan_rate / 2)
+                                for c in range(int(rng.integers(2, 5)))})
+    if rng.random() < 0.1:
+        categorical['v0'] = np.where(categorical['v0'].isna(), np.nan, 1.0)
+        tags.append("single category")
+
+    label = f"random {i} (n={n}, NaN {nan_rate:.0%}{', ' if tags else ''}{', '.join(tags)})"
+    case = {'name': label, 'y': y, 'binary': binary, 'groups': groups, 'covariates': covariates,
+            'numeric': y, 'categorical': categorical}
+    # The incremental state starts with the first non-empty batch
+    case['frame'] = _frame_case(case) if n else None
+    return case
+
+def read_spss_reference(path=SPSS_PATH):
+    """
+    The SPSS table as one record per (variable, outcome): the two group
+    labels, their n, mean and SD, and the p-value of the group difference.
+    """
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f, delimiter='\t') if any(cell.strip() for cell in row)]
+    header = rows[0]
+    blocks = {i: SPSS_OUTCOMES[name.strip()] for i, name in enumerate(header) if name.strip() in SPSS_OUTCOMES}
+    records = []
+    for first, second in zip(rows[1::2], rows[2::2]):
+        variable = SPSS_VARIABLES[" ".join(first[0].split())]
+        for col, outcome in blocks.items():
+            records.append({
+                'Variable': variable, 'Outcome': outcome,
+                'levels': (first[1].strip(), second[1].strip()),
+                'n': (float(first[2]), float(second[2])),
+                'mean': (float(first[col]), float(second[col])),
+                'sd': (float(first[col + 1]), float(second[col + 1])),
+                'p_value': float(first[col + 2].strip().lstrip('Pp=')),
+            })
+    return records
+
+# ---------------------------------------------------------------------------
+# Comparison
+
+def _new_stats():
+    return {'values': 0, 'max_abs': 0.0, 'max_rel': 0.0, 'nan_mismatch': 0, 'failures': 0,
+            'worst': '', 'first_failure': ''}
+
+def compare_values(stats, fast, reference, label, atol=ATOL, rtol=RTOL):
+    """Fold one metric's values into its running deviation stats"""
+    fast = np.ravel(np.asarray(fast, dtype=float))
+    reference = np.ravel(np.asarray(reference, dtype=float))
+    if fast.shape != reference.shape:
+        raise ValueError(f"{label}: fast shape {fast.shape} != reference shape {reference.shape}")
+    finite = np.isfinite(fast) & np.isfinite(reference)
+    # NaN vs NaN and equal infinities agree; any other non-finite pair does not
+    same = (np.isnan(fast) & np.isnan(reference)) | (~finite & (fast == reference))
+    mismatch = ~finite & ~same
+    diff = np.abs(fast[finite] - reference[finite])
+    scale = np.abs(reference[finite])
+    # Relative deviations of references at rounding level say nothing
+    rel = diff[scale > atol] / scale[scale > atol]
+    failed = int(mismatch.sum() + (diff > atol + rtol * scale).sum())
+    stats['values'] += int(finite.sum() + same.sum())
+    stats['nan_mismatch'] += int(mismatch.sum())
+    stats['failures'] += failed
+    if diff.size and diff.max() > stats['max_abs']:
+        stats['max_abs'] = float(diff.max())
+        stats['worst'] = label
+    stats['max_rel'] = float(max(rel.max(initial=0.0), stats['max_rel']))
+    if failed and not stats['first_failure']:
+        stats['first_failure'] = label
+
+def run_engines(cases, engines, source, results, timings):
+    """Run the named engines on every case that has their input, folding deviations and timings"""
+    for case in cases:
+        for name in engines:
+            needs, fast_fn, reference_fn = ENGINES[name]
+            if case.get(needs) is None:
+                continue
+            with warnings.catch_warnings(), np.errstate(all='ignore'):
+                warnings.simplefilter('ignore')
+                start = time.perf_counter()
+                fast = fast_fn(case)
+                mid = time.perf_counter()
+                reference = reference_fn(case)
+                end = time.perf_counter()
+            if any(isinstance(key, tuple) for key in reference):
+                fast, reference = _align(fast, reference)
+            timing = timings.setdefault((source, name), {'cases': 0, 'fast': 0.0, 'reference': 0.0})
+            timing['cases'] += 1
+            timing['fast'] += mid - start
+            timing['reference'] += end - mid
+            for metric in reference:
+                if metric in fast:
+                    compare_values(results.setdefault((source, name, metric), _new_stats()),
+                                   fast[metric], reference[metric], case['name'],
+                                   *ENGINE_TOLERANCES.get(name, (ATOL, RTOL)))
+
+def spss_deviations(df, records):
+    """
+    The pipeline's t-test engine against the SPSS table: n, means and SDs,
+    and its Welch p-value plus the pooled-variance (Student) p-value from the
+    same moments, since the table does not say which test SPSS reported.
+    """
+    from scipy import stats as sps
+    results = {}
+    for record in records:
+        var, outcome = record['Variable'], record['Outcome']
+        codes = np.select([df[var] == record['levels'][0], df[var] == record['levels'][1]], [0, 1], -1)
+        res = welch_ttest_batch(df[[outcome]].to_numpy(dtype=float), codes == 0, codes == 1)
+        student = sps.ttest_ind_from_stats(res['mean1'], res['sd1'], res['n1'], res['mean2'], res['sd2'],
+                                           res['n2'], equal_var=True).pvalue
+        label = f"{var} / {outcome}"
+        pairs = {
+            'n': ((res['n1'][0], res['n2'][0]), record['n']),
+            'mean': ((res['mean1'][0], res['mean2'][0]), record['mean']),
+            'sd': ((res['sd1'][0], res['sd2'][0]), record['sd']),
+            'p_value (Welch)': (res['p_value'], [record['p_value']]),
+            'p_value (Student)': (student, [record['p_value']]),
+        }
+        for metric, (fast, reference) in pairs.items():
+            rounding = SPSS_ROUNDING[metric.split()[0]]
+            compare_values(results.setdefault(('spss', 't-test', metric), _new_stats()),
+                           fast, reference, label, atol=rounding + 1e-9, rtol=0.0)
+    return results
+
+def report(results, timings):
+    """Deviation and timing tables as markdown"""
+    rows = [{'Source': source, 'Engine': engine, 'Statistic': metric, 'Values': s['values'],
+             'Max abs dev': f"{s['max_abs']:.3g}", 'Max rel dev': f"{s['max_rel']:.3g}",
+             'NaN/inf mismatches': s['nan_mismatch'], 'Outside tolerance': s['failures'],
+             'Largest deviation in': s['worst'], 'First failure': s['first_failure']}
+            for (source, engine, metric), s in results.items()]
+    timing_rows = [{'Source': source, 'Engine': engine, 'Cases': t['cases'],
+                    'Fast (s)': f"{t['fast']:.3f}", 'Reference (s)': f"{t['reference']:.3f}",
+                    'Speedup': f"{t['reference'] / t['fast']:.1f}x" if t['fast'] > 0 else "–"}
+                   for (source, engine), t in timings.items()]
+    return (pd.DataFrame(rows).to_markdown(index=False, disable_numparse=True) + "\n\n"
+            + pd.DataFrame(timing_rows).to_markdown(index=False, disable_numparse=True))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the fast statistics engines with their references")
+    parser.add_argument("--cases", type=int, default=RANDOM_CASES, help="randomized synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic datasets")
+    parser.add_argument("--engine", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="engines to compare (default: all)")
+    parser.add_argument("--json", type=Path, default=None, help="also write the deviations and timings here")
+    args = parser.parse_args(argv)
+
+    results, timings = {}, {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        df, var_defs = load_data()
+    print(f"Real dataset: {len(df)} rows")
+    run_engines(real_cases(df, var_defs), args.engine, 'real', results, timings)
+    print(f"Random datasets: {args.cases} (seed {args.seed})")
+    run_engines((random_case(args.seed, i) for i in range(args.cases)), args.engine, 'random', results, timings)
+    spss = spss_deviations(df, read_spss_reference()) if 'ttest' in args.engine else {}
+
+    print("\n" + report({**results, **spss}, timings))
+    failed = sorted({(source, engine) for (source, engine, metric), s in results.items()
+                     if s['failures'] and (engine, metric) not in INFORMATIONAL})
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({
+            'seed': args.seed, 'cases': args.cases, 'atol': ATOL, 'rtol': RTOL,
+            'engine_tolerances': ENGINE_TOLERANCES,
+            'deviations': [{'source': k[0], 'engine': k[1], 'statistic': k[2], **v}
+                           for k, v in {**results, **spss}.items()],
+            'timings': [{'source': k[0], 'engine': k[1], **v} for k, v in timings.items()],
+        }, indent=2))
+    for source, engine in failed:
+        print(f"\nFAIL {engine} disagrees with its reference on the {source} data")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Minimal runner for the asv suite in benchmarks/benchmarks.py when asv is not
+installed: runs every time_* / peakmem_* benchmark for each parameter, stores
+the results as JSON under benchmarks/results/<commit>-<machine>.json and
+compares them with the most recent earlier result file.
+
+    python -m benchmarks.run [--quick] [--bench REGEX]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import platform
+import argparse
+import tempfile
+import itertools
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+from benchmarks import benchmarks as suite
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# Parameters skipped by --quick
+QUICK_LIMITS = {'rows': 10_000, 'multiplier': 10}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short=8", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def discover():
+    """Public benchmark classes and their time_/peakmem_ method names, as asv finds them"""
+    for name, cls in vars(suite).items():
+        if name.startswith('_') or not inspect.isclass(cls):
+            continue
+        methods = [m for m in dir(cls) if m.startswith(('time_', 'peakmem_'))]
+        if methods:
+            yield name, cls, methods
+
+def run_method(instance, method, args, repeat):
+    fn = getattr(instance, method)
+    if method.startswith('peakmem_'):
+        tracemalloc.start()
+        try:
+            fn(*args)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run(pattern=None, quick=False, repeat=3):
+    results = {}
+    for class_name, cls, methods in discover():
+        methods = [m for m in methods if not pattern or re.search(pattern, f"{class_name}.{m}")]
+        if not methods:
+            continue
+        # Like asv, run each suite in a scratch working directory that is removed afterwards
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="ies3-bench-") as scratch:
+            os.chdir(scratch)
+            try:
+                results.update(run_suite(class_name, cls, methods, quick, repeat))
+            finally:
+                os.chdir(cwd)
+    return results
+
+def run_suite(class_name, cls, methods, quick, repeat):
+    """Every selected benchmark of one suite for each parameter combination"""
+    results = {}
+    cache = cls().setup_cache() if hasattr(cls, 'setup_cache') else None
+    for combo in itertools.product(*cls.params):
+        labels = dict(zip(cls.param_names, combo))
+        if quick and any(labels[k] > v for k, v in QUICK_LIMITS.items() if k in labels):
+            continue
+        instance = cls()
+        args = (cache,) + combo if cache is not None else combo
+        instance.setup(*args)
+        label = ", ".join(f"{k}={v}" for k, v in labels.items())
+        for method in methods:
+            value = run_method(instance, method, args, repeat)
+            key = f"{class_name}.{method}({label})"
+            results[key] = value
+            unit = "B" if method.startswith('peakmem_') else "s"
+            print(f"{key:<55} {value:12.4f} {unit}" if unit == "s" else f"{key:<55} {value:12d} {unit}")
+    return results
+
+def compare(previous, current, threshold=1.2):
+    """Print benchmarks whose value grew by more than ``threshold``x"""
+    slower = [(k, previous[k], v) for k, v in current.items()
+              if k in previous and previous[k] > 0 and v / previous[k] > threshold]
+    for key, old, new in sorted(slower, key=lambda e: e[2] / e[1], reverse=True):
+        print(f"  {key}: {old:.4g} -> {new:.4g} ({new / old:.2f}x)")
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pipeline benchmarks without asv")
+    parser.add_argument("--bench", help="regex selecting Class.method names")
+    parser.add_argument("--quick", action="store_true", help="skip the 1e6-row and 100x-variable cases")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats (best is kept)")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR, help="directory for result files")
+    args = parser.parse_args(argv)
+
+    results = run(args.bench, args.quick, args.repeat)
+    commit = git_commit()
+    record = {
+        'commit': commit,
+        'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'machine': platform.node(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    args.output.mkdir(parents=True, exist_ok=True)
+    out_path = args.output / f"{commit}-{platform.node()}.json"
+    previous = sorted((p for p in args.output.glob("*.json") if p != out_path),
+                      key=lambda p: p.stat().st_mtime)
+    out_path.write_text(json.dumps(record, indent=2))
+    print(f"\nResults written to {out_path}")
+    if previous:
+        prior = json.loads(previous[-1].read_text())
+        print(f"Regressions vs {prior['commit']} ({previous[-1].name}):")
+        if not compare(prior['results'], results):
+            print("  none")
+
+if __name__ == "__main__":
+    sys.exit(main())
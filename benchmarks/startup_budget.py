@@ -0,0 +1,80 @@
+"""
+Startup budget check for the orchestrator's light entry points.
+
+Runs each command under ``python -X importtime`` and fails (exit status 1) if
+its cumulative import time exceeds the budget or it imports one of the heavy
+analysis libraries it should not need. ``statsig`` reads cached results, so
+run the pipeline once before checking it.
+
+    python benchmarks/startup_budget.py [--repeat N]
+"""
+
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = {"pandas", "numpy", "scipy", "statsmodels", "pingouin", "altair", "matplotlib", "sklearn"}
+
+# command -> (import-time budget in seconds, heavy modules it may import)
+BUDGETS = {
+    "import orchestrator": (0.2, set()),
+    "orchestrator.py --help": (0.2, set()),
+    "orchestrator.py feedback": (0.2, set()),
+    # Unpickling cached results needs pandas, but nothing else heavy
+    "orchestrator.py statsig": (0.5, {"pandas", "numpy"}),
+}
+
+def import_times(command):
+    """Run a command with -X importtime; returns {top-level module: cumulative seconds}"""
+    if command.startswith("import "):
+        args = ["-c", command]
+    else:
+        args = command.split()
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=PROJECT_ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{command}' failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.rstrip()[1:]] = int(cumulative_us) / 1e6
+    return modules
+
+def check(command, repeat=3):
+    budget, allowed = BUDGETS[command]
+    try:
+        runs = [import_times(command) for _ in range(repeat)]
+    except RuntimeError as e:
+        print(f"FAIL {e}")
+        return False
+    # Top-level entries (no indentation) add up to the total import time
+    totals = [sum(t for name, t in run.items() if not name.startswith(" ")) for run in runs]
+    best = min(totals)
+    modules = runs[totals.index(best)]
+    loaded = {name.strip().split(".")[0] for name in modules}
+    forbidden = sorted((loaded & HEAVY) - allowed)
+    ok = best <= budget and not forbidden
+    print(f"{'OK  ' if ok else 'FAIL'} {command:<28} {best * 1000:7.1f} ms (budget {budget * 1000:.0f} ms)")
+    if forbidden:
+        print(f"     imports {', '.join(forbidden)}")
+    if best > budget:
+        top = sorted(((t, n) for n, t in modules.items() if not n.startswith(" ")), reverse=True)[:5]
+        for t, name in top:
+            print(f"     {t * 1000:7.1f} ms  {name}")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import-time budgets of light entry points")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per command (best is kept)")
+    args = parser.parse_args(argv)
+    results = [check(command, args.repeat) for command in BUDGETS]
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
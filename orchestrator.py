@@ -1,56 +1,112 @@
 #!/usr/bin/env python3
 
-import pandas as pd
 from pathlib import Path
 import os
 import sys
+import json
+import time
+import shutil
+import cProfile
+import argparse
+import contextlib
 import subprocess
 
 # Add project root to Python path
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-from scripts.data_loader import load_data, generate_demographics_table
-from scripts.eda import perform_eda
-from scripts.statistical_analysis import perform_statistical_analysis
-from scripts.visualization import create_visualizations
-from scripts.generate_statsig_summary import generate_statsig_summary
+# Only stdlib-based helpers are imported up front; the analysis modules (pandas,
+# scipy, statsmodels, altair) are imported inside the stages that need them so
+# light subcommands start quickly
+from scripts.cache import StageCache
+from scripts.scheduler import Stage, select_stages, run_stages, format_timing_summary
+from scripts.instrumentation import Tracer, set_tracer, compare_runs
+from scripts.batch import add_batch_arguments
+from scripts.config import DATA_PATH, VAR_DEFS_PATH, DEFAULT_RUN_PARAMS, default_run_params
 
+CACHE_DIR = project_root / ".pipeline_cache"
+TRACE_DIR = project_root / "traces"
+KEEP_TRACES = 20
 
-def main():
-    import shutil
+# Source modules each cached stage depends on (besides the data and definitions)
+STAGE_SOURCES = {
+    'eda': ("data_loader.py", "validation.py", "eda.py"),
+    'demographics': ("data_loader.py", "validation.py"),
+    'stats': ("data_loader.py", "validation.py", "statistical_analysis.py"),
+    'correlations': ("data_loader.py", "validation.py", "correlation_analysis.py"),
+    'psychometrics': ("data_loader.py", "validation.py", "statistical_analysis.py", "psychometrics.py"),
+    'regression': ("data_loader.py", "validation.py", "statistical_analysis.py", "regression.py"),
+    'charts': ("data_loader.py", "validation.py", "correlation_analysis.py", "visualization.py"),
+}
+COMMANDS = ("run", "feedback", "statsig", "batch")
 
-    # Clean results directory
-    results_dir = project_root / "results"
-    if results_dir.exists():
-        shutil.rmtree(results_dir)
-    results_dir.mkdir(exist_ok=True)
 
-    # Clean site directory
-    site_dir = project_root / "site"
-    if site_dir.exists():
-        shutil.rmtree(site_dir)
-    site_dir.mkdir(exist_ok=True)
-    """Main function to orchestrate the analysis"""
-    print("Loading data...")
-    df, var_defs = load_data()
-    
-    print("\nPerforming Exploratory Data Analysis...")
-    perform_eda(df)
-    
-    print("\nGenerating Demographics and Summary Statistics...")
-    # Create results directory if it doesn't exist
-    results_dir = project_root / "results"
-    results_dir.mkdir(exist_ok=True)
-    
-    # Generate demographics table using metadata-driven function
-    demographics = generate_demographics_table(df, var_defs, save_path=results_dir / 'demographics.csv')
-    
-    print("\nPerforming Statistical Analysis...")
-    
-    # Perform statistical analysis
-    t_test_df, anova_results = perform_statistical_analysis(df, var_defs)
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the IES-3 analysis pipeline")
+    commands = parser.add_subparsers(dest="command", metavar="{run,feedback,statsig,batch}")
+    run = commands.add_parser("run", help="run the pipeline (default)")
+    run.add_argument("--force", action="store_true",
+                     help="ignore cached stage outputs and recompute everything")
+    run.add_argument("--cache-size", type=int, default=512,
+                     help="maximum stage cache size in MB (least recently used entries are evicted)")
+    run.add_argument("--workers", type=int, default=None,
+                     help="worker processes for the statistical tests")
+    run.add_argument("--permutations", type=int, default=DEFAULT_RUN_PARAMS['permutations'], metavar="N",
+                     help="also compute permutation p-values from N label permutations (default: off)")
+    run.add_argument("--bootstrap", type=int, default=DEFAULT_RUN_PARAMS['bootstrap'], metavar="B",
+                     help="add bootstrap confidence intervals for the effect sizes from B resamples (default: off)")
+    run.add_argument("--ci-method", choices=("bca", "percentile"), default=DEFAULT_RUN_PARAMS['ci_method'],
+                     help="bootstrap interval type (default: bca)")
+    run.add_argument("--incremental", action="store_true",
+                     help="update saved sufficient statistics with rows appended to data.tsv "
+                          "instead of recomputing the tests from all rows")
+    run.add_argument("--cov-type", choices=("nonrobust", "HC3"), default=DEFAULT_RUN_PARAMS['cov_type'],
+                     help="standard errors for the regression coefficients (default: nonrobust)")
+    run.add_argument("--seed", type=int, default=DEFAULT_RUN_PARAMS['seed'],
+                     help="random seed for permutations and bootstrap resamples (recorded in the results)")
+    target = run.add_mutually_exclusive_group()
+    target.add_argument("--only", nargs="+", metavar="STAGE",
+                        help="run only these stages (plus the stages they need inputs from)")
+    target.add_argument("--until", metavar="STAGE",
+                        help="run every stage up to and including STAGE")
+    run.add_argument("--stage-threads", type=int, default=None,
+                     help="maximum number of stages running at once (default: no limit)")
+    run.add_argument("--trace-memory", action="store_true",
+                     help="also record tracemalloc allocation deltas per span (slower)")
+    run.add_argument("--profile", action="store_true",
+                     help="write a cProfile dump per stage (runs stages one at a time)")
+    commands.add_parser("feedback", help="copy FEEDBACK.md to docs/feedback.md")
+    statsig = commands.add_parser("statsig", help="print the significance summary from cached results")
+    statsig.add_argument("--alpha", type=float, default=0.05)
+    add_batch_arguments(commands.add_parser("batch", help="run the pipeline for every dataset in a manifest"))
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Plain `orchestrator.py [options]` runs the pipeline
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["run"] + argv
+    args = parser.parse_args(argv)
+    if args.command == "run" and args.incremental and (args.permutations or args.bootstrap):
+        run.error("--incremental cannot be combined with --permutations or --bootstrap")
+    return args
+
+
+def run_params(args):
+    """Analysis options recorded with a stored run"""
+    return {'permutations': args.permutations, 'bootstrap': args.bootstrap, 'ci_method': args.ci_method,
+            'seed': args.seed, 'cov_type': args.cov_type, 'incremental': args.incremental}
+
+
+def stage_deps(stage):
+    """Dependency files for a cached stage: input data, definitions and stage source"""
+    return [DATA_PATH, VAR_DEFS_PATH] + [project_root / "scripts" / m for m in STAGE_SOURCES[stage]]
+
+
+def report_stage(name, hit):
+    if hit:
+        print(f"  (loaded {name} from cache)")
+
+
+def print_test_results(t_test_df, anova_results, n_rows):
     # Print t-test results
     print("\nT-Test Results:")
     for result in t_test_df.to_dict('records'):
@@ -58,43 +114,313 @@ def main():
         print(f"  {result['Group1']}: Mean = {result['Group1_Mean']:.3f}, SD = {result['Group1_SD']:.3f}")
         print(f"  {result['Group2']}: Mean = {result['Group2_Mean']:.3f}, SD = {result['Group2_SD']:.3f}")
         # Use 'dof' from pingouin result if available, otherwise approximate
-        dof_str = f"{result.get('dof', len(df)-2):.1f}"
+        dof_str = f"{result.get('dof', n_rows-2):.1f}"
         print(f"  t({dof_str}) = {result['t_statistic']:.3f}, raw_p = {result['raw_p_value']:.3f}, adj_p = {result['p_value']:.3f}")
+        if 'perm_p_value' in result:
+            print(f"  permutation p = {result['perm_p_value']:.4f} ({result['n_perm']} permutations)")
         print(f"  Cohen's d = {result['Cohens_d']:.3f}")
-    
+        if 'Cohens_d_CI_low' in result:
+            print(f"  {result['CI_level']:.0%} CI ({result['CI_method']}, {result['n_boot']} resamples) = "
+                  f"[{result['Cohens_d_CI_low']:.3f}, {result['Cohens_d_CI_high']:.3f}]")
+
     # Print ANOVA results
     print("\nANOVA Results:")
     for result in anova_results.to_dict('records'):
         print(f"\nResults for {result['Variable']} on {result['Outcome']}:")
         print(f"  F = {result['F_statistic']:.3f}, p = {result['p_value']:.3f}")
+        if 'perm_p_value' in result:
+            print(f"  permutation p = {result['perm_p_value']:.4f} ({result['n_perm']} permutations)")
         print(f"  Partial Eta-squared = {result['partial_eta_squared']:.3f}")
-        # print("  Group Statistics:")
-        # print(f"  Group Stats: {result['Group_Stats']}")
-    
-    # Generate statistical significance summary
-    print("\nGenerating Statistical Significance Summary...")
-    summary = generate_statsig_summary(t_test_df, anova_results)
-    
-    print("\nCreating visualizations...")
-    from scripts.visualization import create_visualizations
-    charts = create_visualizations(df, var_defs)
-
-    # Pass freshly computed stats to report generator
-
-    from scripts.generate_report import generate_docs
-    generate_docs(df, var_defs, charts, t_test_results=t_test_df, anova_results=anova_results)
-    
-    print("\nAnalysis complete! Results saved to CSV files in the results directory.")
-
-    # Generate report markdown files
-    print("\nGenerating report markdown files...")
-
-    # Copy FEEDBACK.md to docs/feedback.md
-    shutil.copy(project_root / "FEEDBACK.md", project_root / "docs" / "feedback.md")
-
-    # Build MkDocs site
-    print("\nBuilding MkDocs site...")
-    subprocess.run(["mkdocs", "build"], check=True)
+        if 'partial_eta_squared_CI_low' in result:
+            print(f"  {result['CI_level']:.0%} CI ({result['CI_method']}, {result['n_boot']} resamples) = "
+                  f"[{result['partial_eta_squared_CI_low']:.3f}, {result['partial_eta_squared_CI_high']:.3f}]")
+
+
+@contextlib.contextmanager
+def traced_stage(tracer, name, profile_dir=None):
+    """Span around a stage, plus a cProfile dump of it when profile_dir is set"""
+    with tracer.span(name, cat="stage"):
+        if profile_dir is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(profile_dir / f"{name}.prof")
+
+
+def write_trace(tracer, run_dir):
+    """Write this run's traces, compare stage times with the previous run and prune old runs"""
+    previous = sorted(p for p in TRACE_DIR.glob("*/trace.json") if p.parent != run_dir)
+    tracer.write(run_dir)
+    print(f"\nTrace written to {run_dir.relative_to(project_root)} (chrome_trace.json opens in ui.perfetto.dev)")
+    if previous:
+        with open(previous[-1]) as f:
+            lines = compare_runs(json.load(f), tracer.to_json())
+        if lines:
+            print(f"Stage times vs previous run ({previous[-1].parent.name}):")
+            print("\n".join(lines))
+    for old in sorted(p for p in TRACE_DIR.iterdir() if p.is_dir())[:-KEEP_TRACES]:
+        shutil.rmtree(old)
+
+
+def cached_stats(cache, df, var_defs, workers=None, n_perm=0, n_boot=0, ci_method="bca", seed=0):
+    """Statistical results for the current inputs, from the cache when possible"""
+    from scripts.statistical_analysis import perform_statistical_analysis
+    method = "permutation" if n_perm else "parametric"
+    # Plain parametric runs keep the option-free cache key
+    extra = ()
+    if n_perm:
+        extra += (method, n_perm)
+    if n_boot:
+        extra += ("bootstrap", n_boot, ci_method)
+    if extra:
+        extra += ("seed", seed)
+    return cache.run("stats", stage_deps("stats"),
+                     lambda: perform_statistical_analysis(df, var_defs, workers=workers,
+                                                          method=method, n_perm=n_perm, seed=seed,
+                                                          n_boot=n_boot, ci_method=ci_method),
+                     extra=extra)
+
+
+def copy_feedback():
+    from scripts.generate_report import write_if_changed
+    # Copy FEEDBACK.md to docs/feedback.md (only if changed)
+    return write_if_changed(project_root / "docs" / "feedback.md", (project_root / "FEEDBACK.md").read_bytes())
+
+
+def statsig_command(args):
+    """
+    Print the significance summary of a plain run for the current inputs from
+    the results store, else from the stage cache, computing the statistics only
+    if neither has them
+    """
+    db = project_root / "results" / "results.sqlite"
+    if db.exists():
+        from scripts.results_store import ResultsStore, inputs_digest
+        store = ResultsStore(db)
+        run_id = store.find_run(inputs_digest(DATA_PATH, VAR_DEFS_PATH), default_run_params())
+        if run_id is not None:
+            from scripts.generate_statsig_summary import generate_statsig_summary
+            print(generate_statsig_summary(store.t_tests(run_id), store.ancova(run_id), alpha=args.alpha))
+            return
+    cache = StageCache(CACHE_DIR)
+    results, hit = cache.lookup("stats", stage_deps("stats"))
+    if not hit:
+        from scripts.data_loader import load_data
+        print("No cached statistical results for the current data; computing them...", file=sys.stderr)
+        df, var_defs = load_data()
+        results, _ = cached_stats(cache, df, var_defs)
+    from scripts.generate_statsig_summary import generate_statsig_summary
+    t_test_df, anova_results = results
+    print(generate_statsig_summary(t_test_df, anova_results, alpha=args.alpha))
+
+
+def build_stages(args, cache, results_dir):
+    """
+    The pipeline as a dependency graph: each stage declares the context keys it
+    reads and the keys it produces; the scheduler derives the edges from them.
+    Keys such as 'correlations' also stand for the result files a stage writes.
+    """
+
+    def load(ctx):
+        from scripts.data_loader import load_data
+        print("Loading data...")
+        # load_data keeps its own memory-mapped columnar cache
+        df, var_defs = load_data(use_cache=not args.force, report_path=results_dir / "validation_report.csv")
+        return {'df': df, 'var_defs': var_defs}
+
+    def eda(ctx):
+        from scripts.eda import perform_eda
+        print("\nPerforming Exploratory Data Analysis...")
+        summary, hit = cache.run("eda", stage_deps("eda"), lambda: perform_eda(ctx['df']),
+                                 outputs=[results_dir / "eda_summary.txt", results_dir / "eda_summary.json"])
+        report_stage("EDA summary", hit)
+        return {'eda_summary': summary}
+
+    def demographics(ctx):
+        from scripts.data_loader import generate_demographics_table
+        print("\nGenerating Demographics and Summary Statistics...")
+        # Generate demographics table using metadata-driven function
+        table, hit = cache.run(
+            "demographics", stage_deps("demographics"),
+            lambda: generate_demographics_table(ctx['df'], ctx['var_defs'],
+                                                save_path=results_dir / 'demographics.csv'),
+            outputs=[results_dir / "demographics.csv"])
+        report_stage("demographics", hit)
+        return {'demographics': table}
+
+    def stats(ctx):
+        print("\nPerforming Statistical Analysis...")
+        if args.incremental:
+            from scripts.incremental import update_statistics
+            sufficient, added, rebuilt = update_statistics(DATA_PATH, VAR_DEFS_PATH, ctx['var_defs'],
+                                                           force=args.force)
+            print(f"  ({'rebuilt' if rebuilt else 'updated'} sufficient statistics: "
+                  f"{added} new row(s), {sufficient.n_rows} total)")
+            t_test_df, anova_results = sufficient.results()
+        else:
+            (t_test_df, anova_results), hit = cached_stats(cache, ctx['df'], ctx['var_defs'], workers=args.workers,
+                                                          n_perm=args.permutations, n_boot=args.bootstrap,
+                                                          ci_method=args.ci_method, seed=args.seed)
+            report_stage("statistical results", hit)
+        print_test_results(t_test_df, anova_results, len(ctx['df']))
+        return {'t_test_df': t_test_df, 'anova_results': anova_results}
+
+    def correlations(ctx):
+        from scripts.correlation_analysis import perform_correlation_analysis
+        print("\nPerforming Correlation Analysis...")
+        results, hit = cache.run(
+            "correlations", stage_deps("correlations"),
+            lambda: perform_correlation_analysis(ctx['df']),
+            outputs=[results_dir / "pearson_correlations.csv",
+                     results_dir / "spearman_correlations.csv",
+                     results_dir / "correlation_p_values.csv"])
+        report_stage("correlation matrices", hit)
+        return {'correlations': results}
+
+    def psychometrics(ctx):
+        from scripts.psychometrics import perform_psychometric_analysis, RELIABILITY_BOOT
+        print("\nComputing Scale Reliability...")
+        results, hit = cache.run(
+            "psychometrics", stage_deps("psychometrics"),
+            lambda: perform_psychometric_analysis(ctx['df'], ctx['var_defs'], seed=args.seed,
+                                                  results_dir=results_dir),
+            outputs=[results_dir / "reliability.csv", results_dir / "item_statistics.csv"],
+            extra=(RELIABILITY_BOOT, args.seed))
+        report_stage("reliability results", hit)
+        return {'psychometrics': results}
+
+    def regression(ctx):
+        from scripts.regression import perform_regression_analysis
+        print("\nPerforming Regression Analysis...")
+        (coefficients, models), hit = cache.run(
+            "regression", stage_deps("regression"),
+            lambda: perform_regression_analysis(ctx['df'], ctx['var_defs'], cov_type=args.cov_type,
+                                                results_dir=results_dir),
+            outputs=[results_dir / "regression_coefficients.csv", results_dir / "regression_models.csv"],
+            extra=(args.cov_type,))
+        report_stage("regression results", hit)
+        return {'regression': (coefficients, models)}
+
+    def store(ctx):
+        from scripts.results_store import ResultsStore, inputs_digest
+        run_id, added = ResultsStore(results_dir / "results.sqlite").record_run(
+            inputs_digest(DATA_PATH, VAR_DEFS_PATH), run_params(args),
+            t_test_df=ctx['t_test_df'], anova_results=ctx['anova_results'],
+            regression=ctx['regression'], psychometrics=ctx['psychometrics'])
+        print(f"\n{'Recorded' if added else 'Already recorded'} results as run {run_id} in results/results.sqlite")
+        return {'store': run_id}
+
+    def statsig(ctx):
+        from scripts.generate_statsig_summary import generate_statsig_summary
+        # Generate statistical significance summary
+        print("\nGenerating Statistical Significance Summary...")
+        return {'statsig_summary': generate_statsig_summary(ctx['t_test_df'], ctx['anova_results'])}
+
+    def charts(ctx):
+        from scripts.visualization import create_visualizations
+        print("\nCreating visualizations...")
+        specs, hit = cache.run("charts", stage_deps("charts"),
+                               lambda: create_visualizations(ctx['df'], ctx['var_defs'], compact=True),
+                               extra=("compact",))
+        report_stage("chart specs", hit)
+        return {'charts': specs}
+
+    def docs(ctx):
+        # Pass freshly computed stats to report generator
+        from scripts.generate_report import generate_docs
+        print("\nGenerating report markdown files...")
+        generate_docs(ctx['df'], ctx['var_defs'], ctx['charts'],
+                      t_test_results=ctx['t_test_df'], anova_results=ctx['anova_results'],
+                      psychometrics=ctx['psychometrics'], regression=ctx['regression'])
+        return {'docs': True}
+
+    def feedback(ctx):
+        copy_feedback()
+        return {'feedback': True}
+
+    def site(ctx):
+        # Build MkDocs site; --dirty rebuilds only pages whose sources changed
+        print("\nBuilding MkDocs site...")
+        subprocess.run(["mkdocs", "build"] if args.force else ["mkdocs", "build", "--dirty"], check=True)
+        return {'site': True}
+
+    return [
+        Stage("load", load, outputs=['df', 'var_defs']),
+        Stage("eda", eda, inputs=['df'], outputs=['eda_summary']),
+        Stage("demographics", demographics, inputs=['df', 'var_defs'], outputs=['demographics']),
+        Stage("stats", stats, inputs=['df', 'var_defs'], outputs=['t_test_df', 'anova_results']),
+        Stage("correlations", correlations, inputs=['df'], outputs=['correlations']),
+        Stage("psychometrics", psychometrics, inputs=['df', 'var_defs'], outputs=['psychometrics']),
+        Stage("regression", regression, inputs=['df', 'var_defs'], outputs=['regression']),
+        Stage("store", store, inputs=['t_test_df', 'anova_results', 'regression', 'psychometrics'],
+              outputs=['store']),
+        Stage("statsig", statsig, inputs=['t_test_df', 'anova_results'], outputs=['statsig_summary']),
+        Stage("charts", charts, inputs=['df', 'var_defs'], outputs=['charts']),
+        # The report copies the demographics and correlation CSVs from results/
+        Stage("docs", docs, inputs=['df', 'var_defs', 'charts', 't_test_df', 'anova_results',
+                                    'demographics', 'correlations', 'psychometrics', 'regression'],
+              outputs=['docs']),
+        Stage("feedback", feedback, inputs=['docs'], outputs=['feedback']),
+        Stage("site", site, inputs=['docs', 'feedback'], outputs=['site']),
+    ]
+
+
+def main(argv=None):
+    """Main function to orchestrate the analysis"""
+    args = parse_args(argv)
+    if args.command == "feedback":
+        print("Updated docs/feedback.md" if copy_feedback() else "docs/feedback.md is up to date")
+        return
+    if args.command == "statsig":
+        statsig_command(args)
+        return
+    if args.command == "batch":
+        from scripts.batch import batch_command
+        sys.exit(batch_command(args))
+
+    cache = StageCache(CACHE_DIR, max_bytes=args.cache_size * 1024 * 1024, force=args.force)
+
+    results_dir = project_root / "results"
+    if args.force:
+        # Clean results directory
+        if results_dir.exists():
+            shutil.rmtree(results_dir)
+    results_dir.mkdir(exist_ok=True)
+
+    stages = build_stages(args, cache, results_dir)
+    try:
+        selected = select_stages(stages, only=args.only, until=args.until)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    run_dir = TRACE_DIR / time.strftime("%Y%m%d-%H%M%S")
+    profile_dir = None
+    if args.profile:
+        profile_dir = run_dir / "profiles"
+        profile_dir.mkdir(parents=True, exist_ok=True)
+    tracer = Tracer(memory=args.trace_memory)
+    set_tracer(tracer)
+    try:
+        # Independent stages (e.g. stats, correlations and charts) run concurrently;
+        # profiling runs them one at a time so each dump covers a single stage
+        ctx, timings = run_stages(stages, selected,
+                                  max_workers=1 if args.profile else args.stage_threads,
+                                  stage_context=lambda name: traced_stage(tracer, name, profile_dir))
+    finally:
+        set_tracer(None)
+        tracer.stop()
+        write_trace(tracer, run_dir)
+
+    if 'docs' in timings:
+        print("\nAnalysis complete! Results saved to CSV files in the results directory.")
+    print("\n" + format_timing_summary(stages, timings))
+    if profile_dir is not None:
+        print(f"cProfile dumps in {profile_dir.relative_to(project_root)} (view with python -m pstats)")
 
 
 if __name__ == "__main__":
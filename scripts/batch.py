@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+import io
+import sys
+import json
+import time
+import argparse
+import traceback
+import contextlib
+import subprocess
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+SUMMARY_COLUMNS = ['Dataset', 'Status', 'Rows', 'Seconds', 'T-tests', 'Significant t-tests',
+                   'ANCOVAs', 'Significant ANCOVAs', 'Largest d', 'Largest partial eta²', 'Error']
+
+def load_manifest(manifest_path):
+    """
+    Datasets listed in a JSON manifest:
+
+        {"datasets": [{"name": "school-a-2024", "data": "a/data.tsv",
+                       "definitions": "a/variable_definitions.json", "output": "out/a"}, ...]}
+
+    Relative paths are resolved against the manifest's directory. "name"
+    defaults to the output directory name and "definitions" to
+    data/variable_definitions.json. Returns a list of dicts with absolute paths.
+    """
+    manifest_path = Path(manifest_path)
+    base = manifest_path.parent
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    datasets = []
+    for i, entry in enumerate(manifest['datasets']):
+        missing = [key for key in ('data', 'output') if key not in entry]
+        if missing:
+            raise ValueError(f"Manifest entry {i} is missing {', '.join(missing)}")
+        definitions = entry.get('definitions', project_root / "data" / "variable_definitions.json")
+        output = (base / entry['output']).resolve()
+        datasets.append({
+            'name': entry.get('name', output.name),
+            'data': (base / entry['data']).resolve(),
+            'definitions': (base / definitions).resolve(),
+            'output': output,
+        })
+    names = [d['name'] for d in datasets]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate dataset names in manifest: {', '.join(duplicates)}")
+    return datasets
+
+# Parsed variable definitions by path, set once per worker by the pool initializer
+_DEFINITIONS = {}
+
+def _share_definitions(definitions):
+    _DEFINITIONS.update(definitions)
+
+def _write_site_config(output):
+    """mkdocs config for a dataset: the project's mkdocs.yml with its own docs/ and site/"""
+    config = output / "mkdocs.yml"
+    config.write_text(f"INHERIT: {project_root / 'mkdocs.yml'}\ndocs_dir: docs\nsite_dir: site\n")
+    return config
+
+def run_dataset(dataset, build_site=True):
+    """
+    The analysis pipeline for one dataset, writing results/, docs/ and (with
+    build_site) site/ under its output directory. Console output goes to
+    <output>/pipeline.log. Never raises: returns a summary row with Status
+    "ok" or "failed" and the error.
+    """
+    start = time.perf_counter()
+    output = Path(dataset['output'])
+    row = {'Dataset': dataset['name'], 'Status': 'failed'}
+    output.mkdir(parents=True, exist_ok=True)
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            row.update(_analyze(dataset, output, build_site))
+        row['Status'] = 'ok'
+    except Exception as e:
+        row['Error'] = f"{type(e).__name__}: {e}"
+        log.write("\n" + traceback.format_exc())
+    finally:
+        (output / "pipeline.log").write_text(log.getvalue())
+    row['Seconds'] = round(time.perf_counter() - start, 3)
+    return row
+
+def _analyze(dataset, output, build_site):
+    from scripts.data_loader import load_data, load_variable_definitions, generate_demographics_table
+    from scripts.eda import perform_eda
+    from scripts.statistical_analysis import perform_statistical_analysis
+    from scripts.correlation_analysis import perform_correlation_analysis
+    from scripts.psychometrics import perform_psychometric_analysis
+    from scripts.regression import perform_regression_analysis
+    from scripts.results_store import ResultsStore, inputs_digest
+    from scripts.visualization import create_visualizations
+    from scripts import generate_report
+
+    var_defs = _DEFINITIONS.get(str(dataset['definitions']))
+    if var_defs is None:
+        var_defs = load_variable_definitions(dataset['definitions'])
+    results_dir = output / "results"
+    docs_dir = output / "docs"
+    results_dir.mkdir(exist_ok=True)
+
+    # Parse directly: datasets run in parallel processes, which would race on writing the frame cache
+    df, var_defs = load_data(use_cache=False, data_path=dataset['data'],
+                             var_def_path=dataset['definitions'], var_defs=var_defs,
+                             report_path=results_dir / "validation_report.csv")
+    expected = [col for col, info in var_defs['variables'].items()
+                if info['type'] in ('outcome', 'demographic', 'independent')]
+    missing = [col for col in expected if col not in df.columns]
+    if missing:
+        raise ValueError(f"{dataset['data']} lacks {len(missing)} defined column(s), e.g. {missing[0]!r}")
+    perform_eda(df, results_dir=results_dir)
+    generate_demographics_table(df, var_defs, save_path=results_dir / "demographics.csv")
+    t_test_df, anova_results = perform_statistical_analysis(df, var_defs)
+    perform_correlation_analysis(df, results_dir=results_dir)
+    psychometrics = perform_psychometric_analysis(df, var_defs, results_dir=results_dir)
+    regression = perform_regression_analysis(df, var_defs, results_dir=results_dir)
+    ResultsStore(results_dir / "results.sqlite").record_run(
+        inputs_digest(dataset['data'], dataset['definitions']), {}, t_test_df=t_test_df, anova_results=anova_results,
+        regression=regression, psychometrics=psychometrics)
+    t_test_df.to_csv(results_dir / "t_tests.csv", index=False)
+    anova_results.drop(columns=['Covariate_Effects'], errors='ignore').to_csv(results_dir / "ancova.csv", index=False)
+    charts = create_visualizations(df, var_defs, compact=True)
+
+    generate_report.set_output_dirs(docs_dir=docs_dir, results_dir=results_dir)
+    generate_report.generate_docs(df, var_defs, charts, t_test_results=t_test_df, anova_results=anova_results,
+                                  psychometrics=psychometrics, regression=regression)
+    generate_report.write_if_changed(docs_dir / "feedback.md", (project_root / "FEEDBACK.md").read_bytes())
+    if build_site:
+        subprocess.run(["mkdocs", "build", "--quiet", "-f", str(_write_site_config(output))],
+                       check=True, capture_output=True)
+
+    significant_t = t_test_df[t_test_df['p_value'] < 0.05] if len(t_test_df) else t_test_df
+    significant_a = anova_results[anova_results['p_value'] < 0.05] if len(anova_results) else anova_results
+    return {
+        'Rows': len(df),
+        'T-tests': len(t_test_df),
+        'Significant t-tests': len(significant_t),
+        'ANCOVAs': len(anova_results),
+        'Significant ANCOVAs': len(significant_a),
+        'Largest d': t_test_df['Cohens_d'].max() if len(t_test_df) else None,
+        'Largest partial eta²': anova_results['partial_eta_squared'].max() if len(anova_results) else None,
+    }
+
+def _combined_effects(datasets, rows):
+    """All t-tests and ANCOVA main effects of the successful datasets in one long table"""
+    import pandas as pd
+    frames = []
+    for dataset, row in zip(datasets, rows):
+        if row['Status'] != 'ok':
+            continue
+        results_dir = Path(dataset['output']) / "results"
+        for test, name in (('t-test', "t_tests.csv"), ('ANCOVA', "ancova.csv")):
+            path = results_dir / name
+            if path.exists() and path.stat().st_size > 1:
+                table = pd.read_csv(path)
+                effect = 'Cohens_d' if test == 't-test' else 'partial_eta_squared'
+                statistic = 't_statistic' if test == 't-test' else 'F_statistic'
+                frames.append(pd.DataFrame({
+                    'Dataset': dataset['name'], 'Test': test,
+                    'Variable': table['Variable'], 'Outcome': table['Outcome'],
+                    'Statistic': table[statistic], 'raw_p_value': table['raw_p_value'],
+                    'adj_p_value': table['adj_p_value'], 'Effect size': table[effect],
+                }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def run_batch(manifest_path, out_dir=None, workers=None, build_site=True):
+    """
+    Run every dataset in a manifest concurrently across a process pool.
+
+    Each distinct definitions file is parsed once here and handed to every
+    worker when it starts. A failing dataset is recorded and the rest carry
+    on. Writes batch_summary.csv (one row per dataset) and batch_effects.csv
+    (every t-test and ANCOVA main effect, long format) to out_dir (default:
+    the manifest's directory) and returns the summary DataFrame.
+    """
+    import pandas as pd
+    from scripts.data_loader import load_variable_definitions
+
+    datasets = load_manifest(manifest_path)
+    out_dir = Path(out_dir or Path(manifest_path).parent)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    definitions = {}
+    for path in sorted({str(d['definitions']) for d in datasets}):
+        try:
+            definitions[path] = load_variable_definitions(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not read definitions {path}: {e}")
+
+    rows = [None] * len(datasets)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_share_definitions,
+                             initargs=(definitions,)) as pool:
+        futures = {pool.submit(run_dataset, dataset, build_site): i for i, dataset in enumerate(datasets)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. out of memory); the pool may be unusable
+                rows[i] = {'Dataset': datasets[i]['name'], 'Status': 'failed',
+                           'Error': f"{type(e).__name__}: {e}"}
+            row = rows[i]
+            detail = f"{row.get('Rows')} rows, {row.get('Seconds')}s" if row['Status'] == 'ok' else row['Error']
+            print(f"  [{sum(r is not None for r in rows)}/{len(datasets)}] {row['Dataset']}: {row['Status']} ({detail})")
+
+    summary = pd.DataFrame(rows).reindex(columns=SUMMARY_COLUMNS)
+    summary.to_csv(out_dir / "batch_summary.csv", index=False)
+    _combined_effects(datasets, rows).to_csv(out_dir / "batch_effects.csv", index=False)
+    return summary
+
+def add_batch_arguments(parser):
+    parser.add_argument("manifest", help="JSON manifest of (data, definitions, output) entries")
+    parser.add_argument("--workers", type=int, default=None, help="datasets processed at once")
+    parser.add_argument("--out", default=None, help="directory for the combined tables (default: next to the manifest)")
+    parser.add_argument("--no-site", action="store_true", help="skip the per-dataset mkdocs build")
+
+def batch_command(args):
+    """Run a batch from parsed arguments and print the summary; returns the exit status"""
+    summary = run_batch(args.manifest, out_dir=args.out, workers=args.workers, build_site=not args.no_site)
+    print("\n" + summary.drop(columns=['Error']).to_markdown(index=False))
+    failed = summary[summary['Status'] != 'ok']
+    for row in failed.to_dict('records'):
+        print(f"\n{row['Dataset']} failed: {row['Error']}")
+    return 1 if len(failed) else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the IES-3 pipeline over a manifest of datasets")
+    add_batch_arguments(parser)
+    return batch_command(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import hashlib
+import pickle
+import shutil
+import threading
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class StageCache:
+    """
+    Content-addressed cache for pipeline stage outputs.
+
+    Each entry is keyed on the stage name plus the hashes of its dependency files
+    (input data, definitions and the stage's own source modules). An entry stores
+    the stage's return value and, optionally, copies of the files it wrote so they
+    can be restored on a hit. Total size is bounded; the least recently used
+    entries are evicted first. Safe to share between threads running
+    different stages.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, force=False):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.force = force
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, stage, deps, extra=()):
+        h = hashlib.sha256(stage.encode())
+        for dep in deps:
+            h.update(str(Path(dep).name).encode())
+            h.update(file_digest(dep).encode())
+        for item in extra:
+            h.update(repr(item).encode())
+        return h.hexdigest()
+
+    def _entry(self, stage, deps, extra):
+        return self.cache_dir / f"{stage}-{self.key(stage, deps, extra)[:16]}"
+
+    def lookup(self, stage, deps, outputs=(), extra=()):
+        """
+        Cached value of ``stage`` for the current dependencies without computing
+        it, restoring any ``outputs`` files. Returns (value, hit); value is None
+        on a miss.
+        """
+        entry = self._entry(stage, deps, extra)
+        if not (entry / "value.pkl").exists():
+            return None, False
+        with open(entry / "value.pkl", 'rb') as f:
+            value = pickle.load(f)
+        for output in outputs:
+            output = Path(output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry / "files" / output.name, output)
+        (entry / "value.pkl").touch()  # mark as recently used
+        return value, True
+
+    def run(self, stage, deps, compute, outputs=(), extra=()):
+        """
+        Return the cached value of ``stage`` if its dependencies are unchanged,
+        restoring any ``outputs`` files; otherwise call ``compute()`` and store
+        the result. Returns (value, hit).
+        """
+        if not self.force:
+            value, hit = self.lookup(stage, deps, outputs, extra)
+            if hit:
+                return value, True
+
+        entry = self._entry(stage, deps, extra)
+        value = compute()
+        with self._lock:
+            if entry.exists():
+                shutil.rmtree(entry)
+            (entry / "files").mkdir(parents=True)
+            for output in outputs:
+                shutil.copyfile(output, entry / "files" / Path(output).name)
+            # value.pkl is written last: its presence marks a complete entry
+            with open(entry / "value.pkl", 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._evict()
+        return value, False
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            marker = entry / "value.pkl"
+            if not marker.exists():
+                continue
+            size = sum(p.stat().st_size for p in entry.rglob('*') if p.is_file())
+            entries.append((marker.stat().st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry)
+            total -= size
+
+    def clear(self):
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+from pathlib import Path
+
+# Only stdlib imports here: the orchestrator's light subcommands import this module
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DATA_PATH = DATA_DIR / "data.tsv"
+VAR_DEFS_PATH = DATA_DIR / "variable_definitions.json"
+
+# Analysis options of a plain `orchestrator.py` run, as recorded with a stored run
+DEFAULT_RUN_PARAMS = {'permutations': 0, 'bootstrap': 0, 'ci_method': 'bca', 'seed': 0,
+                      'cov_type': 'nonrobust', 'incremental': False}
+
+def default_run_params():
+    """Run parameters of a plain `orchestrator.py` run (a fresh copy)"""
+    return dict(DEFAULT_RUN_PARAMS)
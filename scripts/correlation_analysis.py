@@ -5,55 +5,195 @@ import numpy as np
 from scipy import stats
 from pathlib import Path
 
-def perform_correlation_analysis(df):
+def pairwise_pearson(x):
     """
-    Perform correlation analysis between variables
+    Pearson correlations of all column pairs of ``x`` using pairwise-complete
+    observations, computed with mask matrix products instead of per-pair calls.
+    Returns (r, n) matrices: the correlations and the number of rows used per pair.
     """
-    results_dir = Path(__file__).parent.parent / "results"
-    
-    # Select numeric columns for correlation analysis
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    
-    # Initialize results dictionary
-    correlation_results = {
-        'pearson': pd.DataFrame(index=numeric_cols, columns=numeric_cols),
-        'spearman': pd.DataFrame(index=numeric_cols, columns=numeric_cols),
-        'p_values': pd.DataFrame(index=numeric_cols, columns=numeric_cols)
+    valid = ~np.isnan(x)
+    m = valid.astype(float)
+    # Shift by each column's first present value for numerical stability (a
+    # column constant over a pair's rows then has exactly zero variance and a
+    # NaN correlation); correlations are unchanged
+    shift = np.nan_to_num(x[valid.argmax(axis=0), np.arange(x.shape[1])]) if len(x) else np.zeros(x.shape[1])
+    xz = np.where(valid, x - shift, 0.0)
+
+    n = m.T @ m                  # rows where both i and j are present
+    s = xz.T @ m                 # sum of x_i over rows where j is present
+    ss = (xz ** 2).T @ m         # sum of x_i^2 over rows where j is present
+    sxy = xz.T @ xz              # sum of x_i * x_j over rows where both are present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - s * s.T / n
+        var_i = ss - s ** 2 / n
+        r = cov / np.sqrt(var_i * var_i.T)
+    r = np.clip(r, -1.0, 1.0)
+    return r, n
+
+def correlation_p_values(r, n):
+    """Two-sided p-values for correlation coefficients from the t-distribution"""
+    dof = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_stat = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p = 2 * stats.t.sf(np.abs(t_stat), dof)
+    # Only an exact |r| = 1 (t = 0/0 or x/0); np.isclose would also catch r = 0.99999 in small samples
+    p[np.abs(r) == 1.0] = 0.0
+    p[dof <= 0] = np.nan
+    return p
+
+def correlation_matrices(df, columns=None):
+    """
+    Pearson and Spearman correlation matrices with Pearson p-values as float64
+    DataFrames. Spearman ranks each column once over its non-missing values and
+    then applies the pairwise-complete Pearson product to the ranks; with missing
+    data this differs slightly from re-ranking every pair separately.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns
+    x = df[columns].to_numpy(dtype=float)
+    pearson, n = pairwise_pearson(x)
+    ranks = df[columns].rank(method='average').to_numpy(dtype=float)
+    spearman, _ = pairwise_pearson(ranks)
+    return {
+        'pearson': pd.DataFrame(pearson, index=columns, columns=columns),
+        'spearman': pd.DataFrame(spearman, index=columns, columns=columns),
+        'p_values': pd.DataFrame(correlation_p_values(pearson, n), index=columns, columns=columns),
     }
-    
-    # Calculate correlations
-    for i, col1 in enumerate(numeric_cols):
-        for j, col2 in enumerate(numeric_cols):
-            if i <= j:  # Only calculate once for each pair
-                # Pearson correlation
-                pearson_corr, pearson_p = stats.pearsonr(df[col1], df[col2])
-                correlation_results['pearson'].loc[col1, col2] = pearson_corr
-                correlation_results['pearson'].loc[col2, col1] = pearson_corr
-                
-                # Spearman correlation
-                spearman_corr, spearman_p = stats.spearmanr(df[col1], df[col2])
-                correlation_results['spearman'].loc[col1, col2] = spearman_corr
-                correlation_results['spearman'].loc[col2, col1] = spearman_corr
-                
-                # P-values (using Pearson's p-value)
-                correlation_results['p_values'].loc[col1, col2] = pearson_p
-                correlation_results['p_values'].loc[col2, col1] = pearson_p
-    
+
+def _category_codes(series):
+    """Integer codes (-1 = missing) and number of levels for a categorical column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), len(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), len(uniques)
+
+def contingency_tables(codes, n_levels):
+    """
+    Contingency tables for every pair (i <= j) of columns of an integer code
+    matrix (-1 = missing), in np.triu_indices order: an array of shape
+    (pairs, n_levels, n_levels). Rows missing either value are dropped. Tables
+    from different row batches add up to the table of all rows.
+    """
+    k = codes.shape[1]
+    pi, pj = np.triu_indices(k)
+    cells = n_levels * n_levels
+    tables = np.empty((len(pi), n_levels, n_levels))
+    # Batch pairs so the combined-code array stays around 8M entries
+    batch = max(1, 8_000_000 // max(len(codes), 1))
+    for start in range(0, len(pi), batch):
+        bi, bj = pi[start:start + batch], pj[start:start + batch]
+        a = codes[:, bi]
+        b = codes[:, bj]
+        valid = (a >= 0) & (b >= 0)
+        flat = (np.arange(len(bi)) * cells)[None, :] + a * n_levels + b
+        counts = np.bincount(flat[valid], minlength=len(bi) * cells)
+        tables[start:start + len(bi)] = counts.reshape(len(bi), n_levels, n_levels)
+    return tables
+
+def cramers_v_from_tables(tables, columns, bias_correction=False):
+    """
+    Cramer's V matrix and failures (see cramers_v_matrix) from the pairwise
+    contingency tables of contingency_tables.
+    """
+    columns = list(columns)
+    k = len(columns)
+    pi, pj = np.triu_indices(k)
+    n = tables.sum(axis=(1, 2))
+    row_tot = tables.sum(axis=2)
+    col_tot = tables.sum(axis=1)
+    r = (row_tot > 0).sum(axis=1)
+    c = (col_tot > 0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = row_tot[:, :, None] * col_tot[:, None, :] / n[:, None, None]
+        terms = np.where(expected > 0, (tables - expected) ** 2 / expected, 0.0)
+        chi2 = terms.sum(axis=(1, 2))
+        phi2 = chi2 / n
+        if bias_correction:
+            phi2 = np.maximum(0.0, phi2 - (r - 1) * (c - 1) / (n - 1))
+            r_adj = r - (r - 1) ** 2 / (n - 1)
+            c_adj = c - (c - 1) ** 2 / (n - 1)
+            v = np.sqrt(phi2 / np.minimum(r_adj - 1, c_adj - 1))
+        else:
+            v = np.sqrt(phi2 / (np.minimum(r, c) - 1))
+
+    failures = {}
+    for idx in range(len(pi)):
+        reason = None
+        if n[idx] == 0:
+            reason = "no rows with both values present"
+        elif min(r[idx], c[idx]) < 2:
+            reason = "fewer than two observed levels"
+        elif not np.isfinite(v[idx]):
+            reason = "degenerate contingency table"
+        if reason:
+            v[idx] = np.nan
+            failures[(columns[pi[idx]], columns[pj[idx]])] = reason
+
+    matrix = np.full((k, k), np.nan)
+    matrix[pi, pj] = v
+    matrix[pj, pi] = v
+    return pd.DataFrame(matrix, index=columns, columns=columns), failures
+
+def cramers_v_matrix(df, columns, bias_correction=False):
+    """
+    Cramer's V for every pair of categorical columns.
+
+    Each column is factorized once; the pairwise contingency tables come from
+    np.bincount over combined codes, one call per batch of pairs (rows missing
+    either value are dropped), and chi-squared and V are computed for every pair
+    in array form.
+    Levels that do not occur in a pair's rows are ignored, as in pd.crosstab.
+    With bias_correction, uses Bergsma's (2013) corrected V.
+
+    Returns (V DataFrame, failures) where failures maps (var1, var2) to the
+    reason V could not be computed; those cells are NaN rather than 0.
+    """
+    columns = list(columns)
+    if len(columns) == 0:
+        return pd.DataFrame(dtype=float), {}
+    coded = [_category_codes(df[col]) for col in columns]
+    codes = np.column_stack([c for c, _ in coded])
+    n_levels = max(max(levels for _, levels in coded), 1)
+    return cramers_v_from_tables(contingency_tables(codes, n_levels), columns, bias_correction)
+
+def perform_correlation_analysis(df, results_dir=None):
+    """
+    Perform correlation analysis between variables; the matrices are saved as
+    CSV files in results_dir (results/ by default)
+    """
+    results_dir = Path(results_dir or Path(__file__).parent.parent / "results")
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    # Select numeric columns for correlation analysis
+    correlation_results = correlation_matrices(df)
+
     # Save results
     correlation_results['pearson'].to_csv(results_dir / "pearson_correlations.csv")
     correlation_results['spearman'].to_csv(results_dir / "spearman_correlations.csv")
     correlation_results['p_values'].to_csv(results_dir / "correlation_p_values.csv")
-    
+    # Spearman ranks are exact for pairs of columns missing in the same rows only
+    valid = df[correlation_results['spearman'].columns].notna().to_numpy()
+    patterns = pd.Series([valid[:, c].tobytes() for c in range(valid.shape[1])]).value_counts()
+    n_pairs = valid.shape[1] * (valid.shape[1] - 1) // 2
+    ranked_once = n_pairs - int((patterns * (patterns - 1) // 2).sum())
+    if ranked_once:
+        print(f"\nNote: {ranked_once} of {n_pairs} Spearman correlations pair columns missing in different "
+              "rows. Each column is ranked once over its non-missing values, so these can differ from "
+              "re-ranking the pair's complete rows as DataFrame.corr('spearman') does, more so with many "
+              "missing values or few rows.")
+
     # Print significant correlations
     print("\nSignificant Correlations (p < 0.05):")
     significant_correlations = correlation_results['pearson'][
         correlation_results['p_values'] < 0.05
     ]
     print(significant_correlations)
-    
+
     # Print strongest correlations
     print("\nStrongest Correlations (|r| > 0.5):")
     strong_correlations = correlation_results['pearson'][
         abs(correlation_results['pearson']) > 0.5
     ]
-    print(strong_correlations) 
\ No newline at end of file
+    print(strong_correlations)
+
+    return correlation_results
@@ -1,31 +1,164 @@
 #!/usr/bin/env python3
 
 import json
+import hashlib
+import shutil
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from scripts.validation import validate_data
+from scripts.config import DATA_PATH, VAR_DEFS_PATH
 
-def load_variable_definitions():
-    """Load variable definitions from JSON file"""
-    var_def_path = Path(__file__).parent.parent / "data" / "variable_definitions.json"
+FRAME_CACHE_DIR = Path(__file__).parent.parent / ".pipeline_cache" / "frames"
+
+def load_variable_definitions(var_def_path=None):
+    """Load variable definitions from JSON file (data/variable_definitions.json by default)"""
+    var_def_path = var_def_path or VAR_DEFS_PATH
     with open(var_def_path) as f:
         return json.load(f)
 
-def load_data():
+def _frame_cache_key(data_path, var_def_path):
+    """Hash of the data file, definitions file and the loader's and validator's source"""
+    from scripts.cache import file_digest
+    h = hashlib.sha256()
+    for path in (data_path, var_def_path, Path(__file__), Path(__file__).parent / "validation.py"):
+        h.update(file_digest(path).encode())
+    return h.hexdigest()[:16]
+
+def save_frame_bundle(df, bundle_dir, source=None):
+    """
+    Persist a processed frame as a columnar bundle: one .npy file per column
+    (integer codes for categoricals) plus a manifest with dtypes and categories.
+    source (the data file the frame was read from) is recorded in the manifest.
+    """
+    tmp_dir = bundle_dir.with_name(bundle_dir.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': col, 'file': f"{i}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'categorical'
+            entry['categories'] = series.cat.categories.tolist()
+            entry['ordered'] = bool(series.cat.ordered)
+            np.save(tmp_dir / entry['file'], series.cat.codes.to_numpy())
+        elif series.dtype == object:
+            entry['kind'] = 'object'
+            np.save(tmp_dir / entry['file'], series.to_numpy(), allow_pickle=True)
+        else:
+            entry['kind'] = 'numeric'
+            np.save(tmp_dir / entry['file'], series.to_numpy())
+        columns.append(entry)
+    manifest = {'columns': columns, 'index': df.index.tolist() if not isinstance(df.index, pd.RangeIndex) else None,
+                'source': str(source) if source is not None else None}
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+    if bundle_dir.exists():
+        shutil.rmtree(bundle_dir)
+    tmp_dir.rename(bundle_dir)
+
+def load_frame_bundle(bundle_dir):
+    """
+    Load a bundle written by save_frame_bundle. Numeric columns and categorical
+    codes are memory-mapped copy-on-write, so the frame shares pages with the
+    files instead of allocating a second copy.
+    """
+    manifest = json.loads((bundle_dir / "manifest.json").read_text())
+    data = {}
+    for entry in manifest['columns']:
+        path = bundle_dir / entry['file']
+        if entry['kind'] == 'object':
+            data[entry['name']] = np.load(path, allow_pickle=True)
+            continue
+        values = np.load(path, mmap_mode='c').view(np.ndarray)
+        if entry['kind'] == 'categorical':
+            values = pd.Categorical.from_codes(values, categories=entry['categories'],
+                                               ordered=entry['ordered'])
+        data[entry['name']] = values
+    index = manifest['index'] if manifest['index'] is not None else None
+    return pd.DataFrame(data, index=index, copy=False)
+
+def _remove_stale_bundles(source, keep):
+    """
+    Remove cached bundles of older versions of the data file source, leaving
+    bundles of other data files (e.g. other datasets of a batch) in place.
+    Bundles still being written have no manifest yet and are skipped.
+    """
+    if not FRAME_CACHE_DIR.exists():
+        return
+    for bundle in FRAME_CACHE_DIR.iterdir():
+        if bundle == keep or bundle.name.endswith(".tmp"):
+            continue
+        try:
+            manifest = json.loads((bundle / "manifest.json").read_text())
+        except (OSError, ValueError):
+            continue
+        if manifest.get('source') in (None, str(source)):
+            shutil.rmtree(bundle, ignore_errors=True)
+
+def load_data(use_cache=True, chunksize=None, data_path=None, var_def_path=None, var_defs=None,
+              report_path=None):
     """
     Load and preprocess the data from data.tsv using variable definitions
     Returns:
     - DataFrame with processed data
     - Dictionary with variable metadata
+    The processed frame is cached as a memory-mapped columnar bundle keyed on the
+    data and definitions file hashes; pass use_cache=False to always re-parse.
+    With chunksize, the first item is instead an iterator of processed chunks of
+    at most chunksize rows, read lazily with the same categorical mapping.
+    data_path and var_def_path default to data/data.tsv and
+    data/variable_definitions.json; already parsed definitions can be passed as
+    var_defs.
+    Rows failing the inclusion criteria are dropped (see validation.validate_data);
+    with report_path, the per-row validation report is written there as CSV
+    (not in chunked mode).
     """
     # Get paths
-    data_path = Path(__file__).parent.parent / "data" / "data.tsv"
+    data_path = Path(data_path or DATA_PATH)
+    var_def_path = Path(var_def_path or VAR_DEFS_PATH)
     
     # Load variable definitions
-    var_defs = load_variable_definitions()
-    
-    # Load the data
-    df = pd.read_csv(data_path, sep='\t')
-    
+    if var_defs is None:
+        var_defs = load_variable_definitions(var_def_path)
+
+    if chunksize is not None:
+        return iter_data_chunks(data_path, var_defs, chunksize), var_defs
+
+    if use_cache:
+        bundle_dir = FRAME_CACHE_DIR / _frame_cache_key(data_path, var_def_path)
+        if (bundle_dir / "manifest.json").exists() and (bundle_dir / "validation_report.csv").exists():
+            if report_path is not None:
+                shutil.copyfile(bundle_dir / "validation_report.csv", report_path)
+            return load_frame_bundle(bundle_dir), var_defs
+
+    df, report = process_data(pd.read_csv(data_path, sep='\t'), var_defs, return_report=True)
+    if report_path is not None:
+        report.to_csv(report_path, index=False)
+
+    if use_cache:
+        source = data_path.resolve()
+        _remove_stale_bundles(source, keep=bundle_dir)
+        save_frame_bundle(df, bundle_dir, source=source)
+        # Kept with the frame so a cached load can still hand out the report
+        report.to_csv(bundle_dir / "validation_report.csv", index=False)
+        df = load_frame_bundle(bundle_dir)
+
+    return df, var_defs
+
+def iter_data_chunks(data_path, var_defs, chunksize):
+    """Yield processed chunks of the data file without reading it whole"""
+    with pd.read_csv(data_path, sep='\t', chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield process_data(chunk, var_defs)
+
+def process_data(df, var_defs, return_report=False):
+    """
+    Rename raw columns, validate the rows and drop those failing the inclusion
+    criteria, and convert variables according to their definitions.
+    With return_report, returns (df, validation report).
+    """
     # Rename columns to match variable definitions (remove " - Selected Choice")
     column_mapping = {
         "What is your gender? - Selected Choice": "What is your gender?",
@@ -33,7 +166,12 @@ def load_data():
         "What is your year in school? - Selected Choice": "What is your year in school?"
     }
     df = df.rename(columns=column_mapping)
-    
+
+    # Validate the raw answers before categorical conversion turns unknown codes into NaN
+    included, report = validate_data(df, var_defs)
+    if not included.all():
+        df = df[included].copy()
+
     # Process variables according to their type
     for col, info in var_defs['variables'].items():
         if col not in df.columns:
@@ -60,8 +198,8 @@ def load_data():
         elif info['type'] == 'outcome':
             # Ensure numeric type for outcomes
             df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    return df, var_defs
+
+    return (df, report) if return_report else df
 
 def get_variables_by_type(var_defs, var_type, format_type=None):
     """Helper function to get variables of a specific type and optionally format"""
@@ -78,6 +216,7 @@ def get_outcome_variables(var_defs):
 def generate_demographics_table(df, var_defs, save_path=None):
     """
     Generate a demographics table with counts and percentages for categorical variables.
+    df may also be an iterable of processed chunks (see load_data(chunksize=...)).
     Saves to CSV if save_path is provided.
     Returns the demographics DataFrame.
     """
@@ -86,12 +225,27 @@ def generate_demographics_table(df, var_defs, save_path=None):
     categorical_cols = demo_vars + indep_vars
 
     demographics_data = []
-    total = len(df)
+    if isinstance(df, pd.DataFrame):
+        total = len(df)
+        all_counts = {col: df[col].value_counts(dropna=False)
+                      for col in categorical_cols if col in df.columns}
+    else:
+        # Iterable of chunks: accumulate counts in a single bounded-memory pass
+        total = 0
+        all_counts = {}
+        for chunk in df:
+            total += len(chunk)
+            for col in categorical_cols:
+                if col in chunk.columns:
+                    counts = chunk[col].value_counts(dropna=False)
+                    all_counts[col] = counts if col not in all_counts else all_counts[col].add(counts, fill_value=0)
+        all_counts = {col: counts.astype(int).sort_values(ascending=False, kind='stable')
+                      for col, counts in all_counts.items()}
 
     for col in categorical_cols:
-        if col not in df.columns:
+        if col not in all_counts:
             continue
-        value_counts = df[col].value_counts(dropna=False)
+        value_counts = all_counts[col]
         for value, count in value_counts.items():
             percentage = round((count / total) * 100, 2)
             demographics_data.append({
@@ -1,101 +1,292 @@
 #!/usr/bin/env python3
 
+import sys
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
-def perform_eda(df):
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.online_stats import accumulate_chunks
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+def _column_kind(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'categorical'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    return 'other'
+
+def _counts_from_codes(codes, labels):
     """
-    Perform exploratory data analysis on the dataset
+    Value counts from integer codes (-1 = missing) in the order of
+    Series.value_counts: labels are in first-appearance (or category) order
+    and sorted with the same Series.sort_values, so ties come out as pandas
+    orders them.
     """
-    # Create results directory
-    results_dir = Path(__file__).parent.parent / "results"
-    results_dir.mkdir(exist_ok=True)
-    
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    order = pd.Series(counts).sort_values(ascending=False).index
+    return [(labels[i], int(counts[i])) for i in order]
+
+def _quantiles_from_counts(values, counts, qs):
+    """
+    Linear-interpolation quantiles (as numpy.percentile) of a column given its
+    distinct values and their counts, without sorting the full column.
+    """
+    order = np.argsort(values)
+    values = np.asarray(values, dtype=float)[order]
+    cum = np.cumsum(np.asarray(counts)[order])
+    n = cum[-1]
+    pos = (n - 1) * np.asarray(qs) / 100.0
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, n - 1)
+    v_lo = values[np.searchsorted(cum, lo, side='right')]
+    v_hi = values[np.searchsorted(cum, hi, side='right')]
+    return v_lo + (v_hi - v_lo) * (pos - lo)
+
+def summarize_frame(df):
+    """
+    Structured EDA summary of an in-memory DataFrame: one dict per column with
+    dtype, missing and unique counts, value counts and (numeric) descriptive
+    statistics. Missing counts and numeric statistics are computed for all
+    columns at once; each column is factorized once for its counts and uniques.
+    """
+    missing = df.isna().sum().to_numpy()
+    numeric_cols = list(df.select_dtypes(include=[np.number]).columns)
+
+    numeric_stats = {}
+    if numeric_cols:
+        x = df[numeric_cols].to_numpy(dtype=float)
+        valid = ~np.isnan(x)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(valid, x, 0.0).sum(axis=0) / count
+            std = np.sqrt((np.where(valid, x - mean, 0.0) ** 2).sum(axis=0) / (count - 1))
+        for i, col in enumerate(numeric_cols):
+            numeric_stats[col] = {'count': float(count[i]), 'mean': mean[i], 'std': std[i]}
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        kind = _column_kind(series.dtype)
+        if kind == 'categorical':
+            codes = series.cat.codes.to_numpy()
+            labels = list(series.cat.categories)
+        else:
+            codes, labels = pd.factorize(series, sort=False)
+            labels = list(labels)
+        counts = _counts_from_codes(codes, labels)
+        unique = sum(1 for _, c in counts if c > 0)
+        if col in numeric_stats:
+            # Quantiles from the same factorization: min, quartiles, max
+            stats = numeric_stats[col]
+            if counts:
+                quantiles = _quantiles_from_counts([v for v, _ in counts], [c for _, c in counts],
+                                                   [0, 25, 50, 75, 100])
+            else:
+                quantiles = [np.nan] * 5
+            stats.update(zip(['min', '25%', '50%', '75%', 'max'], quantiles))
+            stats = {k: stats[k] for k in DESCRIBE_INDEX}
+            numeric_stats[col] = stats
+        if kind == 'numeric':
+            counts = counts[:5]  # top 5 most frequent values
+        columns.append({
+            'name': col,
+            'dtype': series.dtype,
+            'kind': kind,
+            'count': int(len(series) - missing[i]),
+            'missing': int(missing[i]),
+            'unique': unique,
+            'value_counts': counts if kind != 'other' else None,
+            'describe': numeric_stats.get(col),
+        })
+    return {'shape': df.shape, 'columns': columns, 'approximate': False}
+
+def summarize_chunks(chunks):
+    """
+    Same summary structure from an iterable of chunks in one bounded-memory pass.
+    Unique counts beyond the sketch size and quantiles are approximate.
+    """
+    accumulators, total = accumulate_chunks(chunks)
+    columns = []
+    for col, acc in accumulators.items():
+        kind = _column_kind(acc.dtype)
+        counts = None
+        if kind == 'categorical':
+            counts = list(acc.value_counts().items())
+        elif kind == 'numeric':
+            counts = list(acc.value_counts().head().items())
+        columns.append({
+            'name': col,
+            'dtype': acc.dtype,
+            'kind': kind,
+            'count': int(acc.rows - acc.missing),
+            'missing': int(acc.missing),
+            'unique': acc.uniques.estimate(),
+            'value_counts': counts,
+            'describe': acc.describe().to_dict() if kind == 'numeric' else None,
+        })
+    return {'shape': (total, len(columns)), 'columns': columns, 'approximate': True}
+
+def _eda_tables(summary):
+    """pandas objects used by the console and text renderers"""
+    cols = summary['columns']
+    names = [c['name'] for c in cols]
+    value_counts = {}
+    for c in cols:
+        if c['value_counts'] is not None:
+            index = pd.Index([v for v, _ in c['value_counts']], name=c['name'])
+            value_counts[c['name']] = pd.Series([n for _, n in c['value_counts']], index=index,
+                                                name='count', dtype='int64')
+    numeric = [c for c in cols if c['describe'] is not None]
+    return {
+        'dtypes': pd.Series([c['dtype'] for c in cols], index=names, dtype=object),
+        'missing': pd.Series([c['missing'] for c in cols], index=names, dtype='int64'),
+        'unique_counts': pd.Series([c['unique'] for c in cols], index=names, dtype='int64'),
+        'value_counts': value_counts,
+        'numeric_summary': pd.DataFrame({c['name']: pd.Series(c['describe'])[DESCRIBE_INDEX] for c in numeric})
+                           if numeric else None,
+        'cat_cols': [c['name'] for c in cols if c['kind'] == 'categorical'],
+    }
+
+def print_eda(summary):
+    """Render an EDA summary to the console"""
+    tables = _eda_tables(summary)
+
     # Basic information
     print("\n=== Basic Information ===\n")
-    print("Dataset Shape:", df.shape)
+    print("Dataset Shape:", summary['shape'])
     print("\nColumns:")
-    for col in df.columns:
-        print("-", col)
-    
+    for c in summary['columns']:
+        print("-", c['name'])
+
     # Data types
     print("\n=== Data Types ===")
-    print(df.dtypes)
-    
+    print(tables['dtypes'])
+
     # Missing values
     print("\n=== Missing Values ===")
-    print(df.isnull().sum())
-    
+    print(tables['missing'])
+
     # Unique values per column
     print("\n=== Unique Values per Column ===")
-    unique_counts = pd.Series({
-        col: df[col].nunique() 
-        for col in df.columns
-    })
-    print(unique_counts)
-    
+    print(tables['unique_counts'])
+
     # Value distributions
     print("\n=== Value Distributions ===\n")
-    for col in df.columns:
-        print(f"\n{col}:")
-        if pd.api.types.is_categorical_dtype(df[col]):
-            # For categorical columns, show value counts with labels
-            print(df[col].value_counts())
-        elif pd.api.types.is_numeric_dtype(df[col]):
-            # For numeric columns, show top 5 most frequent values
-            print(df[col].value_counts().head())
-    
+    for c in summary['columns']:
+        print(f"\n{c['name']}:")
+        if c['name'] in tables['value_counts']:
+            print(tables['value_counts'][c['name']])
+
     # Numeric columns summary
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    if len(numeric_cols) > 0:
+    if tables['numeric_summary'] is not None:
         print("\n=== Numeric Columns Summary ===")
-        print(df[numeric_cols].describe())
-    
+        print(tables['numeric_summary'])
+
     # Categorical columns summary
-    cat_cols = df.select_dtypes(include=['category']).columns
-    if len(cat_cols) > 0:
+    if len(tables['cat_cols']) > 0:
         print("\n=== Categorical Columns Summary ===")
-        for col in cat_cols:
+        for col in tables['cat_cols']:
             print(f"\n{col}:")
-            print(df[col].value_counts())
-    
+            print(tables['value_counts'][col])
+
+def render_eda_text(summary):
+    """Render an EDA summary as the eda_summary.txt report"""
+    tables = _eda_tables(summary)
+    out = ["=== Basic Information ===\n"]
+    out.append(f"\nDataset Shape: {summary['shape']}\n")
+    out.append("\nColumns:\n")
+    for c in summary['columns']:
+        out.append(f"- {c['name']}\n")
+
+    out.append("\n=== Data Types ===\n")
+    out.append(str(tables['dtypes']))
+
+    out.append("\n\n=== Missing Values ===\n")
+    out.append(str(tables['missing']))
+
+    out.append("\n\n=== Unique Values per Column ===\n")
+    out.append(str(tables['unique_counts']))
+
+    out.append("\n\n=== Value Distributions ===\n")
+    for c in summary['columns']:
+        out.append(f"\n{c['name']}:\n")
+        if c['name'] in tables['value_counts']:
+            out.append(str(tables['value_counts'][c['name']]))
+
+    if tables['numeric_summary'] is not None:
+        out.append("\n\n=== Numeric Columns Summary ===\n")
+        out.append(str(tables['numeric_summary']))
+
+    if len(tables['cat_cols']) > 0:
+        out.append("\n\n=== Categorical Columns Summary ===\n")
+        for col in tables['cat_cols']:
+            out.append(f"\n{col}:\n")
+            out.append(str(tables['value_counts'][col]))
+    return "".join(out)
+
+def _json_value(value):
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+def eda_to_json(summary):
+    """JSON-serializable form of an EDA summary"""
+    columns = []
+    for c in summary['columns']:
+        columns.append({
+            'name': c['name'],
+            'dtype': str(c['dtype']),
+            'kind': c['kind'],
+            'count': c['count'],
+            'missing': c['missing'],
+            'unique': c['unique'],
+            'value_counts': None if c['value_counts'] is None else
+                [{'value': _json_value(v) if not isinstance(v, str) else v, 'count': n}
+                 for v, n in c['value_counts']],
+            'describe': None if c['describe'] is None else
+                {k: _json_value(v) for k, v in c['describe'].items()},
+        })
+    return {
+        'rows': summary['shape'][0],
+        'n_columns': summary['shape'][1],
+        'approximate': summary['approximate'],
+        'columns': columns,
+    }
+
+def perform_eda(df, results_dir=None):
+    """
+    Perform exploratory data analysis on the dataset
+    df may also be an iterable of processed chunks (see load_data(chunksize=...)),
+    which is summarized in a single pass with online accumulators.
+    Writes eda_summary.txt and eda_summary.json to results_dir (results/ by
+    default) and returns the summary.
+    """
+    # Create results directory
+    results_dir = Path(results_dir or Path(__file__).parent.parent / "results")
+    results_dir.mkdir(parents=True, exist_ok=True)
+
+    if isinstance(df, pd.DataFrame):
+        summary = summarize_frame(df)
+    else:
+        summary = summarize_chunks(df)
+
+    print_eda(summary)
+
     # Save summary to file
-    with open(results_dir / "eda_summary.txt", "w") as f:
-        f.write("=== Basic Information ===\n")
-        f.write(f"\nDataset Shape: {df.shape}\n")
-        f.write("\nColumns:\n")
-        for col in df.columns:
-            f.write(f"- {col}\n")
-        
-        f.write("\n=== Data Types ===\n")
-        f.write(str(df.dtypes))
-        
-        f.write("\n\n=== Missing Values ===\n")
-        f.write(str(df.isnull().sum()))
-        
-        f.write("\n\n=== Unique Values per Column ===\n")
-        f.write(str(unique_counts))
-        
-        f.write("\n\n=== Value Distributions ===\n")
-        for col in df.columns:
-            f.write(f"\n{col}:\n")
-            if pd.api.types.is_categorical_dtype(df[col]):
-                f.write(str(df[col].value_counts()))
-            elif pd.api.types.is_numeric_dtype(df[col]):
-                f.write(str(df[col].value_counts().head()))
-        
-        if len(numeric_cols) > 0:
-            f.write("\n\n=== Numeric Columns Summary ===\n")
-            f.write(str(df[numeric_cols].describe()))
-        
-        if len(cat_cols) > 0:
-            f.write("\n\n=== Categorical Columns Summary ===\n")
-            for col in cat_cols:
-                f.write(f"\n{col}:\n")
-                f.write(str(df[col].value_counts()))
+    (results_dir / "eda_summary.txt").write_text(render_eda_text(summary))
+    with open(results_dir / "eda_summary.json", "w") as f:
+        json.dump(eda_to_json(summary), f, indent=2)
+
+    return summary
 
 if __name__ == "__main__":
-    from data_loader import load_data
-    df = load_data()
-    perform_eda(df) 
\ No newline at end of file
+    from scripts.data_loader import load_data
+    df, _ = load_data()
+    perform_eda(df)
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
 import os
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import pandas as pd
-import altair as alt
+from scripts.instrumentation import span
 
 RESULTS_DIR = Path("results")
 DOCS_DIR = Path("docs")
@@ -11,9 +15,54 @@ ASSETS_DIR = DOCS_DIR / "assets"
 IMAGES_DIR = ASSETS_DIR / "images"
 TABLES_DIR = ASSETS_DIR / "tables"
 STYLESHEETS_DIR = DOCS_DIR / "stylesheets"
+DATA_DIR = ASSETS_DIR / "data"
+CHARTS_DIR = ASSETS_DIR / "charts"
+
+# Chart data and spec files referenced by the current run
+_referenced_assets = set()
+# Pages render in threads; guards _referenced_assets and the shared asset writes
+_assets_lock = threading.Lock()
+
+def set_output_dirs(docs_dir=Path("docs"), results_dir=Path("results")):
+    """
+    Point the report at another docs/ and results/ directory (e.g. one per
+    dataset in a batch run). Affects this process only.
+    """
+    global RESULTS_DIR, DOCS_DIR, ASSETS_DIR, IMAGES_DIR, TABLES_DIR, STYLESHEETS_DIR, DATA_DIR, CHARTS_DIR
+    RESULTS_DIR = Path(results_dir)
+    DOCS_DIR = Path(docs_dir)
+    ASSETS_DIR = DOCS_DIR / "assets"
+    IMAGES_DIR = ASSETS_DIR / "images"
+    TABLES_DIR = ASSETS_DIR / "tables"
+    STYLESHEETS_DIR = DOCS_DIR / "stylesheets"
+    DATA_DIR = ASSETS_DIR / "data"
+    CHARTS_DIR = ASSETS_DIR / "charts"
+
+def write_if_changed(path, content):
+    """
+    Write text or bytes to path only if it differs from what is on disk, so
+    unchanged files keep their mtime and mkdocs --dirty can skip them.
+    Returns True if the file was written.
+    """
+    data = content.encode() if isinstance(content, str) else content
+    if path.exists() and path.stat().st_size == len(data):
+        if hashlib.sha256(path.read_bytes()).digest() == hashlib.sha256(data).digest():
+            return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp file per write, so concurrent writers never share one
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        # NamedTemporaryFile creates 0600 files; keep the usual permissions
+        os.chmod(tmp.name, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+    return True
 
 def setup_dirs():
-    for d in [DOCS_DIR, IMAGES_DIR, TABLES_DIR, STYLESHEETS_DIR]:
+    for d in [DOCS_DIR, IMAGES_DIR, TABLES_DIR, STYLESHEETS_DIR, DATA_DIR, CHARTS_DIR]:
         d.mkdir(parents=True, exist_ok=True)
 
 def create_custom_css():
@@ -67,17 +116,71 @@ def create_custom_css():
 .md-typeset pre {
     max-width: none;
 }"""
-    (STYLESHEETS_DIR / "extra.css").write_text(css_content)
+    write_if_changed(STYLESHEETS_DIR / "extra.css", css_content)
 
 def copy_assets():
     # Copy CSVs only
     if RESULTS_DIR.exists():
         for file in RESULTS_DIR.glob("*.csv"):
             dest = TABLES_DIR / file.name
-            dest.write_bytes(file.read_bytes())
-
-def write_index():
-    readme_path = Path("README.md")
+            write_if_changed(dest, file.read_bytes())
+
+def _content_hash(obj):
+    payload = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def _write_json_once(path, obj):
+    """Write a content-addressed JSON file unless it already exists"""
+    with _assets_lock:
+        _referenced_assets.add(path)
+        if not path.exists():
+            write_if_changed(path, json.dumps(obj, separators=(',', ':'), default=str))
+
+def _link_datasets(node, urls):
+    """Replace {'name': <dataset>} references with {'url': <file>} throughout a spec"""
+    if isinstance(node, dict):
+        if set(node) == {'name'} and node['name'] in urls:
+            return {'url': urls[node['name']]}
+        return {k: _link_datasets(v, urls) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_link_datasets(v, urls) for v in node]
+    return node
+
+def chart_block(chart, page):
+    """
+    Fenced vegalite block for a chart, with its data and spec written once to
+    docs/assets/data/<hash>.json and docs/assets/charts/<hash>.json.
+
+    Identical datasets and identical specs share one file, so a chart embedded
+    under several headings costs one small reference per embed. URLs are
+    relative to the page (the charts plugin runs with use_data_path: false);
+    with directory URLs every page except index.md sits one level down.
+    """
+    prefix = "" if page == "index.md" else "../"
+    with span("chart_block", cat="chart", page=page) as info:
+        spec = chart.to_dict()
+        urls = {}
+        for name, values in spec.pop('datasets', {}).items():
+            digest = _content_hash(values)
+            _write_json_once(DATA_DIR / f"{digest}.json", values)
+            urls[name] = f"{prefix}assets/data/{digest}.json"
+        spec = _link_datasets(spec, urls)
+        digest = _content_hash(spec)
+        _write_json_once(CHARTS_DIR / f"{digest}.json", spec)
+        info['spec'] = digest
+    ref = json.dumps({'schema-url': f"{prefix}assets/charts/{digest}.json"})
+    return f"```vegalite\n{ref}\n```\n\n"
+
+def remove_unreferenced_assets():
+    """Delete chart data/spec files not referenced by the current run"""
+    with _assets_lock:
+        for d in [DATA_DIR, CHARTS_DIR]:
+            for path in d.glob("*.json"):
+                if path not in _referenced_assets:
+                    path.unlink()
+
+def render_index():
+    readme_path = Path(__file__).parent.parent / "README.md"
     readme_content = ""
     if readme_path.exists():
         readme_content = readme_path.read_text()
@@ -85,9 +188,9 @@ def write_index():
     nav_content = ""
 
     content = readme_content + nav_content
-    (DOCS_DIR / "index.md").write_text(content)
+    return content
 
-def write_data_summary(df, var_defs, charts):
+def render_data_summary(df, var_defs, charts):
     content = "# Variable Summary\n\n"
 
     # Get variables by type from metadata
@@ -101,7 +204,7 @@ def write_data_summary(df, var_defs, charts):
         content += f"### {var}\n\n"
         chart = charts.get('distributions', {}).get(var)
         if chart:
-            content += f"```vegalite\n{chart.to_json()}\n```\n\n"
+            content += chart_block(chart, "data_summary.md")
         if var in df.columns:
             freq = df[var].value_counts(dropna=False).reset_index()
             freq.columns = [var, 'Count']
@@ -115,7 +218,7 @@ def write_data_summary(df, var_defs, charts):
         content += f"### {var}\n\n"
         chart = charts.get('distributions', {}).get(var)
         if chart:
-            content += f"```vegalite\n{chart.to_json()}\n```\n\n"
+            content += chart_block(chart, "data_summary.md")
         if var in df.columns:
             freq = df[var].value_counts(dropna=False).reset_index()
             freq.columns = [var, 'Count']
@@ -124,6 +227,7 @@ def write_data_summary(df, var_defs, charts):
             content += "_No data available._\n\n"
 
     # Score distributions
+    import pandas as pd
     df_scores = df[outcome_cols] if all(c in df.columns for c in outcome_cols) else pd.DataFrame()
 
     if not df_scores.empty:
@@ -132,45 +236,42 @@ def write_data_summary(df, var_defs, charts):
         # Add boxplot
         boxplot = charts.get('score_boxplot')
         if boxplot:
-            content += f"```vegalite\n{boxplot.to_json()}\n```\n\n"
+            content += chart_block(boxplot, "data_summary.md")
 
         # Add layered histogram if available
         layered_hist = charts.get('score_layered_hist')
         if layered_hist:
-            content += f"```vegalite\n{layered_hist.to_json()}\n```\n\n"
+            content += chart_block(layered_hist, "data_summary.md")
 
         # Add score summary table
         content += df_scores.describe().transpose().to_markdown() + "\n\n"
 
-    (DOCS_DIR / "data_summary.md").write_text(content)
+    return content
 
-def write_eda(df, var_defs, charts):
+def render_eda(df, var_defs, charts):
     content = "# Bivariate Relationships\n\n"
 
     # Pair plot
     pair_plot = charts.get('pair_plot')
     if pair_plot:
-        spec = pair_plot.to_json()
         content += "## Outcome Pair Plot\n\n"
-        content += f"```vegalite\n{spec}\n```\n\n"
+        content += chart_block(pair_plot, "eda.md")
 
     # Correlation heatmap
     corr_heatmap = charts.get('heatmap')
     if corr_heatmap:
-        spec = corr_heatmap.to_json()
         content += "## Correlation Heatmap\n\n"
-        content += f"```vegalite\n{spec}\n```\n\n"
+        content += chart_block(corr_heatmap, "eda.md")
 
     # Categorical associations heatmap
     cat_assoc = charts.get('cramer')
     if cat_assoc:
-        spec = cat_assoc.to_json()
         content += "## Categorical Associations\n\n"
-        content += f"```vegalite\n{spec}\n```\n\n"
+        content += chart_block(cat_assoc, "eda.md")
 
-    (DOCS_DIR / "eda.md").write_text(content)
+    return content
 
-def write_analysis(df, var_defs, charts, t_test_results=None, anova_results=None):
+def render_analysis(df, var_defs, charts, t_test_results=None, anova_results=None):
     content = "# Statistical Analysis\n\n"
     
     # Add statistical significance summary
@@ -191,11 +292,20 @@ def write_analysis(df, var_defs, charts, t_test_results=None, anova_results=None
             scores_by = charts.get('boxplots', {})
             for key, chart in scores_by.items():
                 if key.strip().lower() == predictor.strip().lower():
-                    spec = chart.to_json()
-                    content += f"```vegalite\n{spec}\n```\n\n"
+                    content += chart_block(chart, "analysis.md")
             
             # Rename columns for display
             display_subset = subset.copy()
+            if 'Cohens_d_CI_low' in display_subset.columns:
+                first = display_subset.iloc[0]
+                ci_label = f"Cohens_d {first['CI_level']:.0%} CI ({first['CI_method']})"
+                display_subset[ci_label] = [f"[{lo:.3f}, {hi:.3f}]" for lo, hi in
+                                            zip(display_subset['Cohens_d_CI_low'], display_subset['Cohens_d_CI_high'])]
+                display_subset = display_subset.drop(columns=['Cohens_d_CI_low', 'Cohens_d_CI_high', 'CI_method',
+                                                              'CI_level', 'n_boot', 'bootstrap_seed'])
+            if 'perm_p_value' in display_subset.columns:
+                display_subset = display_subset.drop(columns=['n_perm']).rename(
+                    columns={'perm_p_value': 'p-value (permutation)'})
             if 'raw_p_value' in display_subset.columns and 'adj_p_value' in display_subset.columns:
                 display_subset = display_subset.rename(columns={
                     'raw_p_value': 'p-value (raw)',
@@ -209,6 +319,9 @@ def write_analysis(df, var_defs, charts, t_test_results=None, anova_results=None
                      display_subset = display_subset.drop(columns=['p_value'])
 
             content += display_subset.to_markdown(index=False) + "\n\n"
+            if 'Cohens_d_CI_low' in subset.columns:
+                content += (f"_Confidence intervals from {first['n_boot']} bootstrap resamples within groups "
+                            f"(seed {first['bootstrap_seed']})._\n\n")
     else:
         content += "_No t-test results available._\n\n"
 
@@ -234,14 +347,20 @@ def write_analysis(df, var_defs, charts, t_test_results=None, anova_results=None
                 boxplots = charts.get('boxplots', {})
                 for key, chart in boxplots.items():
                     if key.strip().lower() == str(row['Variable']).strip().lower():
-                        spec = chart.to_json()
-                        content += f"```vegalite\n{spec}\n```\n\n"
+                        content += chart_block(chart, "analysis.md")
                         break
 
                 content += f"- **F** = {row['F_statistic']:.3f}\n"
                 content += f"- **p (raw)** = {row.get('raw_p_value', row.get('p_value')):.3f}\n" # Use raw_p_value if exists
                 content += f"- **p (FDR-adjusted)** = {row.get('adj_p_value', row.get('p_value')):.3f}\n" # Use adj_p_value if exists
-                content += f"- **{effect_size_name.replace('_', ' ').title()}** = {effect_size_value:.3f}\n\n"
+                if 'perm_p_value' in row:
+                    content += f"- **p (permutation, {row['n_perm']} permutations)** = {row['perm_p_value']:.4f}\n"
+                content += f"- **{effect_size_name.replace('_', ' ').title()}** = {effect_size_value:.3f}\n"
+                if 'partial_eta_squared_CI_low' in row:
+                    content += (f"- **{row['CI_level']:.0%} CI ({row['CI_method']}, {row['n_boot']} bootstrap resamples, "
+                                f"seed {row['bootstrap_seed']})** = [{row['partial_eta_squared_CI_low']:.3f}, "
+                                f"{row['partial_eta_squared_CI_high']:.3f}]\n")
+                content += "\n"
 
                 # Add covariate effects table without heading
                 covariate_effects = row.get('Covariate_Effects', {})
@@ -259,17 +378,122 @@ def write_analysis(df, var_defs, charts, t_test_results=None, anova_results=None
     # Drill-down chart
     drilldown = charts.get('drilldown_chart')
     if drilldown:
-        spec = drilldown.to_json()
         content += "## Drill-down Chart\n\n"
-        content += f"```vegalite\n{spec}\n```\n\n"
-
-    (DOCS_DIR / "analysis.md").write_text(content)
-
-def generate_docs(df, var_defs, charts, t_test_results=None, anova_results=None):
+        content += chart_block(drilldown, "analysis.md")
+
+    return content
+
+def render_reliability(psychometrics=None):
+    import pandas as pd
+    content = "# Scale Reliability\n\n"
+    if not psychometrics or psychometrics['scales'].empty:
+        return content + "_No reliability results available._\n"
+    scales = psychometrics['scales']
+    first = scales.iloc[0]
+    content += ("_Cronbach's alpha and McDonald's omega (one-factor, total) per question group and for all "
+                "grouped items together. Rows with a missing item are left out of that scale. "
+                f"Intervals are 95% percentile bootstrap intervals from {first['n_boot']} resamples "
+                f"(seed {first['bootstrap_seed']})._\n\n")
+    table = pd.DataFrame({
+        'Scale': scales['Scale'],
+        'Items': scales['Items'],
+        'N': scales['N'],
+        "Cronbach's α": scales['Cronbachs_alpha'].map('{:.3f}'.format),
+        'α 95% CI': [f"[{lo:.3f}, {hi:.3f}]" for lo, hi in zip(scales['alpha_CI_low'], scales['alpha_CI_high'])],
+        "McDonald's ω": scales['McDonalds_omega'].map('{:.3f}'.format),
+        'ω 95% CI': [f"[{lo:.3f}, {hi:.3f}]" for lo, hi in zip(scales['omega_CI_low'], scales['omega_CI_high'])],
+    })
+    content += table.replace('nan', '–').to_markdown(index=False, disable_numparse=True) + "\n\n"
+
+    content += "## Item Statistics\n\n"
+    content += "_Corrected item-total correlation: the item against the sum of the other items in its scale._\n\n"
+    items = psychometrics['items']
+    for scale in scales['Scale']:
+        subset = items[items['Scale'] == scale]
+        content += f"### {scale}\n\n"
+        table = pd.DataFrame({
+            'Item': subset['Item'],
+            'Item-total r': subset['item_total_r'].map('{:.3f}'.format),
+            'r 95% CI': [f"[{lo:.3f}, {hi:.3f}]" for lo, hi in zip(subset['r_CI_low'], subset['r_CI_high'])],
+            'α if deleted': subset['alpha_if_deleted'].map('{:.3f}'.format),
+            'Loading': subset['loading'].map('{:.3f}'.format),
+        })
+        content += table.replace('nan', '–').to_markdown(index=False, disable_numparse=True) + "\n\n"
+    return content
+
+def render_regression(regression=None):
+    import pandas as pd
+    content = "# Regression\n\n"
+    if regression is None or regression[1].empty:
+        return content + "_No regression results available._\n"
+    coefficients, models = regression
+    se_type = models['SE_type'].iloc[0]
+    # p-values of intercepts are not FDR-adjusted and show as "–"
+    content += ("_Ordinary least squares of each outcome on all independent and demographic variables "
+                "(categorical ones coded against their first level), rows with a missing predictor or outcome left out. "
+                f"Standard errors: {'HC3 heteroskedasticity-robust' if se_type == 'HC3' else 'classical'}. "
+                "FDR-adjusted p-values are corrected across all coefficients of all outcomes, intercepts excluded._\n\n")
+    table = pd.DataFrame({
+        'Outcome': models['Outcome'],
+        'n': models['n'],
+        'R²': models['R_squared'].map('{:.3f}'.format),
+        'Adj. R²': models['Adj_R_squared'].map('{:.3f}'.format),
+        'F': models['F_statistic'].map('{:.3f}'.format),
+        'p (F)': models['F_p_value'].map('{:.3f}'.format),
+        'AIC': models['AIC'].map('{:.1f}'.format),
+        'BIC': models['BIC'].map('{:.1f}'.format),
+    })
+    content += table.replace('nan', '–').to_markdown(index=False, disable_numparse=True) + "\n\n"
+
+    for outcome in models['Outcome']:
+        subset = coefficients[coefficients['Outcome'] == outcome]
+        content += f"## {outcome}\n\n"
+        table = pd.DataFrame({
+            'Term': subset['Variable'],
+            'B': subset['Coefficient'].map('{:.3f}'.format),
+            'SE': subset['Std_Error'].map('{:.3f}'.format),
+            't': subset['t_statistic'].map('{:.3f}'.format),
+            'p-value (raw)': subset['raw_p_value'].map('{:.3f}'.format),
+            'p-value (FDR-adjusted)': subset['adj_p_value'].map('{:.3f}'.format),
+        })
+        content += table.replace('nan', '–').to_markdown(index=False, disable_numparse=True) + "\n\n"
+    return content
+
+def generate_docs(df, var_defs, charts, t_test_results=None, anova_results=None, psychometrics=None,
+                  regression=None, workers=4):
+    """
+    Render all pages concurrently and write only the ones whose content changed.
+    """
+    import altair as alt
+    with _assets_lock:
+        _referenced_assets.clear()
     setup_dirs()
     create_custom_css()
     copy_assets()
-    write_index()
-    write_data_summary(df, var_defs, charts)
-    write_eda(df, var_defs, charts)
-    write_analysis(df, var_defs, charts, t_test_results, anova_results)
+    pages = {
+        "index.md": lambda: render_index(),
+        "data_summary.md": lambda: render_data_summary(df, var_defs, charts),
+        "eda.md": lambda: render_eda(df, var_defs, charts),
+        "analysis.md": lambda: render_analysis(df, var_defs, charts, t_test_results, anova_results),
+        "reliability.md": lambda: render_reliability(psychometrics),
+        "regression.md": lambda: render_regression(regression),
+    }
+    def render_page(name, render):
+        with span(f"render {name}", cat="page"):
+            return render()
+
+    def write_page(name, content):
+        with span(f"write {name}", cat="page") as info:
+            info['written'] = write_if_changed(DOCS_DIR / name, content)
+        return info['written']
+
+    # chart_block moves chart data into asset files, so altair's limit on rows
+    # embedded inline in a spec does not apply while rendering
+    with alt.data_transformers.disable_max_rows(), ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(render_page, name, render) for name, render in pages.items()}
+        written = [name for name, future in futures.items()
+                   if write_page(name, future.result())]
+    remove_unreferenced_assets()
+    unchanged = len(pages) - len(written)
+    print(f"Wrote {len(written)} page(s), {unchanged} unchanged: {', '.join(written) or 'none'}")
+    return written
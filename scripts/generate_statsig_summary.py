@@ -1,18 +1,12 @@
 #!/usr/bin/env python3
 
-import pandas as pd
-import numpy as np
 from pathlib import Path
-import re
 import sys
 
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from scripts.statistical_analysis import perform_statistical_analysis
-from scripts.data_loader import load_data
-
 def generate_statsig_summary(ttest_results, anova_results, alpha=0.05):
     """Generate a markdown summary of statistically significant results"""
     summary = ["# Statistical Significance Summary\n"]
@@ -24,7 +18,7 @@ def generate_statsig_summary(ttest_results, anova_results, alpha=0.05):
             summary.append("## Statistically Significant T-Test Results\n")
             for _, row in sig_ttests.iterrows():
                 summary.append(f"### {row['Variable']} on {row['Outcome']}\n")
-                summary.append(f"- t({row['degrees_of_freedom']}) = {row['t_statistic']:.3f}, p = {row['p_value']:.3f}")
+                summary.append(f"- t({row['dof']:.1f}) = {row['t_statistic']:.3f}, p = {row['p_value']:.3f}")
                 summary.append(f"- Cohen's d = {row['Cohens_d']:.3f}")
                 summary.append(f"- {row['Group1']}: Mean = {row['Group1_Mean']:.3f}, SD = {row['Group1_SD']:.3f}")
                 summary.append(f"- {row['Group2']}: Mean = {row['Group2_Mean']:.3f}, SD = {row['Group2_SD']:.3f}\n")
@@ -45,10 +39,25 @@ def generate_statsig_summary(ttest_results, anova_results, alpha=0.05):
     return "\n".join(summary)
 
 if __name__ == "__main__":
-    # Load data and perform statistical analysis
-    print("Loading data and performing statistical analysis...")
-    df, var_defs = load_data()
-    ttest_results, anova_results = perform_statistical_analysis(df, var_defs)
+    from scripts.config import DATA_PATH, VAR_DEFS_PATH, default_run_params
+    from scripts.results_store import ResultsStore, RESULTS_DB, inputs_digest
+
+    # Read the stored plain run for the current inputs; compute the statistics if there is none
+    run_id = None
+    if RESULTS_DB.exists():
+        run_id = ResultsStore(RESULTS_DB).find_run(inputs_digest(DATA_PATH, VAR_DEFS_PATH), default_run_params())
+    if run_id is not None:
+        print(f"Reading run {run_id} from {RESULTS_DB.relative_to(project_root)}...")
+        store = ResultsStore(RESULTS_DB)
+        ttest_results, anova_results = store.t_tests(run_id), store.ancova(run_id)
+    else:
+        from scripts.statistical_analysis import perform_statistical_analysis
+        from scripts.data_loader import load_data
+
+        # Load data and perform statistical analysis
+        print("Loading data and performing statistical analysis...")
+        df, var_defs = load_data()
+        ttest_results, anova_results = perform_statistical_analysis(df, var_defs)
     
     # Generate summary
     print("Generating statistical significance summary...")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.cache import file_digest
+from scripts.data_loader import process_data, get_outcome_variables, get_variables_by_type
+from scripts.statistical_analysis import (covariate_frame, welch_from_moments, apply_fdr, _type2_effects,
+                                          _ttest_records, _grouped_ancova_records, EXACT_FIT_TOL)
+
+STATE_PATH = Path(__file__).parent.parent / ".pipeline_cache" / "incremental" / "state.pkl"
+# Modules whose arithmetic the saved statistics depend on
+STATE_SOURCES = ("data_loader.py", "validation.py", "statistical_analysis.py", "incremental.py")
+
+class SufficientStatistics:
+    """
+    Additive summaries of the data from which the t-tests, ANCOVAs and FDR
+    adjustment can be re-derived without the rows:
+
+    - t-tests: per binary variable, level and outcome, the count, sum and sum
+      of squares of the outcome (shifted by a fixed per-outcome constant so
+      the sums of squares stay well conditioned);
+    - ANCOVA: per independent variable and outcome, the Gram matrix of
+      [1, one-hot of every level, covariates, outcome] over the complete rows,
+      i.e. the normal equations of the model.
+
+    update() adds a batch of processed rows; results() equals
+    perform_statistical_analysis on all rows seen so far up to floating point.
+    """
+
+    def __init__(self, var_defs):
+        self.outcome_cols = get_outcome_variables(var_defs)
+        self.demographic_vars = get_variables_by_type(var_defs, 'demographic', 'categorical')
+        categorical = self.demographic_vars + get_variables_by_type(var_defs, 'independent', 'categorical')
+        self.binary_vars = [col for col in categorical if len(var_defs['variables'][col]['values']) == 2]
+        self.independent_vars = [v for v, meta in var_defs['variables'].items() if meta.get('type') == 'independent']
+        self.n_rows = 0
+        self.shift = None
+        self.covariate_cols = None
+        self.levels = {}         # variable -> category labels
+        self.order = {}          # binary variable -> level codes in order of first appearance
+        self.moments = {}        # binary variable -> (count, sum, sum of squares), each levels x outcomes
+        self.grams = {}          # independent variable -> outcomes x P x P
+
+    def update(self, df):
+        """Add a batch of processed rows (as returned by process_data)"""
+        if len(df) == 0:
+            return
+        y = df[self.outcome_cols].to_numpy(dtype=float)
+        if self.shift is None:
+            with np.errstate(invalid='ignore'):
+                self.shift = np.nan_to_num(np.nanmean(y, axis=0)) if len(y) else np.zeros(y.shape[1])
+        valid_y = ~np.isnan(y)
+        yz = np.where(valid_y, y - self.shift, 0.0)
+
+        for var in set(self.binary_vars + self.independent_vars):
+            labels = list(df[var].cat.categories)
+            if self.levels.setdefault(var, labels) != labels:
+                raise ValueError(f"Categories of {var} changed between batches")
+
+        for var in self.binary_vars:
+            codes = df[var].cat.codes.to_numpy()
+            seen = self.order.setdefault(var, [])
+            seen.extend(int(c) for c in pd.unique(codes[codes >= 0]) if int(c) not in seen)
+            onehot = (codes[:, None] == np.arange(len(self.levels[var]))[None, :]).astype(float)
+            batch = (onehot.T @ valid_y, onehot.T @ yz, onehot.T @ (yz ** 2))
+            if var in self.moments:
+                batch = tuple(a + b for a, b in zip(self.moments[var], batch))
+            self.moments[var] = batch
+
+        covariate_df = covariate_frame(df, self.demographic_vars)
+        if self.covariate_cols is None:
+            self.covariate_cols = list(covariate_df.columns)
+        elif list(covariate_df.columns) != self.covariate_cols:
+            raise ValueError("Covariate columns changed between batches")
+        covariates = covariate_df.to_numpy(dtype=float).reshape(len(df), -1)
+        for var in self.independent_vars:
+            codes = pd.Categorical(df[var]).codes.astype(int)
+            n_levels = len(self.levels[var])
+            base = np.column_stack([np.ones(len(df)),
+                                    (codes[:, None] == np.arange(n_levels)[None, :]).astype(float),
+                                    np.nan_to_num(covariates)])
+            base_valid = (codes >= 0) & ~np.isnan(covariates).any(axis=1)
+            w = (base_valid[:, None] & valid_y).astype(float)       # rows x outcomes
+            wy = w * yz
+            # Blocks of [base, y]' [base, y] over each outcome's complete rows
+            xx = np.einsum('nk,np,nq->kpq', w, base, base)
+            xy = np.einsum('nk,np->kp', wy, base)
+            yy = (wy * yz).sum(axis=0)
+            gram = np.concatenate([np.concatenate([xx, xy[:, :, None]], axis=2),
+                                   np.concatenate([xy, yy[:, None]], axis=1)[:, None, :]], axis=1)
+            self.grams[var] = self.grams[var] + gram if var in self.grams else gram
+
+        self.n_rows += len(df)
+
+    def _ttest(self, var):
+        count, total, squares = self.moments[var]
+        a, b = self.order[var][:2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var_ = (squares - total * mean) / (count - 1)
+        return welch_from_moments(count[a], mean[a] + self.shift, var_[a],
+                                  count[b], mean[b] + self.shift, var_[b])
+
+    def _ancova(self, var):
+        """ancova_batch-style F, p, partial eta-squared and n arrays from the Gram matrices"""
+        grams = self.grams[var]
+        n_levels = len(self.levels[var])
+        n_cov = len(self.covariate_cols)
+        k = len(self.outcome_cols)
+        f_vals = np.full((1 + n_cov, k), np.nan)
+        p_vals = np.full((1 + n_cov, k), np.nan)
+        np2 = np.full((1 + n_cov, k), np.nan)
+        n_used = np.rint(grams[:, 0, 0]).astype(int)
+        for j in range(k):
+            if n_used[j] <= n_cov + 2:
+                continue
+            f, p, e = _type2_from_gram(grams[j], n_used[j], n_levels, n_cov)
+            f_vals[:, j], p_vals[:, j], np2[:, j] = f, p, e
+        return {'F': f_vals, 'p_value': p_vals, 'partial_eta_sq': np2, 'n': n_used}
+
+    def results(self):
+        """(t_test_df, anova_df) in the format of perform_statistical_analysis"""
+        t_test_results = []
+        for var in self.binary_vars:
+            if len(self.order.get(var, [])) != 2:
+                continue
+            groups = [self.levels[var][c] for c in self.order[var]]
+            t_test_results.extend(_ttest_records(var, groups, self.outcome_cols, self._ttest(var)))
+        anova_results = []
+        for var in self.independent_vars:
+            anova_results.extend(_grouped_ancova_records(var, self.outcome_cols, self.covariate_cols,
+                                                         self._ancova(var)))
+        apply_fdr(t_test_results, anova_results)
+        return pd.DataFrame(t_test_results), pd.DataFrame(anova_results)
+
+def _type2_from_gram(gram, n, n_levels, n_cov):
+    """
+    Type II F, p and partial eta-squared of the main effect and each covariate
+    from an augmented Gram matrix [X, y]'[X, y], X = [1, one-hot levels, covariates].
+    The design matches ancova_batch: one dummy per observed level after the
+    first. Columns that are all zero in these rows (unobserved covariate
+    levels) are aliased: their terms are NaN and they do not count toward the
+    residual degrees of freedom, as in the lstsq refit. As in ancova_batch, a
+    single observed level, a saturated model and a constant or exactly fitted
+    outcome give NaN effects.
+    """
+    level_cols = [1 + l for l in range(n_levels) if gram[1 + l, 1 + l] > 0]
+    cov_cols = list(range(1 + n_levels, 1 + n_levels + n_cov))
+    terms = [level_cols[1:]] + [[c] for c in cov_cols]
+    f_vals = np.full(len(terms), np.nan)
+    p_vals = np.full(len(terms), np.nan)
+    np2 = np.full(len(terms), np.nan)
+    yty = gram[-1, -1]
+    tss = yty - gram[0, -1] ** 2 / n
+    # The outcome is shifted close to its mean, so a constant one leaves only
+    # rounding in tss
+    if len(level_cols) < 2 or tss <= yty * EXACT_FIT_TOL:
+        return f_vals, p_vals, np2
+    live = [cols if all(gram[c, c] > 0 for c in cols) else [] for cols in terms]
+    x_cols = [0] + [c for cols in live for c in cols]
+    xtx = gram[np.ix_(x_cols, x_cols)]
+    xty = gram[x_cols, -1]
+    rank = np.linalg.matrix_rank(xtx, hermitian=True)
+    if live[0] and rank == len(x_cols):
+        xtx_inv = np.linalg.inv(xtx)
+        beta = xtx_inv @ xty
+        rss = np.atleast_1d(yty - xty @ beta)
+        if n == len(x_cols) or rss[0] <= tss * EXACT_FIT_TOL:
+            return f_vals, p_vals, np2
+        slices, pos = [], 1
+        for cols in live:
+            slices.append(slice(pos, pos + len(cols)))
+            pos += len(cols)
+        keep = [t for t, cols in enumerate(live) if cols]
+        f, p, e = _type2_effects(xtx_inv, beta[:, None], rss, n - len(x_cols), [slices[t] for t in keep])
+        f_vals[keep], p_vals[keep], np2[keep] = f[:, 0], p[:, 0], e[:, 0]
+        return f_vals, p_vals, np2
+
+    # Rank deficient: refit each reduced model from the normal equations
+    from scipy import stats
+
+    def fit_rss(cols):
+        sub = gram[np.ix_(cols, cols)]
+        coef = np.linalg.pinv(sub, hermitian=True) @ gram[cols, -1]
+        return yty - gram[cols, -1] @ coef, np.linalg.matrix_rank(sub, hermitian=True)
+
+    rss, rank = fit_rss(x_cols)
+    df_resid = n - rank
+    if df_resid <= 0 or rss <= tss * EXACT_FIT_TOL:
+        return f_vals, p_vals, np2
+    for t, cols in enumerate(live):
+        if not cols:
+            continue
+        reduced_rss, reduced_rank = fit_rss([c for c in x_cols if c not in cols])
+        df_term = rank - reduced_rank
+        if df_term == 0:
+            continue
+        ss = reduced_rss - rss
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f_vals[t] = (ss / df_term) / (rss / df_resid)
+            np2[t] = ss / (ss + rss)
+        p_vals[t] = stats.f.sf(f_vals[t], df_term, df_resid)
+    return f_vals, p_vals, np2
+
+def _prefix_digest(path, n_bytes):
+    """SHA-256 of the first n_bytes of a file"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = n_bytes
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+def _inputs_digest(var_def_path):
+    """Digest of the definitions and the modules the statistics are computed by"""
+    h = hashlib.sha256(file_digest(var_def_path).encode())
+    for name in STATE_SOURCES:
+        h.update(file_digest(Path(__file__).parent / name).encode())
+    return h.hexdigest()
+
+def load_state(state_path=STATE_PATH):
+    """Saved state dict, or None if there is none"""
+    try:
+        with open(state_path, 'rb') as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+def save_state(state, state_path=STATE_PATH):
+    state_path = Path(state_path)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix(".tmp")
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, state_path)
+
+def update_statistics(data_path, var_def_path, var_defs, state_path=STATE_PATH, force=False):
+    """
+    Bring the saved sufficient statistics up to date with data_path and save them.
+
+    Only the bytes appended to the data file since the last update are parsed.
+    The statistics are rebuilt from the whole file when there is no saved
+    state, with force, or when the previously read part of the file, the
+    definitions or the analysis code changed.
+    Returns (SufficientStatistics, new rows folded into the statistics, rebuilt).
+    """
+    data_path = Path(data_path)
+    size = data_path.stat().st_size
+    inputs = _inputs_digest(var_def_path)
+    state = None if force else load_state(state_path)
+    if (state is not None and state['inputs'] == inputs and state['offset'] <= size
+            and _prefix_digest(data_path, state['offset']) == state['digest']):
+        stats, offset, rebuilt = state['stats'], state['offset'], False
+    else:
+        stats, offset, rebuilt = SufficientStatistics(var_defs), 0, True
+
+    added = 0
+    if size > offset:
+        with open(data_path, 'rb') as f:
+            header = f.readline()
+            f.seek(max(offset, len(header)))
+            tail = f.read(size - max(offset, len(header)))
+        if tail.strip():
+            new_rows = pd.read_csv(io.BytesIO(header + b"\n" + tail), sep='\t')
+            processed = process_data(new_rows, var_defs)
+            stats.update(processed)
+            # Rows dropped by process_data (e.g. failed inclusion criteria) are not counted
+            added = len(processed)
+    save_state({'inputs': inputs, 'offset': size, 'digest': _prefix_digest(data_path, size), 'stats': stats},
+               state_path)
+    return stats, added, rebuilt
+
+if __name__ == "__main__":
+    from scripts.data_loader import load_variable_definitions
+
+    data_dir = Path(__file__).parent.parent / "data"
+    stats, added, rebuilt = update_statistics(data_dir / "data.tsv", data_dir / "variable_definitions.json",
+                                              load_variable_definitions())
+    print(f"{'Rebuilt' if rebuilt else 'Updated'} sufficient statistics: {added} new row(s), {stats.n_rows} total")
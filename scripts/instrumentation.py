@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+def _max_rss_bytes():
+    """Peak resident set size of this process so far (0 if unavailable)"""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+class Tracer:
+    """
+    Collects timing spans for one pipeline run.
+
+    Each span records wall time, CPU time of the calling thread, the growth of
+    the process peak RSS and, with memory=True, the tracemalloc change in
+    current and peak traced memory. Memory figures are process-wide, so spans
+    running concurrently in other threads are included in them.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.spans = []
+        self.epoch = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name, cat="unit", **args):
+        """Time the enclosed block; extra details can be added to the yielded dict"""
+        args = dict(args)
+        rss0 = _max_rss_bytes()
+        mem0 = tracemalloc.get_traced_memory() if self.memory else None
+        cpu0 = time.thread_time()
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            wall = time.perf_counter() - start
+            record = {
+                'name': name,
+                'cat': cat,
+                'start': start - self._t0,
+                'wall': wall,
+                'cpu': time.thread_time() - cpu0,
+                'peak_rss_delta': _max_rss_bytes() - rss0,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            }
+            if mem0 is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                record['alloc_delta'] = current - mem0[0]
+                record['alloc_peak_delta'] = peak - mem0[1]
+            with self._lock:
+                self.spans.append(record)
+
+    def add(self, name, cat, measured, **args):
+        """Record a span measured elsewhere (e.g. in a worker process) by measure()"""
+        record = dict(measured, name=name, cat=cat, args=args)
+        record['start'] = measured['epoch_start'] - self.epoch
+        del record['epoch_start']
+        with self._lock:
+            self.spans.append(record)
+
+    def to_json(self):
+        return {'epoch': self.epoch, 'memory': self.memory,
+                'spans': sorted(self.spans, key=lambda s: s['start'])}
+
+    def to_chrome_trace(self):
+        """Chrome trace-event format (load in chrome://tracing or ui.perfetto.dev)"""
+        events = []
+        for s in sorted(self.spans, key=lambda s: s['start']):
+            args = dict(s['args'])
+            args.update({k: s[k] for k in ('cpu', 'peak_rss_delta', 'alloc_delta', 'alloc_peak_delta') if k in s})
+            events.append({
+                'name': s['name'], 'cat': s['cat'], 'ph': 'X',
+                'ts': s['start'] * 1e6, 'dur': s['wall'] * 1e6,
+                'pid': s['pid'], 'tid': s['tid'], 'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, out_dir):
+        """Write trace.json and chrome_trace.json to out_dir"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / "trace.json", "w") as f:
+            json.dump(self.to_json(), f, indent=1, default=str)
+        with open(out_dir / "chrome_trace.json", "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+# Active tracer for the current run; None disables all spans
+_tracer = None
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer
+
+def get_tracer():
+    return _tracer
+
+@contextmanager
+def span(name, cat="unit", **args):
+    """Span on the active tracer, or a no-op when tracing is off"""
+    if _tracer is None:
+        yield dict(args)
+        return
+    with _tracer.span(name, cat, **args) as info:
+        yield info
+
+def measure(fn, *args):
+    """
+    Call fn(*args) and return (result, timing) for Tracer.add; used in worker
+    processes, where the parent's tracer is not available.
+    """
+    epoch_start = time.time()
+    rss0 = _max_rss_bytes()
+    cpu0 = time.thread_time()
+    start = time.perf_counter()
+    result = fn(*args)
+    timing = {
+        'epoch_start': epoch_start,
+        'wall': time.perf_counter() - start,
+        'cpu': time.thread_time() - cpu0,
+        'peak_rss_delta': _max_rss_bytes() - rss0,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+    }
+    return result, timing
+
+def summarize_spans(spans, cat):
+    """Total wall and CPU seconds and call count per span name in a category"""
+    totals = {}
+    for s in spans:
+        if s['cat'] == cat:
+            t = totals.setdefault(s['name'], {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+            t['calls'] += 1
+            t['wall'] += s['wall']
+            t['cpu'] += s['cpu']
+    return totals
+
+def compare_runs(previous, current, cat="stage", threshold=0.2):
+    """
+    Lines describing per-name wall time changes between two trace.json dicts,
+    flagging names that got slower by more than ``threshold`` (fraction).
+    """
+    before = summarize_spans(previous['spans'], cat)
+    after = summarize_spans(current['spans'], cat)
+    lines = []
+    for name, t in after.items():
+        if name not in before:
+            continue
+        old, new = before[name]['wall'], t['wall']
+        change = (new - old) / old if old > 0 else 0.0
+        flag = "  <-- slower" if change > threshold and new - old > 0.05 else ""
+        lines.append(f"  {name:<14} {old:8.3f}s -> {new:8.3f}s ({change:+.0%}){flag}")
+    return lines
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pandas as pd
+
+class UniqueSketch:
+    """
+    Distinct-value counter: exact up to k distinct values, then a k-minimum-values
+    (KMV) estimate from the k smallest 64-bit value hashes.
+    """
+
+    def __init__(self, k=4096):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        values = np.asarray(values)
+        if values.dtype.kind in 'biuf':
+            values = values.astype(float)  # 1 and 1.0 are the same value
+        else:
+            values = values.astype(str).astype(object)
+        hashed = pd.util.hash_array(values)
+        merged = np.union1d(self.hashes, hashed)
+        self.hashes = merged[:self.k]
+
+    def estimate(self):
+        if len(self.hashes) < self.k:
+            return len(self.hashes)
+        kth = float(self.hashes[-1]) / 2.0 ** 64
+        return int(round((self.k - 1) / kth))
+
+class QuantileSketch:
+    """
+    Approximate quantiles from a bottom-k sample: each value gets a random priority
+    and the m values with the smallest priorities are kept, which is a uniform
+    sample without replacement of everything seen so far.
+    """
+
+    def __init__(self, m=10000, seed=0):
+        self.m = m
+        self.rng = np.random.default_rng(seed)
+        self.values = np.empty(0)
+        self.priorities = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        values = np.concatenate([self.values, values])
+        priorities = np.concatenate([self.priorities, self.rng.random(len(values) - len(self.values))])
+        if len(values) > self.m:
+            keep = np.argpartition(priorities, self.m)[:self.m]
+            values, priorities = values[keep], priorities[keep]
+        self.values, self.priorities = values, priorities
+
+    def quantile(self, q):
+        if len(self.values) == 0:
+            return np.nan
+        return float(np.quantile(self.values, q))
+
+class ColumnAccumulator:
+    """
+    Single-pass summary of one column fed chunk by chunk: row and missing counts,
+    value counts, distinct-value sketch and, for numeric columns, Welford/Chan
+    mean and variance, min/max and a quantile sketch.
+    """
+
+    def __init__(self, max_tracked=10000):
+        self.max_tracked = max_tracked
+        self.dtype = None
+        self.rows = 0
+        self.missing = 0
+        self.counts = pd.Series(dtype=float)
+        self.counts_exact = True
+        self.uniques = UniqueSketch()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.quantiles = QuantileSketch()
+
+    @property
+    def is_numeric(self):
+        return (self.dtype is not None and pd.api.types.is_numeric_dtype(self.dtype)
+                and not isinstance(self.dtype, pd.CategoricalDtype))
+
+    def update(self, series):
+        if self.dtype is None or (self.rows - self.missing == 0 and series.notna().any()):
+            self.dtype = series.dtype
+        self.rows += len(series)
+        present = series.dropna()
+        self.missing += len(series) - len(present)
+
+        chunk_counts = present.value_counts()
+        self.counts = self.counts.add(chunk_counts.astype(float), fill_value=0)
+        if len(self.counts) > self.max_tracked:
+            # Keep the heaviest values only; counts become approximate
+            self.counts = self.counts.nlargest(self.max_tracked)
+            self.counts_exact = False
+        self.uniques.update(chunk_counts[chunk_counts > 0].index.to_numpy())
+
+        if self.is_numeric and len(present):
+            values = present.to_numpy(dtype=float)
+            n_b = len(values)
+            mean_b = values.mean()
+            m2_b = ((values - mean_b) ** 2).sum()
+            n = self.n + n_b
+            delta = mean_b - self.mean
+            self.mean += delta * n_b / n
+            self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+            self.n = n
+            self.min = np.nanmin([self.min, values.min()])
+            self.max = np.nanmax([self.max, values.max()])
+            self.quantiles.update(values)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    def describe(self):
+        """Same index as pandas Series.describe() for a numeric column"""
+        return pd.Series({
+            'count': float(self.n),
+            'mean': self.mean if self.n else np.nan,
+            'std': np.sqrt(self.var),
+            'min': self.min,
+            '25%': self.quantiles.quantile(0.25),
+            '50%': self.quantiles.quantile(0.5),
+            '75%': self.quantiles.quantile(0.75),
+            'max': self.max,
+        })
+
+    def value_counts(self):
+        counts = self.counts.sort_values(ascending=False, kind='stable').astype(int)
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            counts = counts.reindex(self.dtype.categories, fill_value=0).sort_values(ascending=False, kind='stable')
+        return counts.rename('count')
+
+def accumulate_chunks(chunks):
+    """
+    Feed an iterable of DataFrame chunks through one ColumnAccumulator per column.
+    Returns (accumulators dict in column order, total row count).
+    """
+    accumulators = {}
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        for col in chunk.columns:
+            accumulators.setdefault(col, ColumnAccumulator()).update(chunk[col])
+    return accumulators, total
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.statistical_analysis import stratified_weights, bootstrap_ci
+
+# Bootstrap resamples for the reliability confidence intervals
+RELIABILITY_BOOT = 1000
+# Upper bound on resamples x rows x items elements held at once
+RELIABILITY_BUDGET = 8_000_000
+# Principal-axis iterations for the one-factor loadings behind omega
+PAF_MAX_ITER = 200
+PAF_TOL = 1e-10
+
+def item_matrix(df, items):
+    """Numeric item responses as a float array (non-numeric answers become NaN)"""
+    return np.column_stack([pd.to_numeric(df[q], errors='coerce').to_numpy(dtype=float) for q in items])
+
+def one_factor_loadings(corr):
+    """
+    Standardized one-factor loadings by iterated principal-axis factoring for
+    a stack of correlation matrices (..., k, k). Communalities start at the
+    squared multiple correlations; each iteration takes the leading
+    eigenvector of the reduced matrix by a warm-started power step, so the
+    stack is solved with batched matrix-vector products instead of one
+    eigendecomposition per matrix. Communalities are capped just below 1
+    (Heywood cases).
+    """
+    k = corr.shape[-1]
+    diag = np.arange(k)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inv_diag = np.diagonal(np.linalg.pinv(corr, hermitian=True), axis1=-2, axis2=-1)
+        h = np.clip(1.0 - 1.0 / inv_diag, 0.0, 0.995)
+    h = np.nan_to_num(h)
+    reduced = corr.copy()
+    v = np.full(corr.shape[:-1] + (1,), 1.0 / np.sqrt(k))
+    for _ in range(PAF_MAX_ITER):
+        reduced[..., diag, diag] = h
+        rv = reduced @ v
+        eigval = (v * rv).sum(axis=(-2, -1))
+        v = rv / np.sqrt((rv * rv).sum(axis=-2, keepdims=True))
+        loadings = v[..., 0] * np.sqrt(np.maximum(eigval, 0.0))[..., None]
+        h_new = np.minimum(loadings ** 2, 0.995)
+        done = np.nanmax(np.abs(h_new - h)) < PAF_TOL if h.size else True
+        h = h_new
+        if done:
+            break
+    # Orient so the loadings sum to a positive number
+    sign = np.where(loadings.sum(axis=-1, keepdims=True) < 0, -1.0, 1.0)
+    return loadings * sign
+
+def reliability_from_covariance(cov):
+    """
+    Reliability statistics for a stack of item covariance matrices (..., k, k),
+    all derived from the matrix itself rather than by refitting without each item:
+
+    - Cronbach's alpha = k/(k-1) (1 - tr C / 1'C1);
+    - alpha if item i is deleted, from tr C - C_ii and 1'C1 - 2(C1)_i + C_ii;
+    - corrected item-total correlation, cov(x_i, total - x_i) = (C1)_i - C_ii
+      over sqrt(C_ii var(total - x_i));
+    - McDonald's omega (total) from standardized one-factor loadings,
+      (sum l)^2 / ((sum l)^2 + sum(1 - l^2)).
+
+    Returns a dict of arrays: alpha and omega (...), item_total_r,
+    alpha_if_deleted and loadings (..., k).
+    """
+    k = cov.shape[-1]
+    item_var = np.diagonal(cov, axis1=-2, axis2=-1)
+    row_sum = cov.sum(axis=-1)
+    total_var = row_sum.sum(axis=-1)
+    trace = item_var.sum(axis=-1)
+    rest_var = total_var[..., None] - 2 * row_sum + item_var
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alpha = k / (k - 1) * (1 - trace / total_var)
+        alpha_if_deleted = ((k - 1) / (k - 2) * (1 - (trace[..., None] - item_var) / rest_var)
+                            if k > 2 else np.full(cov.shape[:-1], np.nan))
+        item_total_r = (row_sum - item_var) / np.sqrt(item_var * rest_var)
+        sd = np.sqrt(item_var)
+        corr = cov / (sd[..., :, None] * sd[..., None, :])
+    loadings = one_factor_loadings(np.nan_to_num(corr)) if k > 1 else np.full(cov.shape[:-1], np.nan)
+    common = loadings.sum(axis=-1) ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        omega = common / (common + (1 - loadings ** 2).sum(axis=-1))
+    return {'alpha': alpha, 'omega': omega, 'item_total_r': item_total_r,
+            'alpha_if_deleted': alpha_if_deleted, 'loadings': loadings}
+
+def bootstrap_covariances(x, start, stop, seed, stream=()):
+    """
+    Item covariance matrices ((stop - start) x k x k) of bootstrap resamples
+    [start, stop) of the rows of x. Each block of resamples is a matrix of case
+    weights, and its covariances come from one batched product X' W X.
+    """
+    n, k = x.shape
+    xc = x - x.mean(axis=0)
+    covs = np.empty((stop - start, k, k))
+    block = int(max(1, RELIABILITY_BUDGET // max(n * k, 1)))
+    for b in range(start, stop, block):
+        m = min(b + block, stop) - b
+        rng = np.random.default_rng([seed, *stream, b])
+        w = stratified_weights([np.arange(n)], n, m, rng)
+        mean = w @ xc / n
+        scatter = (w[:, :, None] * xc[None, :, :]).transpose(0, 2, 1) @ xc
+        covs[b - start:b - start + m] = (scatter - n * mean[:, :, None] * mean[:, None, :]) / (n - 1)
+    return covs
+
+def scale_reliability(x, n_boot=RELIABILITY_BOOT, seed=0, stream=(), ci_level=0.95):
+    """
+    Reliability of one scale from its (rows x items) responses; rows with any
+    missing item are dropped. Point estimates come from the sample covariance
+    matrix; percentile bootstrap intervals from n_boot resampled covariance
+    matrices passed through the same formulas at once.
+    """
+    x = x[~np.isnan(x).any(axis=1)]
+    n, k = x.shape
+    result = {'n': n, 'k': k}
+    if n < 3 or k < 2:
+        nan_items = np.full(k, np.nan)
+        result.update({'alpha': np.nan, 'omega': np.nan, 'item_total_r': nan_items,
+                       'alpha_if_deleted': nan_items, 'loadings': nan_items})
+        for name in ('alpha', 'omega', 'item_total_r'):
+            result[f'{name}_ci'] = (np.full(np.shape(result[name]), np.nan),) * 2
+        return result
+    result.update(reliability_from_covariance(np.cov(x, rowvar=False)))
+    boot = reliability_from_covariance(bootstrap_covariances(x, 0, n_boot, seed, stream)) if n_boot else None
+    for name in ('alpha', 'omega', 'item_total_r'):
+        if boot is None:
+            result[f'{name}_ci'] = (np.full(np.shape(result[name]), np.nan),) * 2
+            continue
+        samples = boot[name].reshape(n_boot, -1)
+        low, high = bootstrap_ci(samples, np.ravel(result[name]), None, ci_level, "percentile")
+        shape = np.shape(result[name])
+        result[f'{name}_ci'] = (low.reshape(shape), high.reshape(shape))
+    return result
+
+def perform_psychometric_analysis(df, var_defs, n_boot=RELIABILITY_BOOT, seed=0, results_dir=None):
+    """
+    Cronbach's alpha, McDonald's omega, corrected item-total correlations and
+    alpha-if-item-deleted for every question group and for the total scale
+    (all grouped items), with bootstrap confidence intervals.
+    Returns {'scales': DataFrame, 'items': DataFrame} and, with results_dir,
+    writes them to reliability.csv and item_statistics.csv.
+    """
+    groups = dict(var_defs.get('question_groups', {}))
+    if len(groups) > 1:
+        groups['Total'] = [q for items in var_defs['question_groups'].values() for q in items]
+    scale_rows = []
+    item_rows = []
+    for s, (scale, items) in enumerate(groups.items()):
+        present = [q for q in items if q in df.columns]
+        if len(present) < 2:
+            print(f"Skipping reliability of {scale}: fewer than two of its items are in the data")
+            continue
+        res = scale_reliability(item_matrix(df, present), n_boot=n_boot, seed=seed, stream=(s,))
+        scale_rows.append({
+            'Scale': scale,
+            'Items': res['k'],
+            'N': res['n'],
+            'Cronbachs_alpha': float(res['alpha']),
+            'alpha_CI_low': float(res['alpha_ci'][0]),
+            'alpha_CI_high': float(res['alpha_ci'][1]),
+            'McDonalds_omega': float(res['omega']),
+            'omega_CI_low': float(res['omega_ci'][0]),
+            'omega_CI_high': float(res['omega_ci'][1]),
+            'n_boot': n_boot,
+            'bootstrap_seed': seed,
+        })
+        for i, item in enumerate(present):
+            item_rows.append({
+                'Scale': scale,
+                'Item': item,
+                'item_total_r': res['item_total_r'][i],
+                'r_CI_low': res['item_total_r_ci'][0][i],
+                'r_CI_high': res['item_total_r_ci'][1][i],
+                'alpha_if_deleted': res['alpha_if_deleted'][i],
+                'loading': res['loadings'][i],
+            })
+    scales = pd.DataFrame(scale_rows)
+    item_stats = pd.DataFrame(item_rows)
+    if results_dir is not None:
+        results_dir = Path(results_dir)
+        results_dir.mkdir(parents=True, exist_ok=True)
+        scales.to_csv(results_dir / "reliability.csv", index=False)
+        item_stats.to_csv(results_dir / "item_statistics.csv", index=False)
+    return {'scales': scales, 'items': item_stats}
+
+if __name__ == "__main__":
+    from scripts.data_loader import load_data
+    df, var_defs = load_data()
+    results = perform_psychometric_analysis(df, var_defs)
+    print(results['scales'].to_markdown(index=False))
+    print(results['items'].to_markdown(index=False))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import sys
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.linalg import qr, solve_triangular
+from pathlib import Path
+from statsmodels.stats.multitest import multipletests
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.data_loader import get_outcome_variables, get_variables_by_type
+from scripts.statistical_analysis import covariate_frame
+
+COV_TYPES = ("nonrobust", "HC3")
+# Upper bound on rows x coefficient pairs elements held at once for HC3
+REGRESSION_BUDGET = 8_000_000
+# 1 - leverage below which a row counts as fitted exactly
+LEVERAGE_TOL = 1e-10
+
+def _robust_covariances(q, r_inv, weights):
+    """
+    Sandwich covariance matrices R^-1 Q' diag(w_j) Q R^-T (k x p x p) for every
+    column w_j of weights (n x k), where X = QR. The middle matrices for all
+    outcomes come from one product of the pairwise column products of Q with
+    the weights, in row blocks of at most REGRESSION_BUDGET elements.
+    """
+    p = q.shape[1]
+    k = weights.shape[1]
+    pi, pj = np.triu_indices(p)
+    middle = np.zeros((len(pi), k))
+    block = int(max(1, REGRESSION_BUDGET // max(len(pi), 1)))
+    for start in range(0, len(q), block):
+        qb = q[start:start + block]
+        middle += (qb[:, pi] * qb[:, pj]).T @ weights[start:start + block]
+    meat = np.empty((k, p, p))
+    meat[:, pi, pj] = middle.T
+    meat[:, pj, pi] = middle.T
+    return r_inv @ meat @ r_inv.T
+
+def ols_batch(x, y, cov_type="nonrobust"):
+    """
+    OLS of every column of ``y`` (n x k) on the design ``x`` (n x p, complete,
+    constant in column 0).
+
+    Rows missing an outcome are dropped for that outcome only. Outcomes that
+    share a missingness pattern are solved together from one pivoted QR of
+    their rows of x, so k outcomes cost about one fit. Columns aliased with
+    earlier ones get NaN coefficients. With cov_type="HC3", the standard errors
+    are MacKinnon-White HC3 from the sandwich (X'X)^-1 X' diag(e^2 / (1 - h)^2) X (X'X)^-1,
+    formed for all outcomes by matrix products; coefficients determined by a
+    row with leverage 1 get NaN HC3 standard errors. The model F is the Wald
+    test that all non-constant coefficients (with a defined variance) are zero
+    under the chosen covariance, which is the classical F for "nonrobust" (as
+    in statsmodels).
+
+    Returns coefficient arrays beta, se, t and p_value (p x k) and per-outcome
+    arrays n, df_resid, r_squared, adj_r_squared, F, F_p_value, aic and bic.
+    """
+    if cov_type not in COV_TYPES:
+        raise ValueError(f"cov_type must be one of {', '.join(COV_TYPES)}, not {cov_type!r}")
+    n_rows, p = x.shape
+    k = y.shape[1]
+    out = {name: np.full((p, k), np.nan) for name in ('beta', 'se', 't', 'p_value')}
+    out.update({name: np.full(k, np.nan) for name in ('df_resid', 'r_squared', 'adj_r_squared',
+                                                       'F', 'F_p_value', 'aic', 'bic')})
+    out['n'] = np.zeros(k, dtype=int)
+
+    masks = ~np.isnan(y)
+    patterns = {}
+    for j in range(k):
+        patterns.setdefault(masks[:, j].tobytes(), []).append(j)
+
+    for cols in patterns.values():
+        rows = masks[:, cols[0]]
+        n = int(rows.sum())
+        out['n'][cols] = n
+        xr = x[rows]
+        yy = y[np.ix_(rows, cols)]
+        q, r, piv = qr(xr, mode='economic', pivoting=True)
+        diag = np.abs(np.diag(r))
+        rank = int((diag > diag[0] * max(xr.shape) * np.finfo(float).eps).sum()) if len(diag) else 0
+        df_resid = n - rank
+        if df_resid <= 0:
+            continue
+        keep = piv[:rank]
+        q, r = q[:, :rank], r[:rank, :rank]
+        beta = solve_triangular(r, q.T @ yy)
+        resid = yy - q @ (q.T @ yy)
+        rss = (resid ** 2).sum(axis=0)
+        r_inv = solve_triangular(r, np.eye(rank))
+        if cov_type == "HC3":
+            leverage = (q ** 2).sum(axis=1)
+            # A row with leverage 1 (e.g. the only respondent in a category) is
+            # fitted exactly and 0/0 in HC3: the variance of any coefficient that
+            # row determines is undefined, the others do not depend on it
+            exact = 1 - leverage < LEVERAGE_TOL
+            weights = resid ** 2 / np.where(exact, 1.0, 1 - leverage)[:, None] ** 2
+            weights[exact] = 0.0
+            cov = _robust_covariances(q, r_inv, weights)
+            if exact.any():
+                a = r_inv @ q.T
+                scale = np.abs(a).max(axis=1)
+                undefined = np.abs(a[:, exact]).max(axis=1) > np.sqrt(np.finfo(float).eps) * scale
+                cov[:, undefined, :] = np.nan
+                cov[:, :, undefined] = np.nan
+        else:
+            cov = (r_inv @ r_inv.T)[None, :, :] * (rss / df_resid)[:, None, None]
+        se = np.sqrt(np.diagonal(cov, axis1=1, axis2=2)).T
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = beta / se
+            tss = ((yy - yy.mean(axis=0)) ** 2).sum(axis=0)
+            r2 = 1 - rss / tss
+            adj_r2 = 1 - (1 - r2) * (n - 1) / df_resid
+            llf = -n / 2 * (np.log(2 * np.pi) + np.log(rss / n) + 1)
+            # Wald F over the identified non-constant coefficients
+            slopes = np.flatnonzero((keep != 0) & np.isfinite(se).all(axis=1))
+            if len(slopes):
+                b = beta[slopes].T
+                v = cov[np.ix_(np.arange(len(cols)), slopes, slopes)]
+                f = np.einsum('ki,ki->k', b, np.linalg.solve(v, b[:, :, None])[:, :, 0]) / len(slopes)
+                f_p = stats.f.sf(f, len(slopes), df_resid)
+            else:
+                f = f_p = np.full(len(cols), np.nan)
+
+        out['beta'][np.ix_(keep, cols)] = beta
+        out['se'][np.ix_(keep, cols)] = se
+        out['t'][np.ix_(keep, cols)] = t
+        out['p_value'][np.ix_(keep, cols)] = 2 * stats.t.sf(np.abs(t), df_resid)
+        out['df_resid'][cols] = df_resid
+        out['r_squared'][cols] = r2
+        out['adj_r_squared'][cols] = adj_r2
+        out['F'][cols] = f
+        out['F_p_value'][cols] = f_p
+        out['aic'][cols] = -2 * llf + 2 * rank
+        out['bic'][cols] = -2 * llf + rank * np.log(n)
+    return out
+
+def regression_design(df, var_defs, predictors=None):
+    """
+    Design matrix for the regressions: a constant plus the independent and
+    demographic variables (or the given predictors), categorical ones one-hot
+    encoded with the first level as reference. Returns (x, term names, mask of
+    rows with every predictor present); x holds only those rows.
+    """
+    if predictors is None:
+        predictors = (get_variables_by_type(var_defs, 'independent')
+                      + get_variables_by_type(var_defs, 'demographic'))
+    predictors = [p for p in predictors if p in df.columns]
+    complete = ~df[predictors].isna().any(axis=1).to_numpy()
+    design = covariate_frame(df, predictors)
+    x = np.column_stack([np.ones(int(complete.sum())), design.to_numpy(dtype=float)[complete]])
+    return x, ['Intercept'] + list(design.columns), complete
+
+def perform_regression_analysis(df, var_defs, predictors=None, cov_type="nonrobust", results_dir=None):
+    """
+    OLS regression of every outcome on the metadata-driven predictor set,
+    solved for all outcomes at once by ols_batch.
+
+    Returns (coefficients, models): one row per outcome and term with the
+    coefficient, standard error, t, raw and FDR-adjusted p-values (one
+    Benjamini-Hochberg family over all non-intercept coefficients; p_value is
+    the adjusted value, as in the t-test and ANCOVA frames), and one row per
+    outcome with n, R², adjusted R², the model F, AIC and BIC. With
+    results_dir, writes regression_coefficients.csv and regression_models.csv.
+    """
+    outcome_cols = get_outcome_variables(var_defs)
+    x, terms, complete = regression_design(df, var_defs, predictors)
+    y = df[outcome_cols].to_numpy(dtype=float)[complete]
+    fit = ols_batch(x, y, cov_type=cov_type)
+
+    n_terms, n_outcomes = len(terms), len(outcome_cols)
+    coefficients = pd.DataFrame({
+        'Variable': np.tile(terms, n_outcomes),
+        'Outcome': np.repeat(outcome_cols, n_terms),
+        'Coefficient': fit['beta'].T.ravel(),
+        'Std_Error': fit['se'].T.ravel(),
+        't_statistic': fit['t'].T.ravel(),
+        'dof': np.repeat(fit['df_resid'], n_terms),
+        'raw_p_value': fit['p_value'].T.ravel(),
+        'SE_type': cov_type,
+        'Analysis_Type': 'OLS',
+    })
+    # The intercepts are not hypotheses of interest and stay out of the FDR family
+    family = (coefficients['Variable'] != 'Intercept') & coefficients['raw_p_value'].notna()
+    coefficients['adj_p_value'] = np.nan
+    if family.any():
+        coefficients.loc[family, 'adj_p_value'] = multipletests(coefficients.loc[family, 'raw_p_value'],
+                                                                method='fdr_bh')[1]
+    coefficients['p_value'] = coefficients['adj_p_value'].fillna(coefficients['raw_p_value'])
+    coefficients = coefficients[coefficients['Coefficient'].notna()].reset_index(drop=True)
+
+    models = pd.DataFrame({
+        'Outcome': outcome_cols,
+        'n': fit['n'],
+        'Predictors': n_terms - 1,
+        'R_squared': fit['r_squared'],
+        'Adj_R_squared': fit['adj_r_squared'],
+        'F_statistic': fit['F'],
+        'F_p_value': fit['F_p_value'],
+        'AIC': fit['aic'],
+        'BIC': fit['bic'],
+        'SE_type': cov_type,
+    })
+    if results_dir is not None:
+        results_dir = Path(results_dir)
+        results_dir.mkdir(parents=True, exist_ok=True)
+        coefficients.to_csv(results_dir / "regression_coefficients.csv", index=False)
+        models.to_csv(results_dir / "regression_models.csv", index=False)
+    return coefficients, models
+
+if __name__ == "__main__":
+    from scripts.data_loader import load_data
+    df, var_defs = load_data()
+    coefficients, models = perform_regression_analysis(df, var_defs, cov_type="HC3")
+    print(models.to_markdown(index=False))
+    print(coefficients[coefficients['p_value'] < 0.05].to_markdown(index=False))
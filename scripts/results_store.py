@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+RESULTS_DB = project_root / "results" / "results.sqlite"
+# Analysis modules whose results a stored run holds
+STORE_SOURCES = ("data_loader.py", "validation.py", "statistical_analysis.py", "regression.py",
+                 "psychometrics.py", "results_store.py")
+
+# Test families and the columns holding their statistic and effect size
+FAMILIES = {
+    't-test': ('t_statistic', 'Cohens_d'),
+    'ANCOVA': ('F_statistic', 'partial_eta_squared'),
+    'ANCOVA covariate': ('F', 'partial_eta_sq'),
+    'regression': ('t_statistic', 'Coefficient'),
+    'regression model': ('F_statistic', 'R_squared'),
+    'reliability': (None, 'Cronbachs_alpha'),
+    'item reliability': (None, 'item_total_r'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    inputs TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created TEXT NOT NULL,
+    UNIQUE (inputs, params)
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    family TEXT NOT NULL,
+    variable TEXT,
+    outcome TEXT,
+    term TEXT,
+    statistic REAL,
+    dof REAL,
+    raw_p_value REAL,
+    adj_p_value REAL,
+    effect_size REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, family, variable, outcome);
+CREATE INDEX IF NOT EXISTS results_variable ON results (variable, outcome);
+CREATE INDEX IF NOT EXISTS results_outcome ON results (outcome);
+CREATE INDEX IF NOT EXISTS results_family ON results (family, run_id);
+"""
+
+def inputs_digest(data_path, var_def_path):
+    """Digest of the data, definitions and analysis code behind a run"""
+    from scripts.cache import file_digest
+    h = hashlib.sha256()
+    for path in [data_path, var_def_path] + [Path(__file__).parent / m for m in STORE_SOURCES]:
+        h.update(file_digest(path).encode())
+    return h.hexdigest()[:16]
+
+def _json_default(value):
+    # numpy scalars and other values pandas leaves in records
+    return value.item() if hasattr(value, 'item') else str(value)
+
+def _number(value):
+    return None if value is None or value != value else float(value)
+
+class ResultsStore:
+    """
+    Statistical results of every run in one SQLite file, in long format: one
+    row per test (t-test, ANCOVA main effect, ANCOVA covariate, regression
+    coefficient and model, scale and item reliability) with its family,
+    variable, outcome and term, the common statistic, p-value and effect-size
+    columns, and the full result record as JSON.
+
+    Runs are identified by an inputs digest (data, definitions and code) plus
+    the analysis parameters; recording the same run twice keeps the first.
+    Queries use the indexes on run, family, variable and outcome and return
+    DataFrames without recomputing anything.
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def find_run(self, inputs, params=None):
+        """Newest run_id for an inputs digest (and params, if given), or None"""
+        sql = "SELECT run_id FROM runs WHERE inputs = ?"
+        args = [inputs]
+        if params is not None:
+            sql += " AND params = ?"
+            args.append(json.dumps(params, sort_keys=True))
+        with self._connect() as con:
+            row = con.execute(sql + " ORDER BY run_id DESC LIMIT 1", args).fetchone()
+        return row[0] if row else None
+
+    def latest_run(self):
+        with self._connect() as con:
+            row = con.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0]
+
+    def runs(self):
+        import pandas as pd
+        with self._connect() as con:
+            return pd.read_sql_query(
+                "SELECT runs.run_id, created, inputs, params, COUNT(results.run_id) AS results "
+                "FROM runs LEFT JOIN results USING (run_id) GROUP BY runs.run_id ORDER BY runs.run_id", con)
+
+    def record_run(self, inputs, params, t_test_df=None, anova_results=None, regression=None,
+                   psychometrics=None):
+        """
+        Store one run's results: the perform_statistical_analysis frames, the
+        (coefficients, models) pair of perform_regression_analysis and the
+        {'scales', 'items'} of perform_psychometric_analysis; any may be None.
+        Returns (run_id, added), where added is False if the run was stored before.
+        """
+        params_json = json.dumps(params, sort_keys=True)
+        rows = []
+        if t_test_df is not None:
+            rows += self._rows('t-test', t_test_df.to_dict('records'))
+        if anova_results is not None:
+            records = anova_results.to_dict('records')
+            covariates = []
+            for record in records:
+                for cov, effect in (record.pop('Covariate_Effects', None) or {}).items():
+                    covariates.append({'Variable': record['Variable'], 'Outcome': record['Outcome'],
+                                       'Term': cov, **effect})
+            rows += self._rows('ANCOVA', records)
+            rows += self._rows('ANCOVA covariate', covariates)
+        if regression is not None:
+            coefficients, models = regression
+            rows += self._rows('regression', coefficients.to_dict('records'))
+            rows += self._rows('regression model', models.to_dict('records'))
+        if psychometrics is not None:
+            rows += self._rows('reliability', [{**r, 'Variable': r['Scale']}
+                                               for r in psychometrics['scales'].to_dict('records')])
+            rows += self._rows('item reliability', [{**r, 'Variable': r['Scale'], 'Term': r['Item']}
+                                                    for r in psychometrics['items'].to_dict('records')])
+
+        with self._connect() as con:
+            existing = con.execute("SELECT run_id FROM runs WHERE inputs = ? AND params = ?",
+                                   (inputs, params_json)).fetchone()
+            if existing:
+                return existing[0], False
+            run_id = con.execute("INSERT INTO runs (inputs, params, created) VALUES (?, ?, ?)",
+                                 (inputs, params_json, time.strftime("%Y-%m-%dT%H:%M:%S"))).lastrowid
+            con.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(run_id, *row) for row in rows])
+        return run_id, True
+
+    @staticmethod
+    def _rows(family, records):
+        statistic, effect = FAMILIES[family]
+        rows = []
+        for r in records:
+            raw_p = r.get('raw_p_value', r.get('p_value', r.get('F_p_value')))
+            rows.append((family, r.get('Variable'), r.get('Outcome'), r.get('Term'),
+                         _number(r.get(statistic)) if statistic else None, _number(r.get('dof')),
+                         _number(raw_p), _number(r.get('adj_p_value')), _number(r.get(effect)),
+                         json.dumps(r, default=_json_default)))
+        return rows
+
+    def query(self, family=None, variable=None, outcome=None, run_id=None, max_p=None, records=False):
+        """
+        Results of one run (the latest by default; run_id="all" for every run)
+        as a long DataFrame with columns run_id, family, variable, outcome,
+        term, statistic, dof, raw_p_value, adj_p_value and effect_size.
+        family, variable and outcome take a value or a list of values; max_p
+        keeps rows whose adjusted (else raw) p-value is below it. With records,
+        a 'record' column holds each result's full dict.
+        """
+        import pandas as pd
+        columns = "run_id, family, variable, outcome, term, statistic, dof, raw_p_value, adj_p_value, effect_size"
+        if records:
+            columns += ", record"
+        clauses, args = [], []
+        if run_id is None:
+            run_id = self.latest_run()
+        if run_id != "all":
+            clauses.append("run_id = ?")
+            args.append(run_id)
+        for column, value in (('family', family), ('variable', variable), ('outcome', outcome)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            args += values
+        if max_p is not None:
+            clauses.append("COALESCE(adj_p_value, raw_p_value) < ?")
+            args.append(max_p)
+        sql = f"SELECT {columns} FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._connect() as con:
+            frame = pd.read_sql_query(sql + " ORDER BY rowid", con, params=args)
+        if records:
+            frame['record'] = [json.loads(r) for r in frame['record']]
+        return frame
+
+    def _frame(self, family, run_id):
+        import pandas as pd
+        return pd.DataFrame(list(self.query(family=family, run_id=run_id, records=True)['record']))
+
+    def t_tests(self, run_id=None):
+        """The t-test frame of a run, as returned by perform_statistical_analysis"""
+        return self._frame('t-test', run_id)
+
+    def ancova(self, run_id=None):
+        """The ANCOVA frame of a run, with its nested Covariate_Effects rebuilt"""
+        frame = self._frame('ANCOVA', run_id)
+        if frame.empty:
+            return frame
+        effects = {}
+        for r in self.query(family='ANCOVA covariate', run_id=run_id, records=True)['record']:
+            effect = {k: v for k, v in r.items() if k not in ('Variable', 'Outcome', 'Term')}
+            effects.setdefault((r['Variable'], r['Outcome']), {})[r['Term']] = effect
+        covariate_effects = [effects.get(key, {}) for key in zip(frame['Variable'], frame['Outcome'])]
+        # Same column position as in perform_statistical_analysis
+        position = list(frame.columns).index('partial_eta_squared') + 1
+        frame.insert(position, 'Covariate_Effects', covariate_effects)
+        return frame
+
+if __name__ == "__main__":
+    store = ResultsStore()
+    print(store.runs().to_markdown(index=False))
+    print(store.query(max_p=0.05).to_markdown(index=False))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class Stage:
+    """
+    A pipeline stage: ``run(ctx)`` reads its ``inputs`` from the shared context
+    dict and returns a dict with (at least) its ``outputs``.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=()):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+def stage_dependencies(stages):
+    """Map each stage name to the stages producing its inputs"""
+    producers = {}
+    for stage in stages:
+        for key in stage.outputs:
+            if key in producers:
+                raise ValueError(f"'{key}' is produced by both {producers[key]} and {stage.name}")
+            producers[key] = stage.name
+    deps = {}
+    for stage in stages:
+        missing = [key for key in stage.inputs if key not in producers]
+        if missing:
+            raise ValueError(f"Stage {stage.name} needs {missing}, which no stage produces")
+        deps[stage.name] = sorted({producers[key] for key in stage.inputs})
+    return deps
+
+def select_stages(stages, only=None, until=None):
+    """
+    Names of the stages to run: everything by default; with ``only``, the named
+    stages plus the upstream stages they need; with ``until``, every stage
+    declared up to and including it (plus its upstream stages).
+    """
+    names = [stage.name for stage in stages]
+    deps = stage_dependencies(stages)
+    for target in list(only or []) + ([until] if until else []):
+        if target not in deps:
+            raise ValueError(f"Unknown stage '{target}'. Stages: {', '.join(names)}")
+    if only:
+        targets = list(only)
+    elif until:
+        targets = names[:names.index(until) + 1]
+    else:
+        return names
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(deps[name])
+    return [name for name in names if name in selected]
+
+def run_stages(stages, selected=None, max_workers=None, stage_context=None):
+    """
+    Run stages as soon as all their dependencies have finished, independent
+    stages concurrently in a thread pool. Returns (context, timings) where
+    timings maps stage name to (start, end) seconds since the run started.
+    A failing stage stops scheduling and its exception is re-raised.
+    ``stage_context(name)``, if given, returns a context manager entered around
+    each stage in its worker thread (used for tracing and profiling).
+    """
+    by_name = {stage.name: stage for stage in stages}
+    deps = stage_dependencies(stages)
+    selected = list(selected or by_name)
+    remaining = {name: set(deps[name]) for name in selected}
+    ctx = {}
+    ctx_lock = threading.Lock()
+    timings = {}
+    t0 = time.perf_counter()
+
+    def execute(name):
+        start = time.perf_counter() - t0
+        with ctx_lock:
+            view = dict(ctx)
+        if stage_context is None:
+            result = by_name[name].run(view) or {}
+        else:
+            with stage_context(name):
+                result = by_name[name].run(view) or {}
+        end = time.perf_counter() - t0
+        return name, result, start, end
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(selected), 1)) as pool:
+        running = set()
+        while remaining or running:
+            ready = [name for name, waiting in remaining.items() if not waiting]
+            for name in ready:
+                del remaining[name]
+                running.add(pool.submit(execute, name))
+            if not running:
+                raise RuntimeError(f"Stages cannot run, dependencies not selected: {sorted(remaining)}")
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, result, start, end = future.result()
+                timings[name] = (start, end)
+                with ctx_lock:
+                    ctx.update(result)
+                for waiting in remaining.values():
+                    waiting.discard(name)
+    return ctx, timings
+
+def critical_path(stages, timings):
+    """
+    The chain of stages that determined the total run time: starting from the
+    last stage to finish, repeatedly step to the dependency that finished last.
+    """
+    deps = stage_dependencies(stages)
+    if not timings:
+        return []
+    name = max(timings, key=lambda n: timings[n][1])
+    path = [name]
+    while True:
+        ran = [d for d in deps[name] if d in timings]
+        if not ran:
+            break
+        name = max(ran, key=lambda n: timings[n][1])
+        path.append(name)
+    return path[::-1]
+
+def format_timing_summary(stages, timings):
+    """Per-stage timings plus the critical path, as printable text"""
+    if not timings:
+        return "No stages ran."
+    total = max(end for _, end in timings.values())
+    path = critical_path(stages, timings)
+    lines = ["Stage timings:"]
+    for stage in stages:
+        if stage.name in timings:
+            start, end = timings[stage.name]
+            marker = "*" if stage.name in path else " "
+            lines.append(f" {marker} {stage.name:<14} {end - start:8.3f}s  (start {start:7.3f}s, end {end:7.3f}s)")
+    path_time = sum(timings[n][1] - timings[n][0] for n in path)
+    lines.append(f"Critical path ({path_time:.3f}s of {total:.3f}s wall): {' -> '.join(path)}")
+    return "\n".join(lines)
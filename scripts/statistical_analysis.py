@@ -4,54 +4,775 @@ import pandas as pd
 from scipy import stats
 from statsmodels.stats.multitest import multipletests
 from pathlib import Path
-import pingouin as pg
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from scripts.data_loader import get_outcome_variables, get_variables_by_type
+from scripts.instrumentation import span, measure, get_tracer
 
-def perform_glm_analysis(df, var_defs, cat_col, outcome_cols, demographic_covariates):
+def _masked_moments(y):
     """
-    Simplest ANCOVA using pingouin. Returns flat list of results.
+    Column-wise count, mean and sample variance of a float matrix, ignoring NaNs.
+    Values are taken relative to each column's first present value, so a
+    constant column has exactly its value as mean and zero variance.
     """
-    results = []
-    for outcome_col in outcome_cols:
-        data = df[[cat_col, outcome_col] + demographic_covariates].dropna()
-        if len(data) <= len(demographic_covariates) + 2:
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=0)
+    shift = np.nan_to_num(y[valid.argmax(axis=0), np.arange(y.shape[1])]) if len(y) else np.zeros(y.shape[1])
+    filled = np.where(valid, y - shift, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = filled.sum(axis=0) / n
+        centered = np.where(valid, filled - offset, 0.0)
+        var = (centered ** 2).sum(axis=0) / (n - 1)
+    return n, shift + offset, var
+
+def welch_ttest_batch(y, mask1, mask2):
+    """
+    Welch's t-test of every column of ``y`` between the rows in ``mask1`` and ``mask2``.
+    Matches pingouin.ttest(correction=True): NaNs are dropped per column and
+    Cohen's d uses the pooled SD (absolute value). Returns a dict of arrays.
+    """
+    n1, mean1, var1 = _masked_moments(y[mask1])
+    n2, mean2, var2 = _masked_moments(y[mask2])
+    return welch_from_moments(n1, mean1, var1, n2, mean2, var2)
+
+def welch_from_moments(n1, mean1, var1, n2, mean2, var2):
+    """
+    Welch's t-test and Cohen's d from per-group counts, means and variances
+    (arrays per outcome). A group with fewer than two values has no variance
+    and a constant outcome has a 0/0 t statistic; both give NaN statistics.
+    """
+    var1 = np.where(n1 > 1, var1, np.nan)
+    var2 = np.where(n2 > 1, var2, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        se1 = var1 / n1
+        se2 = var2 / n2
+        t_stat = (mean1 - mean2) / np.sqrt(se1 + se2)
+        dof = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+        pooled_sd = np.sqrt(((n1 - 1) * var1 + (n2 - 1) * var2) / (n1 + n2 - 2))
+        cohens_d = np.abs(mean1 - mean2) / pooled_sd
+    p_val = 2 * stats.t.sf(np.abs(t_stat), dof)
+    return {
+        'n1': n1, 'n2': n2,
+        'mean1': mean1, 'mean2': mean2,
+        'sd1': np.sqrt(var1), 'sd2': np.sqrt(var2),
+        't': t_stat, 'dof': dof, 'p_value': p_val,
+        'cohens_d': cohens_d
+    }
+
+def _type2_effects(xtx_inv, beta, rss, df_resid, term_slices):
+    """
+    Type II F, p and partial eta-squared for each term of an additive model,
+    from (X'X)^-1, the coefficient matrix (params x outcomes) and residual SS.
+    For models without interactions, SS_term = b_T' [(X'X)^-1_TT]^-1 b_T.
+    """
+    n_terms = len(term_slices)
+    k = beta.shape[1]
+    f_vals = np.full((n_terms, k), np.nan)
+    ss_vals = np.full((n_terms, k), np.nan)
+    for t, sl in enumerate(term_slices):
+        b = beta[sl]
+        ss_vals[t] = np.einsum('ik,ik->k', b, np.linalg.solve(xtx_inv[sl, sl], b))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f_vals[t] = (ss_vals[t] / b.shape[0]) / (rss / df_resid)
+    dfs = np.array([sl.stop - sl.start for sl in term_slices])[:, None]
+    p_vals = stats.f.sf(f_vals, dfs, df_resid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np2 = ss_vals / (ss_vals + rss)
+    return f_vals, p_vals, np2
+
+def _type2_by_refit(x, y, term_slices):
+    """
+    Type II effects by refitting each reduced model. Used only when the design
+    is rank deficient and (X'X)^-1 does not exist.
+    """
+    def fit_rss(design):
+        coef, _, rank, _ = np.linalg.lstsq(design, y, rcond=None)
+        resid = y - design @ coef
+        return (resid ** 2).sum(axis=0), rank
+
+    rss, rank = fit_rss(x)
+    df_resid = x.shape[0] - rank
+    n_terms = len(term_slices)
+    f_vals = np.full((n_terms, y.shape[1]), np.nan)
+    p_vals = np.full((n_terms, y.shape[1]), np.nan)
+    np2 = np.full((n_terms, y.shape[1]), np.nan)
+    if df_resid <= 0:
+        # Saturated model: no residual variance to test against
+        return f_vals, p_vals, np2
+    for t, sl in enumerate(term_slices):
+        keep = np.r_[0:sl.start, sl.stop:x.shape[1]]
+        reduced_rss, reduced_rank = fit_rss(x[:, keep])
+        df_term = rank - reduced_rank
+        if df_term == 0:
+            # Term is aliased (e.g. an empty category): not estimable
             continue
-        try:
-            ancova = pg.ancova(data=data, dv=outcome_col, between=cat_col, covar=demographic_covariates)
-            main = ancova[ancova['Source'] == cat_col]
-            if not main.empty:
-                f_val = main['F'].values[0]
-                p_val = main['p-unc'].values[0]
-                partial_eta_sq = main['np2'].values[0]
-            else:
-                f_val = p_val = partial_eta_sq = float('nan')
-            covariate_effects = {}
-            for cov in demographic_covariates:
-                cov_row = ancova[ancova['Source'] == cov]
-                if not cov_row.empty:
-                    covariate_effects[cov] = {
-                        'F': float(cov_row['F'].values[0]),
-                        'p_value': float(cov_row['p-unc'].values[0]),
-                        'partial_eta_sq': float(cov_row['np2'].values[0])
-                    }
-            results.append({
-                'Variable': cat_col,
-                'Outcome': outcome_col,
-                'F_statistic': float(f_val),
-                'p_value': float(p_val),
-                'partial_eta_squared': float(partial_eta_sq),
-                'Covariate_Effects': covariate_effects,
-                'Analysis_Type': 'ANCOVA'
-            })
-        except Exception as e:
-            print(f"Error in ANCOVA for {cat_col} on {outcome_col}: {e}")
+        ss = reduced_rss - rss
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f_vals[t] = (ss / df_term) / (rss / df_resid)
+            np2[t] = ss / (ss + rss)
+        p_vals[t] = stats.f.sf(f_vals[t], df_term, df_resid)
+    return f_vals, p_vals, np2
+
+# Residual SS below this fraction of the total SS counts as an exact fit
+EXACT_FIT_TOL = 1e-10
+
+def ancova_batch(y, group_codes, covariates):
+    """
+    Type II ANCOVA of every column of ``y`` on a categorical factor plus covariates.
+
+    ``group_codes`` holds integer level codes (-1 = missing) and ``covariates`` is
+    an (n x c) float matrix. Outcomes are grouped by missingness pattern so each
+    distinct design is QR-factorized once and solved for all its outcomes together.
+    Matches pingouin.ancova on full-rank designs. In rank-deficient ones each
+    term is tested on the degrees of freedom it adds (NaN if none); outcomes with
+    one group level or no residual variance (saturated, constant or exactly
+    fitted) get NaN effects. Returns F, p and partial eta-squared arrays of shape
+    (1 + c, k) -- row 0 is the main effect, then one row per covariate -- and the
+    number of rows used per outcome.
+    """
+    n_terms = 1 + covariates.shape[1]
+    k = y.shape[1]
+    f_vals = np.full((n_terms, k), np.nan)
+    p_vals = np.full((n_terms, k), np.nan)
+    np2 = np.full((n_terms, k), np.nan)
+    n_used = np.zeros(k, dtype=int)
+
+    base_mask = (group_codes >= 0) & ~np.isnan(covariates).any(axis=1)
+    masks = base_mask[:, None] & ~np.isnan(y)
+    patterns = {}
+    for j in range(k):
+        patterns.setdefault(masks[:, j].tobytes(), []).append(j)
+
+    for cols in patterns.values():
+        rows = masks[:, cols[0]]
+        n = int(rows.sum())
+        n_used[cols] = n
+        if n <= covariates.shape[1] + 2:
             continue
+        codes = group_codes[rows]
+        levels = np.unique(codes)
+        if len(levels) < 2:
+            # No group contrast to test; pingouin.ancova does not fit these either
+            continue
+        dummies = (codes[:, None] == levels[None, 1:]).astype(float)
+        x = np.column_stack([np.ones(n), dummies, covariates[rows]])
+        term_slices = [slice(1, len(levels))]
+        term_slices += [slice(len(levels) + i, len(levels) + i + 1) for i in range(covariates.shape[1])]
+        yy = y[np.ix_(rows, cols)]
+
+        q, r = np.linalg.qr(x)
+        diag = np.abs(np.diag(r))
+        # Fewer rows than parameters (a sparse subset) is rank deficient too
+        if n < x.shape[1] or diag.min() <= diag.max() * x.shape[0] * np.finfo(float).eps:
+            f, p, e = _type2_by_refit(x, yy, term_slices)
+            rss = ((yy - x @ np.linalg.lstsq(x, yy, rcond=None)[0]) ** 2).sum(axis=0)
+        elif n == x.shape[1]:
+            # Saturated model: no residual variance to test against
+            continue
+        else:
+            beta = np.linalg.solve(r, q.T @ yy)
+            resid = yy - x @ beta
+            rss = (resid ** 2).sum(axis=0)
+            r_inv = np.linalg.inv(r)
+            xtx_inv = r_inv @ r_inv.T
+            f, p, e = _type2_effects(xtx_inv, beta, rss, n - x.shape[1], term_slices)
+        # A constant or exactly fitted outcome has no residual variance to test
+        # against: every F is 0/0 or x/0 up to rounding
+        tss = ((yy - yy.mean(axis=0)) ** 2).sum(axis=0)
+        undefined = (np.ptp(yy, axis=0) == 0) | (rss <= tss * EXACT_FIT_TOL)
+        f[:, undefined] = p[:, undefined] = e[:, undefined] = np.nan
+        f_vals[:, cols] = f
+        p_vals[:, cols] = p
+        np2[:, cols] = e
+    return {'F': f_vals, 'p_value': p_vals, 'partial_eta_sq': np2, 'n': n_used}
+
+# Permutations per block. Each block draws its own (block x n) index matrix from
+# a generator seeded by (seed, test, variable, block start), so p-values do not
+# depend on how blocks are spread over workers.
+PERM_BLOCK = 1000
+# Upper bound on block x rows x outcomes elements held at once
+PERM_BUDGET = 8_000_000
+
+def _perm_block_size(n_rows, n_outcomes):
+    return int(max(1, min(PERM_BLOCK, PERM_BUDGET // max(n_rows * n_outcomes, 1))))
+
+def permutation_indices(n, start, stop, seed, stream=()):
+    """(stop - start) x n matrix whose rows are random permutations of range(n)"""
+    rng = np.random.default_rng([seed, *stream, start])
+    return rng.permuted(np.tile(np.arange(n), (stop - start, 1)), axis=1)
+
+def _missing_patterns(masks):
+    """Group columns of a (rows x k) validity mask by identical pattern"""
+    patterns = {}
+    for j in range(masks.shape[1]):
+        patterns.setdefault(masks[:, j].tobytes(), []).append(j)
+    return [(masks[:, cols[0]], cols) for cols in patterns.values()]
+
+def _exceedances(null, observed):
+    """Count of null statistics at least as extreme as observed, per column (with float tolerance)"""
+    tol = 1e-10 * np.maximum(1.0, np.abs(observed))
+    return (null >= observed - tol).sum(axis=0)
+
+def _welch_abs_t(perm, codes, y):
+    """|Welch t| for every permutation row of ``perm`` (index matrix) and outcome column"""
+    g1 = (codes[perm] == 0).astype(float)
+    n1 = g1.sum(axis=1, keepdims=True)
+    n2 = perm.shape[1] - n1
+    s1 = g1 @ y
+    q1 = g1 @ (y ** 2)
+    s2 = y.sum(axis=0) - s1
+    q2 = (y ** 2).sum(axis=0) - q1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var1 = (q1 - s1 ** 2 / n1) / (n1 - 1)
+        var2 = (q2 - s2 ** 2 / n2) / (n2 - 1)
+        return np.abs((s1 / n1 - s2 / n2) / np.sqrt(var1 / n1 + var2 / n2))
+
+def ttest_permutation_counts(y, codes, start, stop, seed, stream=()):
+    """
+    Permutation counts for Welch's t-test of every column of ``y`` between code
+    0 and code 1 rows: group labels are shuffled by the permutations
+    [start, stop) and the two-sided statistic recomputed for all of them and
+    all outcomes with matrix products. Returns (exceed, valid) arrays of length
+    k; the permutation p-value is (1 + exceed) / (1 + n_perm).
+    """
+    k = y.shape[1]
+    exceed = np.zeros(k)
+    valid = np.zeros(k)
+    masks = (codes >= 0)[:, None] & ~np.isnan(y)
+    for p_idx, (rows, cols) in enumerate(_missing_patterns(masks)):
+        sub_codes = codes[rows]
+        if (sub_codes == 0).sum() < 2 or (sub_codes == 1).sum() < 2:
+            continue
+        yy = y[np.ix_(rows, cols)]
+        yy = yy - yy.mean(axis=0)  # centre for numerically stable sums of squares
+        observed = _welch_abs_t(np.arange(len(sub_codes))[None, :], sub_codes, yy)[0]
+        block = _perm_block_size(len(sub_codes), len(cols))
+        for b in range(start, stop, block):
+            perm = permutation_indices(len(sub_codes), b, min(b + block, stop), seed, (*stream, p_idx))
+            exceed[cols] += _exceedances(_welch_abs_t(perm, sub_codes, yy), observed)
+        valid[cols] = stop - start
+    return exceed, valid
+
+def _orthonormal_basis(x):
+    """Orthonormal basis of the column space of x (rank-revealing, via SVD)"""
+    if x.shape[1] == 0:
+        return x
+    u, sv, _ = np.linalg.svd(x, full_matrices=False)
+    tol = sv.max() * max(x.shape) * np.finfo(float).eps if sv.size else 0.0
+    return u[:, sv > tol]
+
+def _freedman_lane_f(perm, resid, q_group, q_cov, total_ss, df_group, df_resid):
+    """Main-effect F for reduced-model residuals permuted by each row of ``perm``"""
+    e = resid[perm]                                   # (b, n, k)
+    ss_group = (np.einsum('bnk,nd->bdk', e, q_group) ** 2).sum(axis=1)
+    ss_cov = (np.einsum('bnk,nd->bdk', e, q_cov) ** 2).sum(axis=1)
+    rss = total_ss - ss_cov - ss_group
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (ss_group / df_group) / (rss / df_resid)
+
+def ancova_permutation_counts(y, group_codes, covariates, start, stop, seed, stream=()):
+    """
+    Freedman-Lane permutation counts for the ANCOVA main effect of every column
+    of ``y``: residuals of the covariates-only model are permuted and the Type II
+    F of the factor recomputed. With the factor dummies residualized on the
+    covariates, each permuted F needs only two projections, done for a whole
+    block of permutations and all outcomes at once. Returns (exceed, valid).
+    """
+    k = y.shape[1]
+    exceed = np.zeros(k)
+    valid = np.zeros(k)
+    base_mask = (group_codes >= 0) & ~np.isnan(covariates).any(axis=1)
+    masks = base_mask[:, None] & ~np.isnan(y)
+    for p_idx, (rows, cols) in enumerate(_missing_patterns(masks)):
+        n = int(rows.sum())
+        if n <= covariates.shape[1] + 2:
+            continue
+        codes = group_codes[rows]
+        levels = np.unique(codes)
+        dummies = (codes[:, None] == levels[None, 1:]).astype(float)
+        q_cov = _orthonormal_basis(np.column_stack([np.ones(n), covariates[rows]]))
+        q_group = _orthonormal_basis(dummies - q_cov @ (q_cov.T @ dummies))
+        df_group = q_group.shape[1]
+        df_resid = n - q_cov.shape[1] - df_group
+        if df_group == 0 or df_resid <= 0:
+            continue
+        yy = y[np.ix_(rows, cols)]
+        resid = yy - q_cov @ (q_cov.T @ yy)
+        total_ss = (resid ** 2).sum(axis=0)
+        args = (resid, q_group, q_cov, total_ss, df_group, df_resid)
+        observed = _freedman_lane_f(np.arange(n)[None, :], *args)[0]
+        block = _perm_block_size(n, len(cols))
+        for b in range(start, stop, block):
+            perm = permutation_indices(n, b, min(b + block, stop), seed, (*stream, p_idx))
+            exceed[cols] += _exceedances(_freedman_lane_f(perm, *args), observed)
+        valid[cols] = stop - start
+    return exceed, valid
+
+# Resamples per bootstrap work unit; seeded like the permutation blocks
+BOOT_BLOCK = 1000
+# Upper bound on resamples x rows x design columns elements held at once
+BOOT_BUDGET = 8_000_000
+
+def stratified_weights(strata, n, m, rng):
+    """
+    Case weights (m x n) for m bootstrap resamples drawn with replacement
+    within each stratum (a list of row-index arrays), so group sizes are fixed.
+    """
+    counts = np.zeros(m * n)
+    offsets = (np.arange(m) * n)[:, None]
+    for rows in strata:
+        idx = rng.integers(0, len(rows), size=(m, len(rows)))
+        counts += np.bincount((offsets + rows[idx]).ravel(), minlength=m * n)
+    return counts.reshape(m, n)
+
+def _cohens_d_weighted(w, codes, y):
+    """|Cohen's d| (pooled SD) of every outcome column for each row of case weights w"""
+    w1 = w * (codes == 0)
+    w2 = w * (codes == 1)
+    n1 = w1.sum(axis=1, keepdims=True)
+    n2 = w2.sum(axis=1, keepdims=True)
+    s1, s2 = w1 @ y, w2 @ y
+    q1, q2 = w1 @ (y ** 2), w2 @ (y ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ss1 = q1 - s1 ** 2 / n1
+        ss2 = q2 - s2 ** 2 / n2
+        pooled_sd = np.sqrt((ss1 + ss2) / (n1 + n2 - 2))
+        return np.abs(s1 / n1 - s2 / n2) / pooled_sd
+
+def _cohens_d_jackknife(codes, y):
+    """Leave-one-out |Cohen's d| (n x k) from closed-form sums"""
+    g1 = codes == 0
+    n1, n2 = g1.sum(), (~g1).sum()
+    s1, s2 = y[g1].sum(axis=0), y[~g1].sum(axis=0)
+    q1, q2 = (y[g1] ** 2).sum(axis=0), (y[~g1] ** 2).sum(axis=0)
+    out = g1[:, None]
+    m1 = np.where(out, n1 - 1, n1)
+    m2 = np.where(out, n2, n2 - 1)
+    t1 = np.where(out, s1 - y, s1)
+    t2 = np.where(out, s2, s2 - y)
+    u1 = np.where(out, q1 - y ** 2, q1)
+    u2 = np.where(out, q2, q2 - y ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pooled_sd = np.sqrt((u1 - t1 ** 2 / m1 + u2 - t2 ** 2 / m2) / (m1 + m2 - 2))
+        return np.abs(t1 / m1 - t2 / m2) / pooled_sd
+
+def _ancova_design(codes, covariates):
+    """[intercept, factor dummies, covariates] design and the number of dummy columns"""
+    levels = np.unique(codes)
+    dummies = (codes[:, None] == levels[None, 1:]).astype(float)
+    return np.column_stack([np.ones(len(codes)), dummies, covariates]), len(levels) - 1
+
+def _weighted_rss(gram, xty, yty):
+    beta = np.linalg.pinv(gram, hermitian=True) @ xty
+    return yty - np.einsum('mpk,mpk->mk', xty, beta)
+
+def _partial_eta_weighted(w, x, n_group, y):
+    """
+    Main-effect partial eta-squared, 1 - RSS_full / RSS_reduced, for each row of
+    case weights w. One weighted Gram matrix per resample serves both models:
+    the covariates-only model is its sub-block without the factor dummies.
+    """
+    xw = (w[:, :, None] * x[None, :, :]).transpose(0, 2, 1)
+    gram = xw @ x
+    xty = xw @ y
+    yty = w @ (y ** 2)
+    keep = np.r_[0, 1 + n_group:x.shape[1]]
+    rss_full = _weighted_rss(gram, xty, yty)
+    rss_reduced = _weighted_rss(gram[:, keep][:, :, keep], xty[:, keep], yty)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 1.0 - rss_full / rss_reduced
+
+def _partial_eta_jackknife(x, n_group, y):
+    """Leave-one-out partial eta-squared (n x k) via deletion residuals e_i / (1 - h_ii)"""
+    def deleted_rss(design):
+        q = _orthonormal_basis(design)
+        resid = y - q @ (q.T @ y)
+        h = (q ** 2).sum(axis=1)[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (resid ** 2).sum(axis=0) - resid ** 2 / (1 - h)
+    keep = np.r_[0, 1 + n_group:x.shape[1]]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 1.0 - deleted_rss(x) / deleted_rss(x[:, keep])
+
+def ttest_bootstrap(y, codes, start, stop, seed, stream=()):
+    """
+    |Cohen's d| of every column of ``y`` for bootstrap resamples [start, stop),
+    resampling within the two groups. Returns a (stop - start) x k array.
+    """
+    boot = np.full((stop - start, y.shape[1]), np.nan)
+    masks = (codes >= 0)[:, None] & ~np.isnan(y)
+    for p_idx, (rows, cols) in enumerate(_missing_patterns(masks)):
+        sub_codes = codes[rows]
+        strata = [np.flatnonzero(sub_codes == g) for g in (0, 1)]
+        if min(len(r) for r in strata) < 2:
+            continue
+        yy = y[np.ix_(rows, cols)]
+        yy = yy - yy.mean(axis=0)
+        n = len(sub_codes)
+        block = int(max(1, min(BOOT_BLOCK, BOOT_BUDGET // max(n * len(cols), 1))))
+        for b in range(start, stop, block):
+            m = min(b + block, stop) - b
+            rng = np.random.default_rng([seed, *stream, p_idx, b])
+            w = stratified_weights(strata, n, m, rng)
+            boot[b - start:b - start + m, cols] = _cohens_d_weighted(w, sub_codes, yy)
+    return boot
+
+def ancova_bootstrap(y, group_codes, covariates, start, stop, seed, stream=()):
+    """
+    ANCOVA main-effect partial eta-squared of every column of ``y`` for
+    bootstrap resamples [start, stop), resampling within factor levels.
+    Returns a (stop - start) x k array.
+    """
+    boot = np.full((stop - start, y.shape[1]), np.nan)
+    base_mask = (group_codes >= 0) & ~np.isnan(covariates).any(axis=1)
+    masks = base_mask[:, None] & ~np.isnan(y)
+    for p_idx, (rows, cols) in enumerate(_missing_patterns(masks)):
+        n = int(rows.sum())
+        if n <= covariates.shape[1] + 2:
+            continue
+        codes = group_codes[rows]
+        x, n_group = _ancova_design(codes, covariates[rows])
+        if n_group == 0:
+            continue
+        strata = [np.flatnonzero(codes == level) for level in np.unique(codes)]
+        yy = y[np.ix_(rows, cols)]
+        yy = yy - yy.mean(axis=0)
+        block = int(max(1, min(BOOT_BLOCK, BOOT_BUDGET // max(n * x.shape[1] * 2, 1))))
+        for b in range(start, stop, block):
+            m = min(b + block, stop) - b
+            rng = np.random.default_rng([seed, *stream, p_idx, b])
+            w = stratified_weights(strata, n, m, rng)
+            boot[b - start:b - start + m, cols] = _partial_eta_weighted(w, x, n_group, yy)
+    return boot
+
+def _acceleration(jack):
+    """BCa acceleration per column from jackknife values (n x k)"""
+    jack = np.where(np.isfinite(jack), jack, np.nan)
+    diff = np.nanmean(jack, axis=0) - jack
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nansum(diff ** 3, axis=0) / (6 * np.nansum(diff ** 2, axis=0) ** 1.5)
+
+def _effect_size_reference(kind, y, codes, covariates=None):
+    """Point estimates and BCa accelerations (length-k arrays) on the full data"""
+    k = y.shape[1]
+    observed = np.full(k, np.nan)
+    accel = np.full(k, np.nan)
+    if kind == 'ttest':
+        masks = (codes >= 0)[:, None] & ~np.isnan(y)
+    else:
+        masks = ((codes >= 0) & ~np.isnan(covariates).any(axis=1))[:, None] & ~np.isnan(y)
+    for rows, cols in _missing_patterns(masks):
+        yy = y[np.ix_(rows, cols)]
+        yy = yy - yy.mean(axis=0)
+        sub_codes = codes[rows]
+        if kind == 'ttest':
+            if (sub_codes == 0).sum() < 2 or (sub_codes == 1).sum() < 2:
+                continue
+            observed[cols] = _cohens_d_weighted(np.ones((1, len(sub_codes))), sub_codes, yy)[0]
+            accel[cols] = _acceleration(_cohens_d_jackknife(sub_codes, yy))
+        else:
+            if rows.sum() <= covariates.shape[1] + 2:
+                continue
+            x, n_group = _ancova_design(sub_codes, covariates[rows])
+            if n_group == 0:
+                continue
+            observed[cols] = _partial_eta_weighted(np.ones((1, len(sub_codes))), x, n_group, yy)[0]
+            accel[cols] = _acceleration(_partial_eta_jackknife(x, n_group, yy))
+    return observed, accel
+
+def _column_quantiles(boot, q):
+    """Linear-interpolation quantile q[j] of column j, ignoring NaNs"""
+    ordered = np.sort(boot, axis=0)  # NaNs sort last
+    valid = (~np.isnan(boot)).sum(axis=0)
+    pos = q * (valid - 1)
+    lo = np.clip(np.floor(pos).astype(int), 0, boot.shape[0] - 1)
+    hi = np.clip(lo + 1, 0, np.maximum(valid - 1, 0))
+    cols = np.arange(boot.shape[1])
+    value = ordered[lo, cols] + (ordered[hi, cols] - ordered[lo, cols]) * (pos - lo)
+    return np.where(valid > 0, value, np.nan)
+
+def bootstrap_ci(boot, observed, accel, level=0.95, method="bca"):
+    """
+    Percentile or BCa confidence limits per column of a (B x k) bootstrap
+    distribution. BCa corrects the percentile levels for median bias
+    (the share of resamples below the estimate) and skewness (the jackknife
+    acceleration). Returns (low, high) arrays.
+    """
+    alpha = (1 - level) / 2
+    quantiles = np.array([alpha, 1 - alpha])[:, None] * np.ones(boot.shape[1])
+    if method == "bca":
+        valid = (~np.isnan(boot)).sum(axis=0)
+        below = (boot < observed).sum(axis=0) + 0.5 * (boot == observed).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            prop = np.clip(below / valid, 0.5 / valid, 1 - 0.5 / valid)
+        z0 = stats.norm.ppf(prop)
+        a = np.nan_to_num(accel)
+        z = stats.norm.ppf([alpha, 1 - alpha])[:, None]
+        quantiles = stats.norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    elif method != "percentile":
+        raise ValueError(f"Unknown CI method '{method}': use 'bca' or 'percentile'")
+    low = _column_quantiles(boot, quantiles[0])
+    high = _column_quantiles(boot, quantiles[1])
+    return low, high
+
+def _ancova_records(cat_col, outcome_cols, covariate_cols, ancova):
+    """
+    Result rows (one per outcome) from ancova_batch output; outcomes with too few
+    complete rows for the model are skipped.
+    """
+    results = []
+    for j, outcome_col in enumerate(outcome_cols):
+        if ancova['n'][j] <= len(covariate_cols) + 2:
+            continue
+        covariate_effects = {}
+        for i, cov in enumerate(covariate_cols, start=1):
+            covariate_effects[cov] = {
+                'F': float(ancova['F'][i, j]),
+                'p_value': float(ancova['p_value'][i, j]),
+                'partial_eta_sq': float(ancova['partial_eta_sq'][i, j])
+            }
+        results.append({
+            'Variable': cat_col,
+            'Outcome': outcome_col,
+            'F_statistic': float(ancova['F'][0, j]),
+            'p_value': float(ancova['p_value'][0, j]),
+            'partial_eta_squared': float(ancova['partial_eta_sq'][0, j]),
+            'Covariate_Effects': covariate_effects,
+            'Analysis_Type': 'ANCOVA'
+        })
+    return results
+
+def _ttest_records(var, groups, outcome_cols, ttest_res):
+    """Result rows (one per outcome) from welch_ttest_batch output; p_value is raw until apply_fdr"""
+    results = []
+    for j, outcome in enumerate(outcome_cols):
+        raw_p_val = ttest_res['p_value'][j]
+        results.append({
+            'Variable': var,
+            'Outcome': outcome,
+            # Store raw p-value, will be adjusted later
+            'raw_p_value': raw_p_val,
+            'p_value': raw_p_val, # Placeholder, overwritten later
+            'Group1': groups[0],
+            'Group2': groups[1],
+            'Group1_Mean': ttest_res['mean1'][j],
+            'Group2_Mean': ttest_res['mean2'][j],
+            'Group1_SD': ttest_res['sd1'][j],
+            'Group2_SD': ttest_res['sd2'][j],
+            't_statistic': ttest_res['t'][j],
+            'dof': ttest_res['dof'][j],
+            'Cohens_d': ttest_res['cohens_d'][j]
+        })
     return results
 
-def perform_statistical_analysis(df, var_defs):
+def _grouped_ancova_records(indep_var, outcome_cols, covariate_cols, ancova):
+    """_ancova_records with raw p-values kept for apply_fdr and the grouping variable recorded"""
+    results = _ancova_records(indep_var, outcome_cols, covariate_cols, ancova)
+    for res in results:
+        # Store raw p-value from main effect, adjust later
+        res['raw_p_value'] = res['p_value']
+        res['Group_By_Independent'] = indep_var
+        for cov_eff in res['Covariate_Effects'].values():
+            cov_eff['raw_p_value'] = cov_eff['p_value']
+    return results
+
+def perform_glm_analysis(df, var_defs, cat_col, outcome_cols, demographic_covariates):
+    """
+    ANCOVA of each outcome on cat_col with demographic covariates, solved for all
+    outcomes at once by ancova_batch. Returns flat list of results.
+    """
+    group_codes = pd.Categorical(df[cat_col]).codes.astype(int)
+    covariates = df[demographic_covariates].to_numpy(dtype=float)
+    y = df[outcome_cols].to_numpy(dtype=float)
+    ancova = ancova_batch(y, group_codes, covariates)
+    return _ancova_records(cat_col, outcome_cols, demographic_covariates, ancova)
+
+# Outcomes per work unit. Fixed (not derived from the worker count) so the serial
+# and parallel paths run identical arithmetic and give bit-identical results.
+OUTCOME_CHUNK = 64
+
+def _ttest_unit(arrays, var_idx, cols):
+    y = arrays['outcomes'][:, cols]
+    codes = arrays['ttest_codes'][:, var_idx]
+    return welch_ttest_batch(y, codes == 0, codes == 1)
+
+def _ancova_unit(arrays, var_idx, cols):
+    y = arrays['outcomes'][:, cols]
+    return ancova_batch(y, arrays['ancova_codes'][:, var_idx], arrays['covariates'])
+
+def _ttest_perm_unit(arrays, var_idx, perms):
+    codes = arrays['ttest_codes'][:, var_idx]
+    seed = int(arrays['perm_seed'][0])
+    return ttest_permutation_counts(arrays['outcomes'], codes, perms.start, perms.stop, seed, (0, var_idx))
+
+def _ancova_perm_unit(arrays, var_idx, perms):
+    codes = arrays['ancova_codes'][:, var_idx]
+    seed = int(arrays['perm_seed'][0])
+    return ancova_permutation_counts(arrays['outcomes'], codes, arrays['covariates'],
+                                     perms.start, perms.stop, seed, (1, var_idx))
+
+def _ttest_boot_unit(arrays, var_idx, resamples):
+    codes = arrays['ttest_codes'][:, var_idx]
+    seed = int(arrays['perm_seed'][0])
+    return ttest_bootstrap(arrays['outcomes'], codes, resamples.start, resamples.stop, seed, (2, var_idx))
+
+def _ancova_boot_unit(arrays, var_idx, resamples):
+    codes = arrays['ancova_codes'][:, var_idx]
+    seed = int(arrays['perm_seed'][0])
+    return ancova_bootstrap(arrays['outcomes'], codes, arrays['covariates'],
+                            resamples.start, resamples.stop, seed, (3, var_idx))
+
+# Unit functions take (arrays, variable index, slice); the slice selects outcome
+# columns for the parametric tests and permutation or resample numbers otherwise
+_UNIT_FUNCS = {'ttest': _ttest_unit, 'ancova': _ancova_unit,
+               'ttest_perm': _ttest_perm_unit, 'ancova_perm': _ancova_perm_unit,
+               'ttest_boot': _ttest_boot_unit, 'ancova_boot': _ancova_boot_unit}
+
+# Per-worker views onto the parent's shared-memory buffers
+_SHARED_ARRAYS = {}
+_SHARED_HANDLES = []
+
+def _attach_shared(specs):
+    """Pool initializer: map the parent's shared-memory blocks as NumPy arrays."""
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _SHARED_HANDLES.append(shm)
+        _SHARED_ARRAYS[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _run_shared_unit(unit):
+    kind, var_idx, start, stop = unit
+    return _UNIT_FUNCS[kind](_SHARED_ARRAYS, var_idx, slice(start, stop))
+
+def _traced_shared_unit(unit):
+    return measure(_run_shared_unit, unit)
+
+def _run_units(units, arrays, workers=None, labels=None):
+    """
+    Run (kind, var_idx, start, stop) work units, serially or across a process pool.
+    In parallel mode the arrays are copied once into shared memory and every worker
+    maps them zero-copy; results come back in unit order either way.
+    Each unit is recorded as a 'test' span named by ``labels`` when tracing is on.
+    """
+    labels = labels or [f"{kind}[{var_idx}]" for kind, var_idx, _, _ in units]
+    if not workers or workers <= 1 or len(units) <= 1:
+        results = []
+        for (kind, var_idx, start, stop), label in zip(units, labels):
+            with span(label, cat="test", outcomes=f"{start}:{stop}"):
+                results.append(_UNIT_FUNCS[kind](arrays, var_idx, slice(start, stop)))
+        return results
+
+    blocks = []
+    specs = {}
+    try:
+        for name, arr in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            blocks.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            specs[name] = (shm.name, arr.shape, arr.dtype.str)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared,
+                                 initargs=(specs,)) as pool:
+            tracer = get_tracer()
+            if tracer is None:
+                return list(pool.map(_run_shared_unit, units))
+            results = []
+            for unit, label, (result, timing) in zip(units, labels, pool.map(_traced_shared_unit, units)):
+                tracer.add(label, "test", timing, outcomes=f"{unit[2]}:{unit[3]}")
+                results.append(result)
+            return results
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+def _outcome_chunks(n_outcomes):
+    return [(start, min(start + OUTCOME_CHUNK, n_outcomes))
+            for start in range(0, n_outcomes, OUTCOME_CHUNK)]
+
+def _merge_chunks(chunks):
+    """Concatenate per-chunk result dicts along the outcome axis."""
+    return {key: np.concatenate([c[key] for c in chunks], axis=-1) for key in chunks[0]}
+
+def covariate_frame(df, demographic_vars):
+    """ANCOVA covariates: numeric demographics as-is, categorical ones one-hot encoded (first level dropped)"""
+    covariate_df = pd.DataFrame(index=df.index)
+    for c in demographic_vars:
+        if pd.api.types.is_numeric_dtype(df[c]):
+            covariate_df[c] = df[c]
+        else:
+            dummies = pd.get_dummies(df[c], prefix=c, drop_first=True)
+            covariate_df = pd.concat([covariate_df, dummies], axis=1)
+    return covariate_df
+
+def _fdr_bh(p_values):
+    """Benjamini-Hochberg adjusted p-values; tests without a p-value (NaN) stay NaN and are not counted"""
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    present = ~np.isnan(p_values)
+    if present.any():
+        adjusted[present] = multipletests(p_values[present], method='fdr_bh')[1]
+    return adjusted
+
+def apply_fdr(t_test_results, anova_results):
+    """
+    Benjamini-Hochberg adjustment of result records in place: one family for the
+    t-tests, one for the ANCOVA main effects and covariates together. Each record
+    (and covariate effect) keeps raw_p_value; p_value and adj_p_value are set to
+    the adjusted value.
+    """
+    # Lists to collect p-values for separate FDR corrections
+    t_test_raw_p_values = [result['raw_p_value'] for result in t_test_results]
+    anova_raw_p_values = []
+    anova_p_value_sources = [] # Tracks source (main/covariate) for mapping ANOVA adjusted p-values
+    for idx, res in enumerate(anova_results):
+        anova_raw_p_values.append(res['raw_p_value'])
+        anova_p_value_sources.append(('main', idx))
+        for cov_name, cov_eff in res['Covariate_Effects'].items():
+            anova_raw_p_values.append(cov_eff['raw_p_value'])
+            anova_p_value_sources.append(('covariate', idx, cov_name))
+
+    # Apply FDR correction separately for t-tests
+    t_test_corrected_pvals = _fdr_bh(t_test_raw_p_values)
+
+    # Apply FDR correction for ANOVAs (main effects and covariates together)
+    anova_corrected_pvals = _fdr_bh(anova_raw_p_values)
+
+    # Store FDR-adjusted p-values for t-tests
+    for i, result in enumerate(t_test_results):
+        result['adj_p_value'] = t_test_corrected_pvals[i]
+        result['p_value'] = result['adj_p_value'] # Update main p-value field
+
+    # Store FDR-adjusted p-values for ANOVAs
+    for i, (source_type, *source_idx) in enumerate(anova_p_value_sources):
+        adj_p = anova_corrected_pvals[i]
+        if source_type == 'main':
+            idx = source_idx[0]
+            anova_results[idx]['adj_p_value'] = adj_p
+            anova_results[idx]['p_value'] = adj_p # Update main p-value field
+        elif source_type == 'covariate':
+            anova_idx, cov_name = source_idx
+            anova_results[anova_idx]['Covariate_Effects'][cov_name]['adj_p_value'] = adj_p
+            anova_results[anova_idx]['Covariate_Effects'][cov_name]['p_value'] = adj_p # Update main p-value field
+
+def perform_statistical_analysis(df, var_defs, workers=None, method="parametric", n_perm=10000, seed=0,
+                                 n_boot=0, ci_level=0.95, ci_method="bca"):
     """
     Minimal orchestration: t-tests, ANCOVA, FDR correction. No CSV output.
+    With workers > 1 the (variable, outcome-chunk) work units run in a process
+    pool over shared-memory copies of the data; results are identical to the
+    serial path.
+    With method="permutation", each t-test and ANCOVA main effect also gets a
+    perm_p_value from n_perm label permutations (Freedman-Lane for ANCOVA),
+    computed in blocks of PERM_BLOCK permutations that are spread over the
+    same worker pool. The parametric and FDR-adjusted p-values are unchanged.
+    With n_boot > 0, Cohen's d and the ANCOVA partial eta-squared get
+    ci_level bootstrap confidence intervals (ci_method "bca" or "percentile")
+    from n_boot resamples drawn within groups, in blocks of BOOT_BLOCK. The
+    seed is stored with the results so the intervals can be reproduced.
     """
+    if method not in ("parametric", "permutation"):
+        raise ValueError(f"Unknown method '{method}': use 'parametric' or 'permutation'")
+    if ci_method not in ("bca", "percentile"):
+        raise ValueError(f"Unknown CI method '{ci_method}': use 'bca' or 'percentile'")
     outcome_cols = get_outcome_variables(var_defs)
     demographic_vars = get_variables_by_type(var_defs, 'demographic', 'categorical')
     independent_vars = get_variables_by_type(var_defs, 'independent', 'categorical')
@@ -63,116 +784,113 @@ def perform_statistical_analysis(df, var_defs):
 
     t_test_results = []
     anova_results = []
-    
-    # Lists to collect p-values for separate FDR corrections
-    t_test_raw_p_values = []
-    anova_raw_p_values = []
-    anova_p_value_sources = [] # Tracks source (main/covariate) for mapping ANOVA adjusted p-values
 
-    # T-tests
+    # T-test groups: code 0/1 = first/second group in order of appearance
+    ttest_vars = []
+    ttest_groups = []
+    ttest_codes = []
     for var in binary_vars:
-        for outcome in outcome_cols:
-            groups = df[var].dropna().unique()
-            if len(groups) != 2:
-                continue
-            group1 = df[df[var] == groups[0]][outcome]
-            group2 = df[df[var] == groups[1]][outcome]
-            # Perform Welch's t-test using pingouin (handles NaNs, provides Cohen's d)
-            # correction=True enables Welch's test (unequal variances)
-            ttest_res = pg.ttest(group1, group2, correction=True)
-            
-            # Extract results from the pingouin DataFrame
-            t_stat = ttest_res['T'].iloc[0]
-            raw_p_val = ttest_res['p-val'].iloc[0]
-            cohens_d = ttest_res['cohen-d'].iloc[0]
-            dof = ttest_res['dof'].iloc[0] # Degrees of freedom might be useful too
-            
-            t_test_raw_p_values.append(raw_p_val) # Collect raw p-value for t-test FDR
-            
-            t_test_results.append({
-                'Variable': var,
-                'Outcome': outcome,
-                # Store raw p-value, will be adjusted later
-                'raw_p_value': raw_p_val,
-                'p_value': raw_p_val, # Placeholder, overwritten later
-                'Group1': groups[0],
-                'Group2': groups[1],
-                'Group1_Mean': group1.mean(),
-                'Group2_Mean': group2.mean(),
-                'Group1_SD': group1.std(),
-                'Group2_SD': group2.std(),
-                't_statistic': t_stat,
-                'dof': dof,
-                'Cohens_d': cohens_d
-            })
+        groups = df[var].dropna().unique()
+        if len(groups) != 2:
+            continue
+        ttest_vars.append(var)
+        ttest_groups.append(groups)
+        ttest_codes.append(np.select([df[var] == groups[0], df[var] == groups[1]], [0, 1], -1))
 
     # ANCOVA grouped by independent variable, covariates = demographics
     independent_vars = [v for v, meta in var_defs['variables'].items() if meta.get('type') == 'independent']
-    for indep_var in independent_vars:
-        # Prepare covariates: one-hot encode demographics
-        covariate_df = pd.DataFrame(index=df.index)
-        for c in demographic_vars:
-            if pd.api.types.is_numeric_dtype(df[c]):
-                covariate_df[c] = df[c]
-            else:
-                dummies = pd.get_dummies(df[c], prefix=c, drop_first=True)
-                covariate_df = pd.concat([covariate_df, dummies], axis=1)
-        covariate_cols = list(covariate_df.columns)
-        df_with_covs = pd.concat([df, covariate_df], axis=1)
-        glm_res = perform_glm_analysis(df_with_covs, var_defs, indep_var, outcome_cols, covariate_cols)
-        for res in glm_res:
-            # Store raw p-value from main effect, adjust later
-            raw_main_p = res['p_value'] # Assumes perform_glm returns raw p-unc
-            res['raw_p_value'] = raw_main_p
-            res['p_value'] = raw_main_p # Placeholder, overwritten later
-            res['Group_By_Independent'] = indep_var
-            anova_results.append(res)
-
-            # Track main effect p-value for ANOVA FDR
-            anova_raw_p_values.append(raw_main_p)
-            anova_p_value_sources.append(('main', len(anova_results) - 1))
-
-            # Track covariate p-values for ANOVA FDR
-            for cov_name, cov_eff in res['Covariate_Effects'].items():
-                raw_cov_p = cov_eff['p_value'] # Assumes perform_glm returns raw p-unc
-                cov_eff['raw_p_value'] = raw_cov_p
-                cov_eff['p_value'] = raw_cov_p # Placeholder, overwritten later
-                anova_raw_p_values.append(raw_cov_p)
-                anova_p_value_sources.append(('covariate', len(anova_results) - 1, cov_name))
+    # Prepare covariates once: one-hot encode demographics
+    covariate_df = covariate_frame(df, demographic_vars)
+    covariate_cols = list(covariate_df.columns)
 
-    # Apply FDR correction separately for t-tests
-    if t_test_raw_p_values:
-        _, t_test_corrected_pvals, _, _ = multipletests(t_test_raw_p_values, method='fdr_bh')
-    else:
-        t_test_corrected_pvals = []
+    n_rows = len(df)
+    arrays = {
+        'outcomes': np.ascontiguousarray(df[outcome_cols].to_numpy(dtype=float)),
+        'ttest_codes': np.column_stack(ttest_codes) if ttest_codes else np.empty((n_rows, 0), dtype=int),
+        'ancova_codes': np.column_stack([pd.Categorical(df[v]).codes.astype(int) for v in independent_vars])
+                        if independent_vars else np.empty((n_rows, 0), dtype=int),
+        'covariates': np.ascontiguousarray(covariate_df.to_numpy(dtype=float)).reshape(n_rows, -1),
+        'perm_seed': np.array([seed]),
+    }
+    chunks = _outcome_chunks(len(outcome_cols))
+    units = [('ttest', i, start, stop) for i in range(len(ttest_vars)) for start, stop in chunks]
+    units += [('ancova', i, start, stop) for i in range(len(independent_vars)) for start, stop in chunks]
+    n_parametric = len(units)
+    if method == "permutation":
+        blocks = [(start, min(start + PERM_BLOCK, n_perm)) for start in range(0, n_perm, PERM_BLOCK)]
+        units += [('ttest_perm', i, start, stop) for i in range(len(ttest_vars)) for start, stop in blocks]
+        units += [('ancova_perm', i, start, stop) for i in range(len(independent_vars)) for start, stop in blocks]
+    n_tests = len(units)
+    if n_boot:
+        boot_blocks = [(start, min(start + BOOT_BLOCK, n_boot)) for start in range(0, n_boot, BOOT_BLOCK)]
+        units += [('ttest_boot', i, start, stop) for i in range(len(ttest_vars)) for start, stop in boot_blocks]
+        units += [('ancova_boot', i, start, stop) for i in range(len(independent_vars)) for start, stop in boot_blocks]
+    var_names = {'ttest': ttest_vars, 'ancova': independent_vars,
+                 'ttest_perm': ttest_vars, 'ancova_perm': independent_vars,
+                 'ttest_boot': ttest_vars, 'ancova_boot': independent_vars}
+    labels = [f"{kind} {var_names[kind][i]}" for kind, i, _, _ in units]
+    unit_results = _run_units(units, arrays, workers, labels)
+    boot_results = unit_results[n_tests:]
+    perm_results = unit_results[n_parametric:n_tests]
+    unit_results = unit_results[:n_parametric]
+    n_chunks = len(chunks)
 
-    # Apply FDR correction for ANOVAs (main effects and covariates together)
-    if anova_raw_p_values:
-        _, anova_corrected_pvals, _, _ = multipletests(anova_raw_p_values, method='fdr_bh')
-    else:
-        anova_corrected_pvals = []
+    # T-tests: one batched pass over every outcome per grouping variable
+    for i, (var, groups) in enumerate(zip(ttest_vars, ttest_groups)):
+        ttest_res = _merge_chunks(unit_results[i * n_chunks:(i + 1) * n_chunks])
+        t_test_results.extend(_ttest_records(var, groups, outcome_cols, ttest_res))
 
-    # Store FDR-adjusted p-values for t-tests
-    if t_test_raw_p_values:
-        for i, result in enumerate(t_test_results):
-            # Raw p-value was already stored during collection
-            result['adj_p_value'] = t_test_corrected_pvals[i]
-            result['p_value'] = result['adj_p_value'] # Update main p-value field
+    ancova_offset = len(ttest_vars) * n_chunks
+    for i, indep_var in enumerate(independent_vars):
+        start = ancova_offset + i * n_chunks
+        ancova = _merge_chunks(unit_results[start:start + n_chunks])
+        anova_results.extend(_grouped_ancova_records(indep_var, outcome_cols, covariate_cols, ancova))
 
-    # Store FDR-adjusted p-values for ANOVAs
-    if anova_raw_p_values:
-        for i, (source_type, *source_idx) in enumerate(anova_p_value_sources):
-            # Raw p-value was already stored during collection
-            adj_p = anova_corrected_pvals[i]
-
-            if source_type == 'main':
-                idx = source_idx[0]
-                anova_results[idx]['adj_p_value'] = adj_p
-                anova_results[idx]['p_value'] = adj_p # Update main p-value field
-            elif source_type == 'covariate':
-                anova_idx, cov_name = source_idx
-                anova_results[anova_idx]['Covariate_Effects'][cov_name]['adj_p_value'] = adj_p
-                anova_results[anova_idx]['Covariate_Effects'][cov_name]['p_value'] = adj_p # Update main p-value field
+    apply_fdr(t_test_results, anova_results)
+
+    if method == "permutation":
+        # Sum exceedance counts over permutation blocks per variable
+        n_blocks = len(blocks)
+        perm_p = {}
+        for u, kind in enumerate(['ttest_perm'] * len(ttest_vars) + ['ancova_perm'] * len(independent_vars)):
+            counts = perm_results[u * n_blocks:(u + 1) * n_blocks]
+            exceed = sum(c[0] for c in counts)
+            valid = sum(c[1] for c in counts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                p = np.where(valid > 0, (1 + exceed) / (1 + valid), np.nan)
+            var = var_names[kind][u if kind == 'ttest_perm' else u - len(ttest_vars)]
+            perm_p[(kind, var)] = dict(zip(outcome_cols, p))
+        for result in t_test_results:
+            result['perm_p_value'] = perm_p[('ttest_perm', result['Variable'])][result['Outcome']]
+            result['n_perm'] = n_perm
+        for result in anova_results:
+            result['perm_p_value'] = perm_p[('ancova_perm', result['Variable'])][result['Outcome']]
+            result['n_perm'] = n_perm
+
+    if n_boot:
+        # Stack the resample blocks per variable, then one interval per outcome
+        n_blocks = len(boot_blocks)
+        cis = {}
+        for u, kind in enumerate(['ttest'] * len(ttest_vars) + ['ancova'] * len(independent_vars)):
+            i = u if kind == 'ttest' else u - len(ttest_vars)
+            boot = np.vstack(boot_results[u * n_blocks:(u + 1) * n_blocks])
+            if kind == 'ttest':
+                codes = arrays['ttest_codes'][:, i]
+                observed, accel = _effect_size_reference(kind, arrays['outcomes'], codes)
+            else:
+                codes = arrays['ancova_codes'][:, i]
+                observed, accel = _effect_size_reference(kind, arrays['outcomes'], codes, arrays['covariates'])
+            low, high = bootstrap_ci(boot, observed, accel, ci_level, ci_method)
+            cis[(kind, var_names[kind][i])] = {o: (low[j], high[j]) for j, o in enumerate(outcome_cols)}
+        for kind, results, column in (('ttest', t_test_results, 'Cohens_d'),
+                                      ('ancova', anova_results, 'partial_eta_squared')):
+            for result in results:
+                result[f'{column}_CI_low'], result[f'{column}_CI_high'] = \
+                    cis[(kind, result['Variable'])][result['Outcome']]
+                result['CI_method'] = ci_method
+                result['CI_level'] = ci_level
+                result['n_boot'] = n_boot
+                result['bootstrap_seed'] = seed
 
     print("Analysis complete.")
     t_test_df = pd.DataFrame(t_test_results)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.validation import split_replica
+
+def expand_definitions(var_defs, multiplier=1):
+    """
+    Variable definitions with the independent variables and the IES-3 scales
+    copied ``multiplier`` times; copies get a " r2", " r3", ... suffix. The
+    demographic covariates are left as they are so every ANCOVA keeps the same
+    design width. Outcomes are re-derived from question_groups as
+    "<group> avg" per subscale plus "Total Score Avg".
+    """
+    variables = {name: dict(info) for name, info in var_defs['variables'].items()
+                 if info['type'] != 'outcome'}
+    descriptions = {name: info.get('description') for name, info in var_defs['variables'].items()
+                    if info['type'] == 'outcome'}
+    question_groups = {}
+    for r in range(multiplier):
+        suffix = "" if r == 0 else f" r{r + 1}"
+        if r > 0:
+            for name, info in var_defs['variables'].items():
+                if info['type'] == 'independent':
+                    variables[f"{name}{suffix}"] = dict(info)
+        for d, (group, items) in enumerate(var_defs['question_groups'].items(), start=1):
+            question_groups[f"{group}{suffix}"] = [f"{q}{suffix}" for q in items]
+            variables[f"{group} avg{suffix}"] = {
+                'type': 'outcome', 'format': 'numeric', 'domain': d,
+                'description': descriptions.get(f"{group} avg", group),
+            }
+        variables[f"Total Score Avg{suffix}"] = {
+            'type': 'outcome', 'format': 'numeric',
+            'description': descriptions.get("Total Score Avg", "Total score"),
+        }
+    expanded = {'variables': variables, 'question_groups': question_groups}
+    if 'item_range' in var_defs:
+        expanded['item_range'] = var_defs['item_range']
+    return expanded
+
+def _category_probabilities(rng, n_levels):
+    """Unequal but non-degenerate level frequencies, like real survey groups"""
+    return rng.dirichlet(np.full(n_levels, 2.0))
+
+def synthesize_raw_data(var_defs, n_rows, missing_rate=0.0, seed=0, item_range=(1, 5)):
+    """
+    Raw survey responses in the data.tsv layout for (possibly expanded)
+    variable definitions.
+
+    Categorical answers use the codes in var_defs. Items are integers in
+    item_range driven by a latent trait per respondent and subscale (so items,
+    subscales and totals correlate) with small shifts per "Yes" answer to the
+    independent variables. Subscale sums, the total and their averages are
+    derived from the items as in the real export. A ``missing_rate`` share of
+    categorical answers and items is blanked at random; a missing item leaves
+    its subscale and the total missing.
+    """
+    rng = np.random.default_rng(seed)
+    lo, hi = item_range
+    data = {}
+
+    general = rng.standard_normal(n_rows)
+    for name, info in var_defs['variables'].items():
+        if info['type'] == 'inclusion':
+            data[name] = np.ones(n_rows, dtype=int)
+        elif info['type'] in ('demographic', 'independent'):
+            codes = np.array([int(k) for k in info['values']])
+            values = rng.choice(codes, size=n_rows, p=_category_probabilities(rng, len(codes)))
+            if info['type'] == 'independent':
+                # "Yes" (the first code) lowers the latent score a little
+                general -= 0.15 * (values == codes[0])
+            if info['type'] == 'demographic':
+                data[f"{name} - Selected Choice"] = values
+                data[f"{name} - Other - Text"] = np.full(n_rows, np.nan)
+            else:
+                data[name] = values
+    data["What sport do you participate in?"] = rng.integers(1, 31, size=n_rows)
+
+    mid = (lo + hi) / 2 + 0.8
+    totals = {}
+    for group, items in var_defs['question_groups'].items():
+        trait = 0.6 * general + 0.8 * rng.standard_normal(n_rows)
+        group_sum = np.zeros(n_rows)
+        for q in items:
+            values = np.clip(np.rint(mid + 0.9 * trait + 0.7 * rng.standard_normal(n_rows)), lo, hi)
+            if missing_rate:
+                values[rng.random(n_rows) < missing_rate] = np.nan
+            data[q] = values
+            group_sum += values
+        base, suffix = split_replica(group)
+        data[group] = group_sum
+        data[f"{base} avg{suffix}"] = np.round(group_sum / len(items), 2)
+        # Each scale replica (" r2", ...) gets its own total
+        total, n_items = totals.get(suffix, (0.0, 0))
+        totals[suffix] = (total + group_sum, n_items + len(items))
+
+    for suffix, (total, n_items) in totals.items():
+        data[f"Total Score{suffix}"] = total
+        data[f"Total Score Avg{suffix}"] = np.round(total / n_items, 2)
+
+    df = pd.DataFrame(data)
+    if missing_rate:
+        for name, info in var_defs['variables'].items():
+            if info['type'] in ('demographic', 'independent'):
+                col = f"{name} - Selected Choice" if info['type'] == 'demographic' else name
+                df.loc[rng.random(n_rows) < missing_rate, col] = np.nan
+    return df
+
+def write_synthetic_dataset(out_dir, var_defs, n_rows, multiplier=1, missing_rate=0.0, seed=0):
+    """
+    Write data.tsv and variable_definitions.json for a synthetic dataset to
+    out_dir. Returns (data path, definitions path).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    defs = expand_definitions(var_defs, multiplier)
+    df = synthesize_raw_data(defs, n_rows, missing_rate=missing_rate, seed=seed)
+    data_path = out_dir / "data.tsv"
+    defs_path = out_dir / "variable_definitions.json"
+    df.to_csv(data_path, sep='\t', index=False)
+    defs_path.write_text(json.dumps(defs, indent=4))
+    return data_path, defs_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic IES-3 dataset")
+    parser.add_argument("out_dir", help="directory for data.tsv and variable_definitions.json")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--multiplier", type=int, default=1,
+                        help="copies of the independent variables and scales")
+    parser.add_argument("--missing", type=float, default=0.0,
+                        help="share of categorical answers and items left blank")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--defs", default=Path(__file__).parent.parent / "data" / "variable_definitions.json",
+                        help="base variable definitions")
+    args = parser.parse_args()
+    with open(args.defs) as f:
+        base_defs = json.load(f)
+    paths = write_synthetic_dataset(args.out_dir, base_defs, args.rows, multiplier=args.multiplier,
+                                    missing_rate=args.missing, seed=args.seed)
+    print(f"Wrote {paths[0]} and {paths[1]}")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import numpy as np
+import pandas as pd
+
+# Supplied averages are rounded to two decimals in the export
+AVG_TOLERANCE = 0.005 + 1e-9
+SUM_TOLERANCE = 1e-6
+TOTAL_SUM = "Total Score"
+TOTAL_AVG = "Total Score Avg"
+REPORT_COLUMNS = ['Row', 'Excluded', 'Issues']
+
+def split_replica(name):
+    """Split the suffix of a scale replicated by synthetic_data.expand_definitions: "SS1 r2" -> ("SS1", " r2")"""
+    base, _, last = name.rpartition(" ")
+    if base and last[:1] == "r" and last[1:].isdigit():
+        return base, f" {last}"
+    return name, ""
+
+def score_columns(var_defs):
+    """
+    The supplied score columns that can be recomputed from the items in
+    question_groups: a list of (column, items, 'sum' or 'avg'). Subscales are
+    "<group>" (sum) and "<group> avg"; the total is "Total Score" and
+    "Total Score Avg" over every grouped item.
+    """
+    scores = []
+    totals = {}
+    for group, items in var_defs.get('question_groups', {}).items():
+        base, suffix = split_replica(group)
+        scores.append((group, items, 'sum'))
+        scores.append((f"{base} avg{suffix}", items, 'avg'))
+        totals.setdefault(suffix, []).extend(items)
+    for suffix, items in totals.items():
+        scores.append((f"{TOTAL_SUM}{suffix}", items, 'sum'))
+        scores.append((f"{TOTAL_AVG}{suffix}", items, 'avg'))
+    return scores
+
+def _numeric(series):
+    """Float values and a mask of entries that are present but not numbers"""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    return values, np.isnan(values) & series.notna().to_numpy()
+
+def _codebook(info):
+    """Accepted raw answers for a coded variable: its codes and their labels"""
+    return [int(k) for k in info['values']] + list(info['values'].values())
+
+def inclusion_mask(df, var_defs):
+    """
+    Rows meeting every inclusion criterion (the "type": "inclusion" variables):
+    the answer must be one of the variable's listed codes, so a missing answer
+    excludes the row. Returns (mask, {variable: rows failing it}).
+    """
+    failed = {}
+    for col, info in var_defs['variables'].items():
+        if info['type'] != 'inclusion':
+            continue
+        if col not in df.columns:
+            print(f"Inclusion criterion not in the data, not applied: {col}")
+            continue
+        failed[col] = ~df[col].isin(_codebook(info)).to_numpy()
+    mask = ~np.column_stack(list(failed.values())).any(axis=1) if failed else np.ones(len(df), dtype=bool)
+    return mask, failed
+
+def validate_data(df, var_defs):
+    """
+    Check raw survey rows (after column renaming, before categorical
+    conversion) against the definitions, one vectorized pass per column:
+
+    - inclusion criteria, combined into one boolean mask;
+    - coded variables whose answer is neither a listed code nor its label;
+    - items outside var_defs['item_range'] (when given) or not whole numbers;
+    - supplied subscale and total scores that disagree with the items (each
+      group's sums come from one matrix-vector product) or lie outside the
+      range the items allow.
+
+    Returns (included mask, report) where the report has one row per flagged
+    data row: its index label, whether the inclusion criteria exclude it, and
+    its issues joined with "; ".
+    """
+    included, failed = inclusion_mask(df, var_defs)
+    issues = {f"fails inclusion: {col}": rows for col, rows in failed.items()}
+
+    for col, info in var_defs['variables'].items():
+        if info.get('format') == 'categorical' and isinstance(info.get('values'), dict) and col in df.columns:
+            series = df[col]
+            issues[f"invalid code: {col}"] = (series.notna() & ~series.isin(_codebook(info))).to_numpy()
+
+    item_range = var_defs.get('item_range')
+    items = {}
+    for q in dict.fromkeys(q for group in var_defs.get('question_groups', {}).values() for q in group):
+        if q in df.columns:
+            values, non_numeric = _numeric(df[q])
+            items[q] = values
+            bad = non_numeric | ((values != np.round(values)) & ~np.isnan(values))
+            if item_range is not None:
+                lo, hi = item_range
+                bad |= (values < lo) | (values > hi)
+            issues[f"out of range: {q}"] = bad
+
+    for col, group, kind in score_columns(var_defs):
+        if col not in df.columns or not all(q in items for q in group):
+            continue
+        supplied, non_numeric = _numeric(df[col])
+        recomputed = np.column_stack([items[q] for q in group]) @ np.ones(len(group))
+        tolerance = SUM_TOLERANCE
+        if kind == 'avg':
+            recomputed /= len(group)
+            tolerance = AVG_TOLERANCE
+        # Rows with a missing item cannot be checked against the items
+        issues[f"score mismatch: {col}"] = np.abs(supplied - recomputed) > tolerance
+        bad = non_numeric
+        if item_range is not None:
+            lo, hi = item_range
+            scale = len(group) if kind == 'sum' else 1
+            bad = bad | (supplied < lo * scale - tolerance) | (supplied > hi * scale + tolerance)
+        issues[f"out of range: {col}"] = bad
+
+    names = list(issues)
+    flags = np.column_stack([issues[name] for name in names]) if names else np.zeros((len(df), 0), dtype=bool)
+    flagged = flags.any(axis=1)
+    rows = flags[flagged]
+    text = np.full(len(rows), "", dtype=object)
+    for j, name in enumerate(names):
+        text = np.where(rows[:, j], np.where(text == "", name, text + "; " + name), text)
+    report = pd.DataFrame({
+        'Row': df.index[flagged],
+        'Excluded': ~included[flagged],
+        'Issues': text,
+    }, columns=REPORT_COLUMNS)
+
+    if len(report):
+        counts = {name: int(n) for name, n in zip(names, flags.sum(axis=0)) if n}
+        print(f"Validation: {int((~included).sum())} of {len(df)} rows excluded by the inclusion criteria, "
+              f"{len(report)} rows flagged")
+        for name, n in counts.items():
+            print(f"  {name}: {n} row(s)")
+    return included, report
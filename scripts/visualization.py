@@ -1,22 +1,94 @@
 import pandas as pd
 import numpy as np
 import altair as alt
-from scipy.stats import contingency
+from scripts.correlation_analysis import cramers_v_matrix
 
-def create_visualizations(df, var_defs=None):
+def histogram_table(values, maxbins=20):
+    """Histogram bins of a numeric column: bin_start, bin_end, count"""
+    values = pd.to_numeric(values, errors='coerce').dropna().to_numpy(dtype=float)
+    if len(values) == 0:
+        return pd.DataFrame(columns=['bin_start', 'bin_end', 'count'])
+    counts, edges = np.histogram(values, bins=min(maxbins, max(len(np.unique(values)), 1)))
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+def box_summary_tables(df, value_cols, group_col=None):
     """
-    Create Altair-based visualizations of the data.
-    Returns a dictionary of Altair chart objects.
+    Tukey boxplot statistics computed server-side, per value column and group:
+    quartiles, whiskers at the most extreme values within 1.5 IQR, and outliers
+    collapsed to (value, count) pairs so the table size does not grow with rows.
+    Returns (summary, outliers) DataFrames keyed by 'Score Type' (and 'group').
     """
-    if not var_defs:
-        return {}
+    id_vars = [group_col] if group_col else []
+    long = df[id_vars + list(value_cols)].melt(id_vars=id_vars, var_name='Score Type', value_name='Score')
+    long = long.dropna()
+    if group_col:
+        long = long.rename(columns={group_col: 'group'})
+        long['group'] = long['group'].astype(str)
+    keys = ['Score Type'] + (['group'] if group_col else [])
+    grouped = long.groupby(keys, observed=True)['Score']
+    summary = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    summary.columns = ['q1', 'median', 'q3']
+    summary['count'] = grouped.size()
+    iqr = summary['q3'] - summary['q1']
+    summary['lower_fence'] = summary['q1'] - 1.5 * iqr
+    summary['upper_fence'] = summary['q3'] + 1.5 * iqr
+    summary = summary.reset_index()
 
-    # Get variables by type from metadata
-    outcome_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'outcome']
-    demographic_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'demographic']
-    independent_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'independent']
-    categorical_vars = demographic_cols + independent_cols
+    long = long.merge(summary[keys + ['lower_fence', 'upper_fence']], on=keys)
+    inside = (long['Score'] >= long['lower_fence']) & (long['Score'] <= long['upper_fence'])
+    whiskers = long[inside].groupby(keys, observed=True)['Score'].agg(lower='min', upper='max').reset_index()
+    summary = summary.merge(whiskers, on=keys, how='left').drop(columns=['lower_fence', 'upper_fence'])
+    outliers = long[~inside].groupby(keys + ['Score'], observed=True).size().rename('count').reset_index()
+    return summary, outliers
+
+def compact_boxplot(df, value_cols, group_col=None, title='', y_title='Score'):
+    """Layered boxplot over pre-aggregated summary and outlier tables"""
+    summary, outliers = box_summary_tables(df, value_cols, group_col)
+    x = alt.X('Score Type:N', title='Score Type')
+    color = alt.Color('group:N', title=group_col) if group_col else alt.Color('Score Type:N')
+    offset = {'xOffset': alt.XOffset('group:N')} if group_col else {}
+    tooltip = ['Score Type:N'] + (['group:N'] if group_col else []) + \
+              ['count:Q', 'lower:Q', 'q1:Q', 'median:Q', 'q3:Q', 'upper:Q']
+    base = alt.Chart(summary).encode(x=x, **offset)
+    whisker = base.mark_rule().encode(y=alt.Y('lower:Q', title=y_title), y2='upper:Q')
+    box = base.mark_bar(size=14).encode(y='q1:Q', y2='q3:Q', color=color, tooltip=tooltip)
+    median = base.mark_tick(color='white', size=14).encode(y='median:Q')
+    layers = [whisker, box, median]
+    if len(outliers):
+        layers.append(alt.Chart(outliers).mark_point().encode(
+            x=x, y='Score:Q', color=color, tooltip=['Score:Q', 'count:Q'], **offset))
+    return alt.layer(*layers).properties(title=title, width=300, height=300)
 
+def compact_pair_plot(df, cols, bins=20):
+    """Pair plot of binned 2-D counts per outcome pair instead of raw points"""
+    frames = []
+    for row in cols:
+        for col in cols:
+            pair = df[[col, row]].apply(pd.to_numeric, errors='coerce').dropna().to_numpy(dtype=float)
+            if len(pair) == 0:
+                continue
+            counts, x_edges, y_edges = np.histogram2d(pair[:, 0], pair[:, 1], bins=bins)
+            xi, yi = np.nonzero(counts)
+            frames.append(pd.DataFrame({
+                'row': row, 'column': col,
+                'x': (x_edges[xi] + x_edges[xi + 1]) / 2,
+                'y': (y_edges[yi] + y_edges[yi + 1]) / 2,
+                'count': counts[xi, yi].astype(int),
+            }))
+    binned = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['row', 'column', 'x', 'y', 'count'])
+    return alt.Chart(binned).mark_circle().encode(
+        x=alt.X('x:Q', title=None, scale=alt.Scale(zero=False)),
+        y=alt.Y('y:Q', title=None, scale=alt.Scale(zero=False)),
+        size=alt.Size('count:Q', legend=None),
+        tooltip=['column:N', 'row:N', 'x:Q', 'y:Q', 'count:Q']
+    ).properties(width=120, height=120).facet(
+        row=alt.Row('row:N', sort=list(cols), title=None),
+        column=alt.Column('column:N', sort=list(cols), title=None)
+    ).resolve_scale(x='independent', y='independent').properties(title="Outcome Pair Plot")
+
+def _raw_row_charts(df, outcome_cols, categorical_vars):
+    """Distribution and boxplot charts that embed the raw rows"""
     charts = {}
 
     # Distribution plots for outcomes
@@ -57,6 +129,50 @@ def create_visualizations(df, var_defs=None):
         ).properties(title=f'Scores by {cat}', width=300, height=300).interactive()
         for cat in categorical_vars
     }
+    return charts
+
+def create_visualizations(df, var_defs=None, compact=False):
+    """
+    Create Altair-based visualizations of the data.
+    Returns a dictionary of Altair chart objects.
+    With compact=True, histograms, boxplots and the pair plot are built from
+    aggregate tables computed here instead of embedding the raw rows, so spec
+    size does not grow with the number of respondents.
+    """
+    if not var_defs:
+        return {}
+
+    # Get variables by type from metadata
+    outcome_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'outcome']
+    demographic_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'demographic']
+    independent_cols = [col for col, info in var_defs['variables'].items() if info['type'] == 'independent']
+    categorical_vars = demographic_cols + independent_cols
+
+    charts = {}
+
+    if compact:
+        charts['distributions'] = {}
+        for col in outcome_cols:
+            charts['distributions'][col] = alt.Chart(histogram_table(df[col])).mark_bar().encode(
+                alt.X('bin_start:Q', bin='binned', title=col),
+                x2='bin_end:Q',
+                y=alt.Y('count:Q', title='Count of Records'),
+                tooltip=['bin_start:Q', 'bin_end:Q', 'count:Q']
+            ).properties(title=f'Distribution of {col}', width=300, height=200).interactive()
+        for col in categorical_vars:
+            counts = df[col].astype(str).where(df[col].notna()).value_counts(dropna=False).reset_index()
+            counts.columns = ['value', 'count']
+            charts['distributions'][col] = alt.Chart(counts).mark_bar().encode(
+                x=alt.X('value:N', title=col),
+                y=alt.Y('count:Q', title='Count of Records'),
+                tooltip=['value:N', 'count:Q']
+            ).properties(title=f'Distribution of {col}', width=300, height=200).interactive()
+        charts['boxplots'] = {
+            cat: compact_boxplot(df, outcome_cols, cat, title=f'Scores by {cat}')
+            for cat in categorical_vars
+        }
+    else:
+        charts.update(_raw_row_charts(df, outcome_cols, categorical_vars))
 
     # Correlation heatmap
     corr = df[outcome_cols].corr()
@@ -70,20 +186,10 @@ def create_visualizations(df, var_defs=None):
     ).properties(title='Correlation Heatmap: Outcome Variables', width=300, height=300)
 
     # Cramér's V heatmap
-    n_cats = len(categorical_vars)
-    cramer_matrix = np.zeros((n_cats, n_cats))
-    for i, var1 in enumerate(categorical_vars):
-        for j, var2 in enumerate(categorical_vars):
-            if i > j:
-                try:
-                    table = pd.crosstab(df[var1], df[var2])
-                    v = contingency.association(table, method='cramer')
-                    cramer_matrix[i, j] = v
-                    cramer_matrix[j, i] = v
-                except:
-                    cramer_matrix[i, j] = 0
-                    cramer_matrix[j, i] = 0
-    cramer_df = pd.DataFrame(cramer_matrix, index=categorical_vars, columns=categorical_vars).reset_index().melt('index')
+    cramer_matrix, failures = cramers_v_matrix(df, categorical_vars)
+    for (var1, var2), reason in failures.items():
+        print(f"Cramér's V not computed for {var1} x {var2}: {reason}")
+    cramer_df = cramer_matrix.reset_index().melt('index')
     cramer_df.columns = ['Variable1', 'Variable2', 'CramersV']
     charts['cramer'] = alt.Chart(cramer_df).mark_rect().encode(
         x='Variable1:O',
@@ -92,29 +198,33 @@ def create_visualizations(df, var_defs=None):
         tooltip=['Variable1', 'Variable2', 'CramersV']
     ).properties(title="Categorical Associations (Cramér's V)", width=300, height=300)
 
-    # Pair plot
-    charts['pair_plot'] = alt.Chart(df).mark_point(filled=True, size=30).encode(
-        x=alt.X(alt.repeat('column'), type='quantitative', scale=alt.Scale(zero=False)),
-        y=alt.Y(alt.repeat('row'), type='quantitative', scale=alt.Scale(zero=False)),
-        tooltip=[
-            alt.Tooltip(alt.repeat('column'), type='quantitative'),
-            alt.Tooltip(alt.repeat('row'), type='quantitative')
-        ]
-    ).repeat(
-        row=outcome_cols,
-        column=outcome_cols
-    ).properties(title="Outcome Pair Plot")
-
-    # Score boxplot
-    df_scores = df[outcome_cols].melt(var_name='Score Type', value_name='Score')
-    charts['score_boxplot'] = alt.Chart(df_scores).mark_boxplot().encode(
-        x=alt.X('Score Type:N', title='Score Type'),
-        y=alt.Y('Score:Q', title='Score'),
-        color='Score Type:N'
-    ).properties(
-        title='Score Distributions',
-        width=300,
-        height=300
-    )
+    if compact:
+        charts['pair_plot'] = compact_pair_plot(df, outcome_cols)
+        charts['score_boxplot'] = compact_boxplot(df, outcome_cols, title='Score Distributions')
+    else:
+        # Pair plot
+        charts['pair_plot'] = alt.Chart(df).mark_point(filled=True, size=30).encode(
+            x=alt.X(alt.repeat('column'), type='quantitative', scale=alt.Scale(zero=False)),
+            y=alt.Y(alt.repeat('row'), type='quantitative', scale=alt.Scale(zero=False)),
+            tooltip=[
+                alt.Tooltip(alt.repeat('column'), type='quantitative'),
+                alt.Tooltip(alt.repeat('row'), type='quantitative')
+            ]
+        ).repeat(
+            row=outcome_cols,
+            column=outcome_cols
+        ).properties(title="Outcome Pair Plot")
+
+        # Score boxplot
+        df_scores = df[outcome_cols].melt(var_name='Score Type', value_name='Score')
+        charts['score_boxplot'] = alt.Chart(df_scores).mark_boxplot().encode(
+            x=alt.X('Score Type:N', title='Score Type'),
+            y=alt.Y('Score:Q', title='Score'),
+            color='Score Type:N'
+        ).properties(
+            title='Score Distributions',
+            width=300,
+            height=300
+        )
 
     return charts
\ No newline at end of file